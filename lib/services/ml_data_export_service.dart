@@ -8,11 +8,21 @@ import 'package:share_plus/share_plus.dart';
 import '../models/pet.dart';
 import '../models/pet_personality.dart';
 import '../models/interaction_history.dart';
+import '../utils/ml_binary_format.dart';
 import '../utils/ml_feature_extractor.dart';
 
+/// Formato del archivo exportado
+enum ExportFormat {
+  /// JSON (`.json`), legible y compatible con cualquier herramienta
+  json,
+
+  /// Binario compacto (`.tmlb`, ver [MLBinaryFormat]) para exportaciones grandes
+  binary,
+}
+
 /// Servicio para exportar datos de entrenamiento ML
 ///
-/// Permite exportar historial de interacciones en formato JSON
+/// Permite exportar historial de interacciones en formato JSON o binario
 /// para entrenar modelos TensorFlow Lite externamente.
 class MLDataExportService {
   static final MLDataExportService _instance = MLDataExportService._internal();
@@ -26,6 +36,7 @@ class MLDataExportService {
     required Pet pet,
     required PetPersonality personality,
     required InteractionHistory history,
+    ExportFormat format = ExportFormat.json,
   }) async {
     if (history.interactions.isEmpty) {
       return ExportResult(
@@ -107,7 +118,7 @@ class MLDataExportService {
       };
 
       // Guardar archivo
-      final filePath = await _saveToFile(exportData);
+      final filePath = await _saveToFile(exportData, format: format);
 
       return ExportResult(
         success: true,
@@ -126,6 +137,7 @@ class MLDataExportService {
   /// Genera datos sintéticos para entrenamiento inicial
   Future<ExportResult> generateSyntheticData({
     int recordCount = 500,
+    ExportFormat format = ExportFormat.json,
   }) async {
     try {
       final random = Random();
@@ -194,6 +206,7 @@ class MLDataExportService {
       final filePath = await _saveToFile(
         exportData,
         filename: 'ml_synthetic_data',
+        format: format,
       );
 
       return ExportResult(
@@ -220,17 +233,25 @@ class MLDataExportService {
     );
   }
 
-  /// Guarda datos en archivo JSON
+  /// Guarda datos en archivo JSON (sin indentación) o binario
   Future<String> _saveToFile(
     Map<String, dynamic> data, {
     String filename = 'ml_training_data',
+    ExportFormat format = ExportFormat.json,
   }) async {
     final directory = await getTemporaryDirectory();
     final timestamp = DateTime.now().millisecondsSinceEpoch;
-    final file = File('${directory.path}/${filename}_$timestamp.json');
 
-    final jsonString = const JsonEncoder.withIndent('  ').convert(data);
-    await file.writeAsString(jsonString);
+    if (format == ExportFormat.binary) {
+      final file = File(
+        '${directory.path}/${filename}_$timestamp.${MLBinaryFormat.fileExtension}',
+      );
+      await file.writeAsBytes(MLBinaryFormat.encode(data));
+      return file.path;
+    }
+
+    final file = File('${directory.path}/${filename}_$timestamp.json');
+    await file.writeAsString(jsonEncode(data));
 
     return file.path;
   }
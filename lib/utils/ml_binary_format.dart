@@ -0,0 +1,235 @@
+import 'dart:convert';
+import 'dart:math';
+import 'dart:typed_data';
+
+import '../models/interaction_history.dart';
+
+/// Formato binario compacto para exportar datos de entrenamiento ML
+///
+/// Alternativa a JSON para exportaciones grandes: las columnas numéricas
+/// se guardan como arrays little-endian que los scripts de Python leen
+/// con `np.frombuffer`, sin decodificar valor por valor.
+///
+/// Estructura del archivo (`.tmlb`):
+/// - 4 bytes: magic `TMLB`
+/// - uint32: versión del formato
+/// - uint32: largo H de la cabecera
+/// - H bytes: cabecera JSON UTF-8 (mismos campos que la exportación JSON
+///   sin `records`, más `feature_count` y `actions`), rellenada con
+///   espacios hasta múltiplo de 8
+/// - Bloques de hasta [defaultBlockSize] registros, cada uno con:
+///   - uint32 n (registros del bloque) + uint32 reservado
+///   - int64[n]: timestamp (ms desde epoch, UTC)
+///   - float32[n * feature_count]: features
+///   - float32[n * 4]: time_to_critical (NaN = sin dato)
+///   - uint8[n]: acción (índice en `actions`, 255 = desconocida)
+///   - int8[n]: emoción resultante (-1 = sin dato)
+///   - relleno hasta múltiplo de 8
+class MLBinaryFormat {
+  MLBinaryFormat._();
+
+  static const List<int> magic = [0x54, 0x4D, 0x4C, 0x42]; // 'TMLB'
+  static const int formatVersion = 1;
+  static const String fileExtension = 'tmlb';
+  static const int defaultBlockSize = 4096;
+  static const int timeToCriticalSize = 4;
+  static const int unknownAction = 255;
+  static const int unknownEmotion = -1;
+
+  static const int _prefixSize = 12;
+  static const int _blockPrefixSize = 8;
+
+  /// Tabla de acciones: el índice de cada id es lo que se guarda por registro
+  static List<String> get actions =>
+      InteractionType.values.map((t) => t.id).toList();
+
+  /// Codifica un mapa de exportación (cabecera + `records`) en binario
+  ///
+  /// Los registros usan el mismo formato que [MLTrainingRecord.toJson].
+  /// Todos deben tener la misma cantidad de features.
+  static Uint8List encode(
+    Map<String, dynamic> exportData, {
+    int blockSize = defaultBlockSize,
+  }) {
+    final records =
+        (exportData['records'] as List).cast<Map<String, dynamic>>();
+    final featureCount = records.isEmpty
+        ? 0
+        : (records.first['features'] as List).length;
+    final actionTable = actions;
+    final actionIndex = {
+      for (var i = 0; i < actionTable.length; i++) actionTable[i]: i,
+    };
+
+    final header = Map<String, dynamic>.from(exportData)..remove('records');
+    header['record_count'] = records.length;
+    header['feature_count'] = featureCount;
+    header['actions'] = actionTable;
+
+    final headerBytes = utf8.encode(jsonEncode(header));
+    final headerSize = _align8(_prefixSize + headerBytes.length) - _prefixSize;
+
+    final prefix = ByteData(_prefixSize);
+    for (var i = 0; i < magic.length; i++) {
+      prefix.setUint8(i, magic[i]);
+    }
+    prefix.setUint32(4, formatVersion, Endian.little);
+    prefix.setUint32(8, headerSize, Endian.little);
+
+    final builder = BytesBuilder(copy: false)
+      ..add(prefix.buffer.asUint8List())
+      ..add(headerBytes)
+      ..add(List<int>.filled(headerSize - headerBytes.length, 0x20));
+
+    for (var start = 0; start < records.length; start += blockSize) {
+      final end = min(start + blockSize, records.length);
+      builder.add(_encodeBlock(
+        records.sublist(start, end),
+        featureCount,
+        actionIndex,
+      ));
+    }
+
+    return builder.takeBytes();
+  }
+
+  static Uint8List _encodeBlock(
+    List<Map<String, dynamic>> block,
+    int featureCount,
+    Map<String, int> actionIndex,
+  ) {
+    final n = block.length;
+    final timestampOffset = _blockPrefixSize;
+    final featuresOffset = timestampOffset + n * 8;
+    final timeToCriticalOffset = featuresOffset + n * featureCount * 4;
+    final actionOffset = timeToCriticalOffset + n * timeToCriticalSize * 4;
+    final emotionOffset = actionOffset + n;
+
+    final data = ByteData(_align8(emotionOffset + n));
+    data.setUint32(0, n, Endian.little);
+
+    for (var i = 0; i < n; i++) {
+      final record = block[i];
+
+      final features = record['features'] as List;
+      if (features.length != featureCount) {
+        throw ArgumentError(
+          'Todos los registros deben tener $featureCount features '
+          '(se encontraron ${features.length})',
+        );
+      }
+
+      // Cada timestamp se guarda como instante UTC con su propio offset:
+      // un offset único de la exportación correría una hora los registros
+      // del otro lado de un cambio de horario
+      final timestamp = DateTime.parse(record['timestamp'] as String);
+      data.setInt64(
+        timestampOffset + i * 8,
+        timestamp.millisecondsSinceEpoch,
+        Endian.little,
+      );
+
+      for (var j = 0; j < featureCount; j++) {
+        data.setFloat32(
+          featuresOffset + (i * featureCount + j) * 4,
+          (features[j] as num).toDouble(),
+          Endian.little,
+        );
+      }
+
+      final timeToCritical = record['time_to_critical'] as List?;
+      for (var j = 0; j < timeToCriticalSize; j++) {
+        final value = timeToCritical != null && j < timeToCritical.length
+            ? (timeToCritical[j] as num).toDouble()
+            : double.nan;
+        data.setFloat32(
+          timeToCriticalOffset + (i * timeToCriticalSize + j) * 4,
+          value,
+          Endian.little,
+        );
+      }
+
+      data.setUint8(
+        actionOffset + i,
+        actionIndex[record['action_taken']] ?? unknownAction,
+      );
+      data.setInt8(
+        emotionOffset + i,
+        record['resulting_emotion'] as int? ?? unknownEmotion,
+      );
+    }
+
+    return data.buffer.asUint8List();
+  }
+
+  /// Decodifica un archivo binario al mismo mapa que la exportación JSON
+  ///
+  /// Los timestamps se devuelven en UTC.
+  static Map<String, dynamic> decode(Uint8List bytes) {
+    final data = ByteData.sublistView(bytes);
+    for (var i = 0; i < magic.length; i++) {
+      if (bytes.length < _prefixSize || bytes[i] != magic[i]) {
+        throw const FormatException('No es una exportación binaria (TMLB)');
+      }
+    }
+    final version = data.getUint32(4, Endian.little);
+    if (version != formatVersion) {
+      throw FormatException('Versión de formato no soportada: $version');
+    }
+
+    final headerSize = data.getUint32(8, Endian.little);
+    final header = jsonDecode(utf8.decode(
+      bytes.sublist(_prefixSize, _prefixSize + headerSize),
+    )) as Map<String, dynamic>;
+    final featureCount = header['feature_count'] as int;
+    final actionTable = (header['actions'] as List).cast<String>();
+
+    final records = <Map<String, dynamic>>[];
+    var offset = _prefixSize + headerSize;
+    while (offset < bytes.length) {
+      final n = data.getUint32(offset, Endian.little);
+      final timestampOffset = offset + _blockPrefixSize;
+      final featuresOffset = timestampOffset + n * 8;
+      final timeToCriticalOffset = featuresOffset + n * featureCount * 4;
+      final actionOffset = timeToCriticalOffset + n * timeToCriticalSize * 4;
+      final emotionOffset = actionOffset + n;
+
+      for (var i = 0; i < n; i++) {
+        final timeToCritical = [
+          for (var j = 0; j < timeToCriticalSize; j++)
+            data.getFloat32(
+              timeToCriticalOffset + (i * timeToCriticalSize + j) * 4,
+              Endian.little,
+            ),
+        ];
+        final action = data.getUint8(actionOffset + i);
+        final emotion = data.getInt8(emotionOffset + i);
+
+        records.add({
+          'features': [
+            for (var j = 0; j < featureCount; j++)
+              data.getFloat32(
+                featuresOffset + (i * featureCount + j) * 4,
+                Endian.little,
+              ),
+          ],
+          'action_taken':
+              action < actionTable.length ? actionTable[action] : null,
+          'time_to_critical':
+              timeToCritical.every((v) => v.isNaN) ? null : timeToCritical,
+          'resulting_emotion': emotion == unknownEmotion ? null : emotion,
+          'timestamp': DateTime.fromMillisecondsSinceEpoch(
+            data.getInt64(timestampOffset + i * 8, Endian.little),
+            isUtc: true,
+          ).toIso8601String(),
+        });
+      }
+
+      offset = _align8(emotionOffset + n);
+    }
+
+    return {...header, 'records': records};
+  }
+
+  static int _align8(int size) => (size + 7) & ~7;
+}
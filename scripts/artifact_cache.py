@@ -0,0 +1,199 @@
+"""
+Almacén de artefactos `.tflite` direccionado por contenido.
+
+Evita reentrenar y reconvertir modelos que no cambiaron:
+
+- Entrenamiento: la clave combina el contenido del script de
+  entrenamiento (arquitectura, generador de datos) y de todos los módulos
+  de `scripts/` que importa directa o indirectamente (conversión,
+  pipeline, lectura de exportaciones...), los hiperparámetros de la línea
+  de comandos (incluida la semilla), el hash de los archivos de datos y
+  la versión de TensorFlow. Si existe un `.tflite` con esa clave, el
+  script lo copia a `--output` sin importar TensorFlow ni generar datos.
+- Conversión: la clave combina el hash de los pesos y la arquitectura del
+  modelo Keras, el modo de cuantización y (en INT8) los datos de
+  calibración, así la misma red no se convierte dos veces.
+
+Cada entrada es `<tipo>/<clave>.tflite` más un `.json` con metadatos; las
+escrituras usan un archivo temporal y `os.replace`, así que procesos en
+paralelo (`train_all.py`) pueden compartir el almacén.
+"""
+
+import ast
+import hashlib
+import json
+import os
+import shutil
+import time
+from importlib import metadata
+from pathlib import Path
+
+import numpy as np
+
+from dataset_cache import file_hash
+
+
+DEFAULT_STORE_DIR = Path(__file__).resolve().parent / '.artifact_cache'
+
+# Argumentos de la línea de comandos que no afectan al modelo entrenado
+NON_MODEL_ARGS = {
+    'output', 'cache_dir', 'no_cache', 'data_only', 'artifact_dir', 'force',
+    'data', 'data_dir', 'data_npy', 'label', 'state_dir', 'profile', 'profile_trace',
+    'eval_report',
+}
+
+
+# Salidas que solo produce un entrenamiento real; un acierto del almacén no las genera
+RUN_ONLY_ARGS = {'eval_report': '--eval-report', 'profile': '--profile',
+                 'profile_trace': '--profile-trace'}
+
+
+def tensorflow_version() -> str:
+    """Versión instalada de TensorFlow sin importarlo ('none' si no está)."""
+    try:
+        return metadata.version('tensorflow')
+    except metadata.PackageNotFoundError:
+        return 'none'
+
+
+def _digest(payload: dict) -> str:
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def local_sources(script_path) -> list:
+    """
+    El script y los módulos de su directorio que importa, recursivamente.
+
+    Recorre el AST de cada archivo, así que también encuentra los imports
+    dentro de funciones (TensorFlow y sus helpers se importan de forma
+    diferida). Los módulos que no están en el directorio se ignoran.
+    """
+    script_path = Path(script_path).resolve()
+    directory = script_path.parent
+    found, pending = set(), [script_path]
+    while pending:
+        path = pending.pop()
+        if path in found:
+            continue
+        found.add(path)
+        for node in ast.walk(ast.parse(path.read_text(encoding='utf-8'))):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                names = [node.module]
+            else:
+                continue
+            for module in names:
+                candidate = directory / f"{module.split('.')[0]}.py"
+                if candidate.exists():
+                    pending.append(candidate)
+    return sorted(found)
+
+
+def skipped_run_outputs(args) -> list:
+    """Flags de `RUN_ONLY_ARGS` pedidos en `args` (para avisar en un acierto)."""
+    return [flag for name, flag in RUN_ONLY_ARGS.items() if getattr(args, name, None)]
+
+
+def training_key(name: str, script_path, args, data_files=()) -> str:
+    """
+    Clave de un entrenamiento: fuentes, hiperparámetros, semilla y datos.
+
+    Args:
+        name: Nombre del modelo
+        script_path: Script de entrenamiento (`__file__`)
+        args: Namespace de argparse; se ignoran los `NON_MODEL_ARGS`
+        data_files: Archivos de datos de entrada (se hashea su contenido)
+    """
+    sources = local_sources(script_path)
+    params = {k: v for k, v in sorted(vars(args).items()) if k not in NON_MODEL_ARGS}
+    return _digest({
+        'kind': 'train',
+        'name': name,
+        'sources': {p.name: file_hash(p) for p in sources},
+        'params': params,
+        'data': [file_hash(p) for p in data_files],
+        'tensorflow': tensorflow_version(),
+    })
+
+
+def weights_hash(model) -> str:
+    """Hash de la arquitectura y los pesos de un modelo Keras."""
+    digest = hashlib.sha256(model.to_json().encode('utf-8'))
+    for weights in model.get_weights():
+        digest.update(str(weights.shape).encode('utf-8'))
+        digest.update(np.ascontiguousarray(weights).tobytes())
+    return digest.hexdigest()
+
+
+def conversion_key(model, mode: str, representative_data=None, int8_io: bool = False) -> str:
+    """Clave de una conversión a TFLite: pesos, modo y datos de calibración."""
+    calibration = None
+    if representative_data is not None and mode == 'int8':
+        calibration = hashlib.sha256(
+            np.ascontiguousarray(representative_data, dtype=np.float32).tobytes()
+        ).hexdigest()
+    return _digest({
+        'kind': 'convert',
+        'weights': weights_hash(model),
+        'mode': mode,
+        'int8_io': int8_io,
+        'calibration': calibration,
+        'tensorflow': tensorflow_version(),
+    })
+
+
+class ArtifactStore:
+    """
+    Almacén local de `.tflite` por clave.
+
+    Ejemplo:
+        store = ArtifactStore()
+        content = store.get('train', key)
+        if content is None:
+            content = entrenar_y_convertir()
+            store.put('train', key, content, {'name': 'critical_time'})
+    """
+
+    def __init__(self, directory=DEFAULT_STORE_DIR):
+        self.directory = Path(directory)
+
+    def _path(self, kind: str, key: str) -> Path:
+        return self.directory / kind / f"{key}.tflite"
+
+    def get(self, kind: str, key: str):
+        """Retorna los bytes del artefacto o None si no existe."""
+        path = self._path(kind, key)
+        try:
+            content = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        os.utime(path)  # registra el uso
+        return content
+
+    def put(self, kind: str, key: str, content: bytes, info: dict = None):
+        """Guarda un artefacto y sus metadatos con escritura atómica."""
+        path = self._path(kind, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        meta = {'key': key, 'bytes': len(content), 'created': time.time(), **(info or {})}
+        meta_path = path.with_suffix('.json')
+        tmp_meta = meta_path.with_name(f".{meta_path.name}.{os.getpid()}.tmp")
+        tmp_meta.write_text(json.dumps(meta, indent=2, default=str))
+        os.replace(tmp_meta, meta_path)
+
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(content)
+        os.replace(tmp, path)
+
+    def restore(self, kind: str, key: str, output_path) -> bool:
+        """Copia el artefacto a `output_path` si existe; retorna si hubo acierto."""
+        path = self._path(kind, key)
+        if not path.exists():
+            return False
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(path, output_path)
+        os.utime(path)
+        return True
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark de generación de datos sintéticos para los modelos de Tamagotchi.
+
+Compara el generador original (bucle de Python por muestra) contra el
+generador vectorizado de cada script de entrenamiento y reporta
+muestras/segundo para ambos. Para los modelos en EXACT_PARITY también
+verifica que ambos generadores produzcan los mismos arrays.
+
+Uso:
+    python benchmark_data_generation.py [--model NAME] [--samples N] [--loop-samples N]
+
+Ejemplo:
+    python benchmark_data_generation.py --model action_predictor --samples 5000000
+"""
+
+import argparse
+import importlib
+import time
+
+import numpy as np
+
+
+# modelo -> (módulo, generador en bucle, generador vectorizado)
+GENERATORS = {
+    'action_recommender': (
+        'train_action_recommender',
+        'generate_synthetic_data_loop',
+        'generate_synthetic_data',
+    ),
+    'action_predictor': (
+        'train_action_predictor',
+        'generate_synthetic_data_loop',
+        'generate_synthetic_data',
+    ),
+    'critical_time': (
+        'train_critical_time',
+        'generate_synthetic_data_loop',
+        'generate_synthetic_data',
+    ),
+    'emotion_classifier': (
+        'train_emotion_classifier',
+        'generate_synthetic_data_loop',
+        'generate_synthetic_data',
+    ),
+}
+
+# Modelos cuyo generador vectorizado debe reproducir exactamente al bucle
+EXACT_PARITY = {'critical_time'}
+
+
+def _time_generator(fn, n_samples: int, repeats: int) -> float:
+    """Ejecuta `fn(n_samples)` varias veces y retorna el mejor tiempo."""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(n_samples)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def benchmark_model(name: str, n_samples: int, loop_samples: int, repeats: int) -> dict:
+    """Mide ambos generadores de un modelo y retorna muestras/segundo."""
+    module_name, loop_name, vectorized_name = GENERATORS[name]
+    module = importlib.import_module(module_name)
+
+    loop_time = _time_generator(getattr(module, loop_name), loop_samples, 1)
+    vectorized_time = _time_generator(getattr(module, vectorized_name), n_samples, repeats)
+
+    loop_rate = loop_samples / loop_time
+    vectorized_rate = n_samples / vectorized_time
+
+    result = {
+        'loop_rate': loop_rate,
+        'vectorized_rate': vectorized_rate,
+        'speedup': vectorized_rate / loop_rate,
+        'vectorized_time': vectorized_time,
+    }
+
+    if name in EXACT_PARITY:
+        X_loop, y_loop = getattr(module, loop_name)(loop_samples)
+        X_vec, y_vec = getattr(module, vectorized_name)(loop_samples)
+        result['exact_parity'] = bool(
+            np.array_equal(X_loop, X_vec) and np.array_equal(y_loop, y_vec)
+        )
+
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark de generadores de datos sintéticos'
+    )
+    parser.add_argument('--model', '-m', choices=sorted(GENERATORS), action='append',
+                        help='Modelo a medir (repetible, default: todos)')
+    parser.add_argument('--samples', '-s', type=int, default=1_000_000,
+                        help='Muestras para el generador vectorizado (default: 1000000)')
+    parser.add_argument('--loop-samples', type=int, default=20_000,
+                        help='Muestras para el generador en bucle (default: 20000)')
+    parser.add_argument('--repeats', '-r', type=int, default=3,
+                        help='Repeticiones del generador vectorizado (default: 3)')
+
+    args = parser.parse_args()
+
+    print("Benchmark de generación de datos sintéticos")
+    print("=" * 55)
+
+    for name in args.model or sorted(GENERATORS):
+        result = benchmark_model(name, args.samples, args.loop_samples, args.repeats)
+        print(f"\n{name}:")
+        print(f"   Bucle:       {result['loop_rate']:>14,.0f} muestras/s")
+        print(f"   Vectorizado: {result['vectorized_rate']:>14,.0f} muestras/s "
+              f"({args.samples:,} en {result['vectorized_time']:.2f} s)")
+        print(f"   Aceleración: {result['speedup']:.1f}x")
+        if 'exact_parity' in result:
+            print(f"   Paridad exacta con el bucle: {'sí' if result['exact_parity'] else 'NO'}")
+
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Compara el throughput y la memoria de `--pipeline numpy` y `--pipeline tfdata`.
+
+Entrena cada `train_*.py` con los dos modos en procesos nuevos (así el
+pico de RSS de uno no contamina al otro) usando `--profile`, y lee del
+reporte JSON la mediana de muestras/s por epoch (sin la primera, que
+incluye el trazado del grafo) y el pico de RSS del proceso.
+
+Antes de medir, cada dataset se genera una vez con `--data-only` en una
+caché temporal; el entrenamiento lo abre como memmap, que es el caso en
+que `tfdata` lee por bloques en lugar de tener el corpus en memoria.
+
+Uso:
+    python benchmark_pipeline.py [MODELO ...] [--samples N] [--epochs N]
+
+Ejemplo:
+    python benchmark_pipeline.py critical_time --samples 200000 --epochs 3
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from profiling import report_path
+from train_all import MODELS
+from training_utils import tensorflow_available
+
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+PIPELINES = ['numpy', 'tfdata']
+
+
+def run_pipeline(name: str, pipeline: str, samples: int, epochs: int, output_dir: Path) -> dict:
+    """Entrena `name` con `pipeline` en un proceso nuevo y resume su perfil."""
+    module_name = MODELS[name]
+    samples_flag = '--synthetic' if module_name == 'train_action_predictor' else '--samples'
+    output = output_dir / f'{name}_{pipeline}.tflite'
+    command = [sys.executable, f'{module_name}.py', '--pipeline', pipeline,
+               samples_flag, str(samples), '--cache-dir', str(output_dir / 'datasets')]
+
+    # Construye la entrada de caché fuera de la medición
+    subprocess.run(command + ['--data-only'], cwd=SCRIPTS_DIR, check=True,
+                   stdout=subprocess.DEVNULL)
+    subprocess.run(
+        command + ['--epochs', str(epochs), '--output', str(output), '--artifact-dir',
+                   str(output_dir / 'artifacts'), '--force', '--profile'],
+        cwd=SCRIPTS_DIR, check=True, stdout=subprocess.DEVNULL,
+    )
+
+    with open(report_path(output)) as f:
+        report = json.load(f)
+    rates = [e['samples_per_second'] for e in report['epochs'] if 'samples_per_second' in e]
+    fit = next((p for p in report['phases'] if p['phase'] == 'fit'), {})
+    return {
+        'samples_per_second': statistics.median(rates[1:] or rates) if rates else 0.0,
+        'fit_s': fit.get('wall_s', 0.0),
+        'peak_rss_mb': report['peak_rss_mb'],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Throughput y memoria de los pipelines de entrenamiento'
+    )
+    parser.add_argument('models', nargs='*', metavar='MODELO',
+                        help='Modelos a medir (default: todos)')
+    parser.add_argument('--samples', type=int, default=100000,
+                        help='Muestras sintéticas por modelo (default: 100000)')
+    parser.add_argument('--epochs', '-e', type=int, default=3)
+
+    args = parser.parse_args(argv)
+
+    names = args.models or list(MODELS)
+    unknown = [name for name in names if name not in MODELS]
+    if unknown:
+        print(f"Modelos desconocidos: {', '.join(unknown)}")
+        return 1
+    if not tensorflow_available():
+        print("❌ TensorFlow es requerido para entrenar los modelos")
+        print("   Instálalo con: pip install tensorflow")
+        return 1
+
+    print(f"Pipelines de entrenamiento ({args.samples} muestras, {args.epochs} epochs)")
+    print("=" * 65)
+    print(f"   {'Modelo':<20} {'Pipeline':<8} {'Muestras/s':>12} {'fit':>9} {'Pico RSS':>11}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in names:
+            for pipeline in PIPELINES:
+                r = run_pipeline(name, pipeline, args.samples, args.epochs, Path(tmp))
+                print(f"   {name:<20} {pipeline:<8} {r['samples_per_second']:>12,.0f} "
+                      f"{r['fit_s']:>7.1f} s {r['peak_rss_mb']:>8.1f} MB")
+
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
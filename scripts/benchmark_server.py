@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Generador de carga para `inference_server.py`.
+
+Abre `--concurrency` conexiones keep-alive y cada una envía peticiones
+`POST /predict/<modelo>` una tras otra durante `--duration` segundos, con
+features realistas del generador sintético de cada modelo. Al terminar
+imprime peticiones/s y la latencia de cliente (p50/p95/p99/máx) por
+modelo, junto con las métricas del servidor (tamaño medio de lote,
+profundidad máxima de cola).
+
+Uso:
+    python benchmark_server.py [--url http://127.0.0.1:8765] [--concurrency N] [--duration S]
+
+Ejemplo:
+    python benchmark_server.py --concurrency 128 --duration 30 --models critical_time --rows 1
+"""
+
+import argparse
+import asyncio
+import importlib
+import json
+import time
+from urllib.parse import urlparse
+
+import numpy as np
+
+from inference_server import DEFAULT_PORT
+from train_all import MODELS
+
+
+def request_bodies(name: str, n: int, rows: int) -> list:
+    """Cuerpos JSON con `rows` filas realistas cada uno."""
+    module = importlib.import_module(MODELS[name])
+    X, _ = module.generate_synthetic_data(n * rows, seed=123)
+    X = np.asarray(X, dtype=np.float32).reshape(n, rows, -1)
+    return [json.dumps({'inputs': batch.tolist()}).encode('utf-8') for batch in X]
+
+
+async def _request(reader, writer, host: str, method: str, path: str, body: bytes = b'') -> tuple:
+    writer.write(
+        (f"{method} {path} HTTP/1.1\r\nHost: {host}\r\n"
+         f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n").encode('latin-1')
+        + body
+    )
+    await writer.drain()
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    status = int(lines[0].split(' ', 2)[1])
+    length = 0
+    for line in lines[1:]:
+        if line.lower().startswith('content-length:'):
+            length = int(line.split(':', 1)[1])
+    return status, await reader.readexactly(length)
+
+
+async def _client(host: str, port: int, work: list, deadline: float, results: dict, offset: int):
+    reader, writer = await asyncio.open_connection(host, port)
+    i = offset
+    try:
+        while time.perf_counter() < deadline:
+            name, bodies = work[i % len(work)]
+            body = bodies[i % len(bodies)]
+            i += 1
+            start = time.perf_counter()
+            status, _ = await _request(reader, writer, host, 'POST', f'/predict/{name}', body)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if status == 200:
+                results[name]['latencies'].append(elapsed_ms)
+            else:
+                results[name]['errors'][status] = results[name]['errors'].get(status, 0) + 1
+    finally:
+        writer.close()
+
+
+async def fetch_json(host: str, port: int, path: str) -> dict:
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        status, body = await _request(reader, writer, host, 'GET', path)
+    finally:
+        writer.close()
+    return json.loads(body) if status == 200 else {}
+
+
+async def run_load(host: str, port: int, models: list, concurrency: int,
+                   duration: float, rows: int) -> dict:
+    """Ejecuta la carga y retorna, por modelo, latencias de cliente y errores."""
+    health = await fetch_json(host, port, '/health')
+    models = [name for name in models if name in health.get('models', [])]
+    if not models:
+        raise RuntimeError(f"El servidor no sirve ninguno de los modelos pedidos: {health}")
+
+    work = [(name, request_bodies(name, 256, rows)) for name in models]
+    results = {name: {'latencies': [], 'errors': {}} for name in models}
+
+    start = time.perf_counter()
+    deadline = start + duration
+    await asyncio.gather(*(
+        _client(host, port, work, deadline, results, offset=i) for i in range(concurrency)
+    ))
+    elapsed = time.perf_counter() - start
+
+    report = {'concurrency': concurrency, 'rows_per_request': rows,
+              'seconds': elapsed, 'models': {}}
+    for name, r in results.items():
+        latencies = np.asarray(r['latencies']) if r['latencies'] else np.zeros(1)
+        report['models'][name] = {
+            'requests': len(r['latencies']),
+            'requests_per_second': len(r['latencies']) / elapsed,
+            'errors': r['errors'],
+            'p50_ms': float(np.percentile(latencies, 50)),
+            'p95_ms': float(np.percentile(latencies, 95)),
+            'p99_ms': float(np.percentile(latencies, 99)),
+            'max_ms': float(latencies.max()),
+        }
+    report['server'] = await fetch_json(host, port, '/metrics')
+    return report
+
+
+def print_report(report: dict):
+    total = sum(r['requests_per_second'] for r in report['models'].values())
+    print(f"\n{report['concurrency']} conexiones, {report['rows_per_request']} fila(s) por "
+          f"petición, {report['seconds']:.1f} s: {total:,.0f} peticiones/s en total")
+    print(f"   {'Modelo':<20} {'pet/s':>9} {'p50':>9} {'p95':>9} {'p99':>9} {'máx':>9} "
+          f"{'lote medio':>11} {'cola máx':>9} {'errores':>8}")
+    server = report.get('server', {}).get('models', {})
+    for name, r in report['models'].items():
+        s = server.get(name, {})
+        errors = sum(r['errors'].values())
+        print(f"   {name:<20} {r['requests_per_second']:>9,.0f} {r['p50_ms']:>6.2f} ms "
+              f"{r['p95_ms']:>6.2f} ms {r['p99_ms']:>6.2f} ms {r['max_ms']:>6.2f} ms "
+              f"{s.get('mean_batch_rows', 0):>11.1f} {s.get('max_queue_depth', 0):>9} {errors:>8}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Generador de carga para el servidor de inferencia'
+    )
+    parser.add_argument('--url', type=str, default=f'http://127.0.0.1:{DEFAULT_PORT}')
+    parser.add_argument('--models', nargs='+', default=list(MODELS), metavar='MODELO',
+                        help='Modelos a consultar, en rotación (default: los cuatro)')
+    parser.add_argument('--concurrency', '-c', type=int, default=32,
+                        help='Conexiones simultáneas (default: 32)')
+    parser.add_argument('--duration', '-d', type=float, default=10.0,
+                        help='Segundos de carga (default: 10)')
+    parser.add_argument('--rows', type=int, default=1,
+                        help='Filas por petición (default: 1)')
+    parser.add_argument('--output', '-o', type=str,
+                        help='Archivo JSON de salida')
+
+    args = parser.parse_args(argv)
+
+    url = urlparse(args.url)
+    host, port = url.hostname or '127.0.0.1', url.port or DEFAULT_PORT
+
+    print("Benchmark del servidor de inferencia")
+    print("=" * 55)
+
+    try:
+        report = asyncio.run(run_load(host, port, args.models, args.concurrency,
+                                      args.duration, args.rows))
+    except (ConnectionError, OSError, RuntimeError) as e:
+        print(f"No se pudo ejecutar la carga contra {args.url}: {e}")
+        return 1
+
+    print_report(report)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResultados guardados en: {args.output}")
+
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Mide el tiempo de arranque de los scripts de entrenamiento.
+
+Ejecuta cada `train_*.py` en un proceso nuevo con invocaciones que no
+entrenan (`--help` y `--data-only` con pocas muestras y sin caché) y
+reporta la mediana del tiempo total. Como referencia también mide
+`import tensorflow` si está instalado, que es el costo que evitan los
+modos sin entrenamiento.
+
+Uso:
+    python benchmark_startup.py [--repeats N]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from train_all import MODELS
+from training_utils import tensorflow_available
+
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+
+
+def _time_command(args: list, repeats: int) -> float:
+    """Mediana en segundos de ejecutar `python args...` en un proceso nuevo."""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *args], cwd=SCRIPTS_DIR, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Tiempo de arranque de los scripts de entrenamiento'
+    )
+    parser.add_argument('--repeats', '-r', type=int, default=5,
+                        help='Ejecuciones por comando (default: 5)')
+
+    args = parser.parse_args(argv)
+
+    print("Tiempo de arranque (mediana)")
+    print("=" * 55)
+
+    if tensorflow_available():
+        tf_import = _time_command(['-c', 'import tensorflow'], args.repeats)
+        print(f"   {'import tensorflow':<42} {tf_import * 1000:>8.0f} ms")
+
+    for module_name in MODELS.values():
+        script = f'{module_name}.py'
+        samples_flag = '--synthetic' if module_name == 'train_action_predictor' else '--samples'
+        commands = {
+            '--help': [script, '--help'],
+            '--data-only': [script, '--data-only', '--no-cache', samples_flag, '1000'],
+        }
+        for label, command in commands.items():
+            seconds = _time_command(command, args.repeats)
+            print(f"   {script + ' ' + label:<42} {seconds * 1000:>8.0f} ms")
+
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Benchmark de latencia de inferencia de los modelos TFLite que se distribuyen.
+
+Para cada `assets/models/*.tflite` mide el tiempo de carga (crear el
+intérprete + `allocate_tensors`), la memoria de tensores y la latencia de
+`invoke()` con entradas realistas generadas por el script de
+entrenamiento correspondiente, con 1, 2 y 4 hilos del intérprete.
+
+Los resultados se escriben en JSON (incluyendo el commit de git) para
+poder compararlos entre versiones con `--baseline`.
+
+Uso:
+    python benchmark_tflite.py [--runs N] [--threads 1 2 4] [--output PATH] [--baseline PATH]
+
+Ejemplo:
+    python benchmark_tflite.py --runs 5000 --output bench_tflite.json
+"""
+
+import argparse
+import importlib
+import json
+import platform
+import subprocess
+import time
+from pathlib import Path
+
+import numpy as np
+
+from profiling import current_rss_mb
+from tflite_utils import load_interpreter, measure_latency
+from train_all import MODELS, MODELS_DIR
+from training_utils import peak_rss_mb, tensorflow_available
+
+
+def _git_commit() -> str:
+    """Commit actual del repositorio, o 'unknown' si no se puede obtener."""
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=Path(__file__).resolve().parent, text=True, stderr=subprocess.DEVNULL,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def realistic_inputs(name: str, n_samples: int) -> np.ndarray:
+    """Genera features con el generador sintético del script del modelo."""
+    module = importlib.import_module(MODELS[name])
+    X, _ = module.generate_synthetic_data(n_samples, seed=123)
+    return np.asarray(X, dtype=np.float32)
+
+
+def benchmark_model(name: str, path: Path, runs: int, warmup: int, threads: list) -> dict:
+    """Mide carga, memoria y latencia de un modelo .tflite."""
+    content = path.read_bytes()
+    X = realistic_inputs(name, min(runs, 10000))
+
+    rss_before = current_rss_mb()
+    start = time.perf_counter()
+    interpreter = load_interpreter(content)
+    interpreter.allocate_tensors()
+    load_ms = (time.perf_counter() - start) * 1000
+    rss_delta_kb = (current_rss_mb() - rss_before) * 1024
+
+    tensor_bytes = sum(
+        int(np.prod(t['shape'])) * np.dtype(t['dtype']).itemsize
+        for t in interpreter.get_tensor_details()
+    )
+    input_shape = interpreter.get_input_details()[0]['shape'].tolist()
+
+    result = {
+        'size_kb': len(content) / 1024,
+        'input_shape': input_shape,
+        'load_ms': load_ms,
+        'tensor_memory_kb': tensor_bytes / 1024,
+        'rss_delta_kb': rss_delta_kb,
+        'threads': {},
+    }
+
+    for num_threads in threads:
+        latency = measure_latency(content, X, runs=runs, warmup=warmup, num_threads=num_threads)
+        latency['throughput_per_s'] = 1e6 / latency['mean_us']
+        result['threads'][str(num_threads)] = latency
+
+    return result
+
+
+def print_result(name: str, result: dict, baseline: dict = None):
+    """Imprime los resultados de un modelo y, si hay baseline, la diferencia de p50."""
+    print(f"\n{name} ({result['size_kb']:.1f} KB, entrada {result['input_shape']}):")
+    print(f"   Carga: {result['load_ms']:.2f} ms, "
+          f"tensores: {result['tensor_memory_kb']:.1f} KB, "
+          f"ΔRSS: {result['rss_delta_kb']:.0f} KB")
+    print(f"   {'Hilos':>5} {'p50':>10} {'p95':>10} {'p99':>10} {'inv/s':>10}")
+    for num_threads, latency in result['threads'].items():
+        line = (f"   {num_threads:>5} {latency['p50_us']:>7.1f} µs {latency['p95_us']:>7.1f} µs "
+                f"{latency['p99_us']:>7.1f} µs {latency['throughput_per_s']:>10,.0f}")
+        previous = (baseline or {}).get('threads', {}).get(num_threads)
+        if previous:
+            change = (latency['p50_us'] / previous['p50_us'] - 1) * 100
+            line += f"  (p50 {change:+.1f}% vs baseline)"
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Benchmark de latencia de los modelos TFLite de Tamagotchi'
+    )
+    parser.add_argument('--models-dir', type=str, default=str(MODELS_DIR),
+                        help='Directorio con los .tflite (default: assets/models)')
+    parser.add_argument('--runs', '-r', type=int, default=2000,
+                        help='Invocaciones medidas por configuración (default: 2000)')
+    parser.add_argument('--warmup', type=int, default=100,
+                        help='Invocaciones de calentamiento (default: 100)')
+    parser.add_argument('--threads', '-t', type=int, nargs='+', default=[1, 2, 4],
+                        help='Hilos del intérprete a medir (default: 1 2 4)')
+    parser.add_argument('--output', '-o', type=str,
+                        help='Archivo JSON de salida')
+    parser.add_argument('--baseline', '-b', type=str,
+                        help='JSON de una ejecución anterior para comparar')
+
+    args = parser.parse_args(argv)
+
+    if not tensorflow_available():
+        print("❌ TensorFlow es requerido para ejecutar los modelos")
+        print("   Instálalo con: pip install tensorflow")
+        return 1
+    import tensorflow as tf
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f).get('models', {})
+
+    print("Benchmark de inferencia TFLite")
+    print("=" * 55)
+
+    report = {
+        'commit': _git_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'platform': platform.platform(),
+        'python': platform.python_version(),
+        'tensorflow': tf.__version__,
+        'runs': args.runs,
+        'models': {},
+    }
+
+    models_dir = Path(args.models_dir)
+    for name in MODELS:
+        path = models_dir / f'{name}.tflite'
+        if not path.exists():
+            print(f"\n{name}: no existe {path}, se omite")
+            continue
+        result = benchmark_model(name, path, args.runs, args.warmup, args.threads)
+        report['models'][name] = result
+        print_result(name, result, baseline.get(name))
+
+    report['peak_rss_mb'] = peak_rss_mb()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResultados guardados en: {args.output}")
+
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
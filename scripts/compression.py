@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Compresión de modelos por poda y clustering de pesos antes de convertir a TFLite.
+
+Usa TensorFlow Model Optimization (`tensorflow_model_optimization`,
+dependencia opcional) sobre un modelo ya entrenado:
+
+- 'prune': poda por magnitud en bloques (1, 4) de las capas ocultas,
+  subiendo la dispersión hasta `sparsity` durante un ajuste corto.
+- 'cluster': agrupa los pesos de las capas ocultas en `clusters`
+  centroides compartidos.
+- 'prune+cluster': poda y luego clustering que preserva los ceros.
+
+La capa de salida no se comprime: es pequeña y es la más sensible. Los
+`.tflite` no se comprimen por sí mismos, pero los pesos podados o
+agrupados se comprimen mucho mejor dentro del APK/AAB (que empaqueta los
+assets con zip), así que se reporta también el tamaño con gzip.
+
+Los `train_*.py` aplican un modo con `--compress`. Este script además
+compara todas las variantes de un modelo y marca las Pareto-óptimas en
+tamaño, latencia y métrica:
+
+Uso:
+    python compression.py MODEL [--sparsity 0.5 0.75] [--clusters 8 16] [--tolerance T]
+
+Ejemplo:
+    python compression.py emotion_classifier --tolerance 0.01 --output-dir compressed/
+"""
+
+import argparse
+import gzip
+import importlib
+import importlib.util
+import json
+import math
+from pathlib import Path
+
+from tflite_utils import convert_keras_model, measure_latency, predict_tflite, score_predictions
+
+
+COMPRESSION_MODES = ['prune', 'cluster', 'prune+cluster']
+
+
+def tfmot_available() -> bool:
+    """Indica si TensorFlow Model Optimization está instalado, sin importarlo."""
+    return importlib.util.find_spec('tensorflow_model_optimization') is not None
+
+
+def _is_hidden_dense(layer) -> bool:
+    from tensorflow import keras
+
+    return isinstance(layer, keras.layers.Dense) and layer.name != 'output'
+
+
+def _copy_model(model):
+    """
+    Copia independiente de `model` (capas nuevas con los mismos pesos).
+
+    Los wrappers de tfmot envuelven la instancia de capa que reciben, así
+    que aplicarlos al modelo entrenado modificaría sus kernels.
+    """
+    from tensorflow import keras
+
+    copy = keras.models.clone_model(model)
+    copy.set_weights(model.get_weights())
+    return copy
+
+
+def _fine_tune(model, loss, X, y, metric: str, epochs: int, batch_size: int,
+               callbacks=(), learning_rate: float = 1e-4):
+    """Ajuste corto con learning rate bajo para recuperar la métrica."""
+    from tensorflow import keras
+
+    model.compile(optimizer=keras.optimizers.Adam(learning_rate=learning_rate),
+                  loss=loss, metrics=[metric])
+    model.fit(X, y, epochs=epochs, batch_size=batch_size, validation_split=0.1,
+              callbacks=list(callbacks), verbose=0)
+
+
+def prune_model(model, X, y, metric: str, sparsity: float = 0.5, epochs: int = 2,
+                batch_size: int = 32, block_size: tuple = (1, 4)):
+    """Poda por magnitud en bloques las capas ocultas y retorna el modelo sin wrappers."""
+    import tensorflow_model_optimization as tfmot
+    from tensorflow import keras
+
+    sparsity_api = tfmot.sparsity.keras
+    steps = epochs * math.ceil(len(X) * 0.9 / batch_size)
+    schedule = sparsity_api.PolynomialDecay(
+        initial_sparsity=0.0, final_sparsity=sparsity,
+        begin_step=0, end_step=max(1, int(steps * 0.7)),
+    )
+
+    def clone_fn(layer):
+        if _is_hidden_dense(layer):
+            return sparsity_api.prune_low_magnitude(layer, pruning_schedule=schedule,
+                                                    block_size=block_size)
+        return layer
+
+    pruned = keras.models.clone_model(_copy_model(model), clone_function=clone_fn)
+    _fine_tune(pruned, model.loss, X, y, metric, epochs, batch_size,
+               callbacks=[sparsity_api.UpdatePruningStep()])
+    return sparsity_api.strip_pruning(pruned)
+
+
+def cluster_model(model, X, y, metric: str, clusters: int = 16, epochs: int = 2,
+                  batch_size: int = 32, preserve_sparsity: bool = False):
+    """Agrupa los pesos de las capas ocultas en `clusters` centroides."""
+    import tensorflow_model_optimization as tfmot
+    from tensorflow import keras
+
+    clustering = tfmot.clustering.keras
+    params = {
+        'number_of_clusters': clusters,
+        'cluster_centroids_init': clustering.CentroidInitialization.KMEANS_PLUS_PLUS,
+    }
+    if preserve_sparsity:
+        params['preserve_sparsity'] = True
+
+    def clone_fn(layer):
+        if _is_hidden_dense(layer):
+            return clustering.cluster_weights(layer, **params)
+        return layer
+
+    clustered = keras.models.clone_model(_copy_model(model), clone_function=clone_fn)
+    _fine_tune(clustered, model.loss, X, y, metric, epochs, batch_size)
+    return clustering.strip_clustering(clustered)
+
+
+def compress_model(model, mode: str, X, y, metric: str, sparsity: float = 0.5,
+                   clusters: int = 16, epochs: int = 2, batch_size: int = 32):
+    """
+    Aplica un modo de `COMPRESSION_MODES` a un modelo entrenado.
+
+    El modelo original no se modifica; el retornado conserva la pérdida
+    del original y está listo para `convert_keras_model`.
+    """
+    if mode not in COMPRESSION_MODES:
+        raise ValueError(f"Modo de compresión desconocido: {mode}")
+
+    loss = model.loss
+    compressed = model
+    if 'prune' in mode:
+        compressed = prune_model(compressed, X, y, metric, sparsity=sparsity,
+                                 epochs=epochs, batch_size=batch_size)
+        compressed.compile(optimizer='adam', loss=loss, metrics=[metric])
+    if 'cluster' in mode:
+        compressed = cluster_model(compressed, X, y, metric, clusters=clusters, epochs=epochs,
+                                   batch_size=batch_size, preserve_sparsity='prune' in mode)
+    compressed.compile(optimizer='adam', loss=loss, metrics=[metric])
+    return compressed
+
+
+def evaluate_variants(variants: dict, X_test, y_test, metric: str) -> dict:
+    """
+    Mide cada variante .tflite y marca las Pareto-óptimas.
+
+    Una variante es Pareto-óptima si ninguna otra es igual o mejor en
+    tamaño comprimido, latencia p50 y métrica, y estrictamente mejor en
+    alguna.
+
+    Args:
+        variants: nombre -> bytes .tflite (la primera es la base)
+    """
+    results = {}
+    for name, content in variants.items():
+        predictions = predict_tflite(content, X_test)
+        results[name] = {
+            'size_kb': len(content) / 1024,
+            'gzip_kb': len(gzip.compress(content, compresslevel=9)) / 1024,
+            metric: score_predictions(predictions, y_test, metric),
+            **measure_latency(content, X_test),
+        }
+
+    def costs(r):
+        # Todo se minimiza: la accuracy se niega
+        quality = -r[metric] if metric == 'accuracy' else r[metric]
+        return (r['gzip_kb'], r['p50_us'], quality)
+
+    base = results[next(iter(variants))][metric]
+    for name, r in results.items():
+        c = costs(r)
+        r['delta'] = r[metric] - base
+        r['pareto'] = not any(
+            all(a <= b for a, b in zip(costs(o), c)) and costs(o) != c
+            for other, o in results.items() if other != name
+        )
+    return results
+
+
+def print_variants(results: dict, metric: str):
+    print(f"\n   {'Variante':<24} {'Tamaño':>10} {'gzip':>10} {'p50':>10} {metric:>9} {'Δ':>8}")
+    for name, r in results.items():
+        mark = ' *' if r['pareto'] else ''
+        print(f"   {name:<24} {r['size_kb']:>7.2f} KB {r['gzip_kb']:>7.2f} KB "
+              f"{r['p50_us']:>7.1f} µs {r[metric]:>9.4f} {r['delta']:>+8.4f}{mark}")
+    print("   (* = Pareto-óptima en tamaño gzip, latencia y métrica)")
+
+
+def compare_compressed(baseline_model, compressed: bytes, X_test, y_test, metric: str,
+                       mode: str = 'dynamic', representative_data=None,
+                       label: str = 'comprimido') -> dict:
+    """Compara el .tflite comprimido contra el modelo base convertido en el mismo modo."""
+    base = convert_keras_model(baseline_model, mode=mode, representative_data=representative_data)
+    variants = {'base': base, label: compressed}
+    results = evaluate_variants(variants, X_test, y_test, metric)
+    print(f"\nCompresión vs modelo base ({mode}):")
+    print_variants(results, metric)
+    return results
+
+
+def pick_variant(results: dict, metric: str, tolerance: float):
+    """Variante Pareto-óptima más pequeña (gzip) que pierde como mucho `tolerance`."""
+    allowed = [
+        (r['gzip_kb'], name) for name, r in results.items()
+        if r['pareto'] and (-r['delta'] if metric == 'accuracy' else r['delta']) <= tolerance
+    ]
+    return min(allowed)[1] if allowed else None
+
+
+def main(argv=None):
+    from train_all import MODELS
+    from training_utils import fit_model
+
+    parser = argparse.ArgumentParser(
+        description='Comparar variantes podadas/agrupadas de un modelo de Tamagotchi'
+    )
+    parser.add_argument('model', choices=list(MODELS), help='Modelo a comprimir')
+    parser.add_argument('--samples', type=int, default=5000,
+                        help='Muestras sintéticas (default: 5000)')
+    parser.add_argument('--epochs', '-e', type=int, default=30,
+                        help='Epochs del modelo base (default: 30)')
+    parser.add_argument('--compress-epochs', type=int, default=2,
+                        help='Epochs de ajuste de cada variante (default: 2)')
+    parser.add_argument('--sparsity', type=float, nargs='+', default=[0.5, 0.75],
+                        help='Dispersión objetivo de la poda (default: 0.5 0.75)')
+    parser.add_argument('--clusters', type=int, nargs='+', default=[8, 16],
+                        help='Número de centroides (default: 8 16)')
+    parser.add_argument('--quantization', choices=['float32', 'dynamic'], default='dynamic',
+                        help='Cuantización al convertir cada variante (default: dynamic)')
+    parser.add_argument('--tolerance', type=float, default=None,
+                        help='Pérdida máxima de métrica para elegir una variante')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output-dir', '-o', type=str, default=None,
+                        help='Guardar los .tflite de cada variante y el reporte JSON')
+
+    args = parser.parse_args(argv)
+
+    module = importlib.import_module(MODELS[args.model])
+    if not module.TF_AVAILABLE or not tfmot_available():
+        print("Se requieren TensorFlow y tensorflow-model-optimization:")
+        print("   pip install tensorflow tensorflow-model-optimization")
+        return 1
+    module.load_tensorflow()
+    metric = module.EVAL_METRIC
+
+    X, y = module.generate_synthetic_data(args.samples, seed=args.seed)
+    split = int(len(X) * 0.8)
+    X_train, X_test, y_train, y_test = X[:split], X[split:], y[:split], y[split:]
+
+    print(f"Compresión de {args.model}")
+    print("=" * 55)
+    base = module.create_model()
+    fit_model(base, X_train, y_train, epochs=args.epochs, seed=args.seed)
+
+    configs = [(f'prune {s:.0%}', 'prune', s, None) for s in args.sparsity]
+    configs += [(f'cluster {k}', 'cluster', None, k) for k in args.clusters]
+    configs += [(f'prune {s:.0%} + cluster {k}', 'prune+cluster', s, k)
+                for s in args.sparsity for k in args.clusters]
+
+    variants = {'base': convert_keras_model(base, mode=args.quantization)}
+    for label, mode, sparsity, clusters in configs:
+        print(f"   Ajustando variante: {label}")
+        compressed = compress_model(base, mode, X_train, y_train, metric,
+                                    sparsity=sparsity or 0.0, clusters=clusters or 16,
+                                    epochs=args.compress_epochs)
+        variants[label] = convert_keras_model(compressed, mode=args.quantization)
+
+    results = evaluate_variants(variants, X_test, y_test, metric)
+    print(f"\nVariantes ({args.quantization}):")
+    print_variants(results, metric)
+
+    chosen = None
+    if args.tolerance is not None:
+        chosen = pick_variant(results, metric, args.tolerance)
+        if chosen:
+            print(f"\nElegida: {chosen} ({results[chosen]['gzip_kb']:.2f} KB gzip)")
+        else:
+            print(f"\nNinguna variante Pareto-óptima pierde menos de {args.tolerance}")
+
+    if args.output_dir:
+        output_dir = Path(args.output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        for label, content in variants.items():
+            slug = label.replace(' ', '').replace('%', '').replace('+', '_')
+            (output_dir / f"{args.model}_{slug}.tflite").write_bytes(content)
+        with open(output_dir / f"{args.model}_compression.json", 'w') as f:
+            json.dump({'model': args.model, 'metric': metric, 'chosen': chosen,
+                       'variants': results}, f, indent=2)
+        print(f"\nVariantes y reporte guardados en {output_dir}")
+
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,158 @@
+"""
+Caché en disco de datasets de entrenamiento.
+
+La primera ejecución de un `train_*.py` guarda features y labels como
+`.npy` junto con un `manifest.json`; las siguientes ejecuciones con los
+mismos parámetros abren esos archivos con memory-mapping en lugar de
+regenerar los datos sintéticos o volver a parsear el JSON exportado.
+
+La clave de caché combina el nombre del modelo, los parámetros del
+generador (incluida la semilla) y el hash SHA-256 de los archivos fuente
+(el script, los módulos locales que importa y, si aplica, el archivo de
+datos). Cuando el tamaño total supera `max_bytes` se eliminan las
+entradas usadas hace más tiempo.
+"""
+
+import hashlib
+import json
+import shutil
+import time
+from pathlib import Path
+
+import numpy as np
+
+
+CACHE_FORMAT_VERSION = 1
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parent / '.dataset_cache'
+DEFAULT_MAX_BYTES = 4 * 1024 ** 3  # 4 GB
+
+_MANIFEST = 'manifest.json'
+
+
+def file_hash(path, chunk_size: int = 1 << 20) -> str:
+    """Calcula el SHA-256 de un archivo leyendo por bloques."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_key(name: str, params: dict, source_files=()) -> str:
+    """Clave determinista para un dataset (nombre + parámetros + fuentes)."""
+    payload = {
+        'format': CACHE_FORMAT_VERSION,
+        'name': name,
+        'params': params,
+        'sources': {Path(p).name: file_hash(p) for p in source_files},
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def load_or_build(name: str, params: dict, build_fn, source_files=(),
+                  cache_dir=DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES) -> tuple:
+    """
+    Retorna (X, y) desde la caché o los construye con `build_fn` y los guarda.
+
+    Args:
+        name: Nombre del modelo (prefijo de la entrada)
+        params: Parámetros del generador que afectan a los datos
+        build_fn: Función sin argumentos que retorna (X, y)
+        source_files: Archivos cuyo contenido invalida la caché al cambiar
+        cache_dir: Directorio de caché; None desactiva la caché
+        max_bytes: Tamaño máximo total antes de desalojar entradas
+
+    Returns:
+        tuple: (X, y); con caché, arrays memory-mapped de solo lectura también
+               en la primera ejecución, para que el pipeline tf.data los lea
+               por bloques en lugar de retener los arrays generados
+    """
+    if cache_dir is None:
+        return build_fn()
+
+    cache_dir = Path(cache_dir)
+    key = cache_key(name, params, source_files)
+    entry = cache_dir / f"{name}-{key[:16]}"
+
+    if (entry / _MANIFEST).exists():
+        _touch(entry)
+        print(f"   Dataset leído de caché: {entry}")
+        return _open_entry(entry)
+
+    X, y = build_fn()
+    _write_entry(entry, key, name, params, X, y)
+    del X, y
+    evict(cache_dir, max_bytes, keep=entry)
+    print(f"   Dataset guardado en caché: {entry}")
+    return _open_entry(entry)
+
+
+def _open_entry(entry: Path) -> tuple:
+    """Abre X e y de una entrada como memmaps de solo lectura."""
+    return (np.load(entry / 'X.npy', mmap_mode='r'),
+            np.load(entry / 'y.npy', mmap_mode='r'))
+
+
+def _write_entry(entry: Path, key: str, name: str, params: dict, X, y):
+    """Escribe una entrada en un directorio temporal y la publica con rename."""
+    tmp = entry.with_name(f".{entry.name}.tmp")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+
+    np.save(tmp / 'X.npy', np.ascontiguousarray(X))
+    np.save(tmp / 'y.npy', np.ascontiguousarray(y))
+
+    manifest = {
+        'format': CACHE_FORMAT_VERSION,
+        'name': name,
+        'key': key,
+        'params': params,
+        'shapes': {'X': list(X.shape), 'y': list(y.shape)},
+        'dtypes': {'X': str(X.dtype), 'y': str(y.dtype)},
+        'bytes': (tmp / 'X.npy').stat().st_size + (tmp / 'y.npy').stat().st_size,
+        'created': time.time(),
+        'last_used': time.time(),
+    }
+    (tmp / _MANIFEST).write_text(json.dumps(manifest, indent=2, default=str))
+
+    shutil.rmtree(entry, ignore_errors=True)
+    tmp.rename(entry)
+
+
+def _touch(entry: Path):
+    """Actualiza `last_used` de una entrada para la política LRU."""
+    manifest_path = entry / _MANIFEST
+    manifest = json.loads(manifest_path.read_text())
+    manifest['last_used'] = time.time()
+    manifest_path.write_text(json.dumps(manifest, indent=2, default=str))
+
+
+def evict(cache_dir, max_bytes: int, keep: Path = None) -> list:
+    """
+    Elimina las entradas menos usadas hasta quedar por debajo de `max_bytes`.
+
+    Returns:
+        Lista de directorios eliminados
+    """
+    entries = []
+    for manifest_path in Path(cache_dir).glob(f"*/{_MANIFEST}"):
+        try:
+            manifest = json.loads(manifest_path.read_text())
+        except (OSError, ValueError):
+            continue
+        entries.append((manifest.get('last_used', 0), manifest.get('bytes', 0),
+                        manifest_path.parent))
+
+    total = sum(size for _, size, _ in entries)
+    removed = []
+    for _, size, entry in sorted(entries):
+        if total <= max_bytes:
+            break
+        if keep is not None and entry == keep:
+            continue
+        shutil.rmtree(entry, ignore_errors=True)
+        total -= size
+        removed.append(entry)
+
+    return removed
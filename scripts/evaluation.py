@@ -0,0 +1,265 @@
+"""
+Evaluación de modelos en una sola pasada de predicción.
+
+Los `evaluate_model` de los scripts corrían `model.evaluate` y luego
+`model.predict` sobre el mismo conjunto de prueba. Aquí se predice una
+vez por lote y cada lote alimenta acumuladores que calculan todas las
+métricas a partir de la misma salida:
+
+- Clasificación (softmax): loss (entropía cruzada), accuracy, matriz de
+  confusión completa (con `np.bincount`), precisión/recall/F1 por clase
+  y error de calibración esperado (ECE).
+- Regresión (lineal/sigmoid): loss (MSE), MAE global, y MAE/MSE, media
+  y desviación de predicción y real por salida.
+
+Los acumuladores solo guardan sumas, así que el conjunto de prueba puede
+ser un memmap o un iterador de lotes mucho más grande que la memoria.
+El resultado puede escribirse como JSON junto al modelo
+(`<modelo>.eval.json`).
+"""
+
+import json
+import time
+from pathlib import Path
+
+import numpy as np
+
+
+DEFAULT_BATCH_SIZE = 4096
+CALIBRATION_BINS = 15
+_EPSILON = 1e-7  # mismo recorte que Keras en categorical_crossentropy
+
+
+class ClassificationMetrics:
+    """
+    Acumula métricas de clasificación multiclase por lotes.
+
+    Ejemplo:
+        metrics = ClassificationMetrics(['happy', 'sad', ...])
+        for X, y in batches:
+            metrics.update(model.predict_on_batch(X), y)
+        result = metrics.result()
+    """
+
+    task = 'classification'
+
+    def __init__(self, labels: list, bins: int = CALIBRATION_BINS):
+        self.labels = list(labels)
+        self.bins = bins
+        k = len(self.labels)
+        self.count = 0
+        self.loss_sum = 0.0
+        self.confusion = np.zeros((k, k), dtype=np.int64)
+        self.bin_count = np.zeros(bins, dtype=np.int64)
+        self.bin_confidence = np.zeros(bins)
+        self.bin_correct = np.zeros(bins)
+
+    def update(self, probabilities: np.ndarray, y_true: np.ndarray):
+        """
+        Args:
+            probabilities: Salida softmax (n, k)
+            y_true: One-hot (n, k) o índices de clase (n,)
+        """
+        probabilities = np.asarray(probabilities, dtype=np.float64)
+        y_true = np.asarray(y_true)
+        true = np.argmax(y_true, axis=1) if y_true.ndim == 2 else y_true.astype(np.int64)
+        predicted = np.argmax(probabilities, axis=1)
+        k = len(self.labels)
+        n = len(true)
+
+        p_true = probabilities[np.arange(n), true]
+        self.loss_sum += float(-np.log(np.clip(p_true, _EPSILON, 1 - _EPSILON)).sum())
+        self.confusion += np.bincount(true * k + predicted, minlength=k * k).reshape(k, k)
+
+        confidence = probabilities[np.arange(n), predicted]
+        bin_index = np.minimum((confidence * self.bins).astype(np.int64), self.bins - 1)
+        self.bin_count += np.bincount(bin_index, minlength=self.bins)
+        self.bin_confidence += np.bincount(bin_index, weights=confidence, minlength=self.bins)
+        self.bin_correct += np.bincount(bin_index, weights=(predicted == true),
+                                        minlength=self.bins)
+        self.count += n
+
+    def result(self) -> dict:
+        confusion = self.confusion
+        true_positive = np.diag(confusion).astype(np.float64)
+        predicted_count = confusion.sum(axis=0)
+        true_count = confusion.sum(axis=1)
+        precision = np.divide(true_positive, predicted_count,
+                              out=np.zeros_like(true_positive), where=predicted_count > 0)
+        recall = np.divide(true_positive, true_count,
+                           out=np.zeros_like(true_positive), where=true_count > 0)
+        f1 = np.divide(2 * precision * recall, precision + recall,
+                       out=np.zeros_like(precision), where=(precision + recall) > 0)
+
+        used = self.bin_count > 0
+        gap = np.abs(self.bin_correct[used] - self.bin_confidence[used])
+        ece = float(gap.sum() / self.count) if self.count else 0.0
+
+        return {
+            'task': self.task,
+            'samples': self.count,
+            'loss': self.loss_sum / self.count if self.count else 0.0,
+            'accuracy': float(true_positive.sum() / self.count) if self.count else 0.0,
+            'ece': ece,
+            'macro_f1': float(f1.mean()) if len(f1) else 0.0,
+            'labels': self.labels,
+            'confusion_matrix': confusion.tolist(),
+            'per_class': {
+                label: {
+                    'precision': float(precision[i]),
+                    'recall': float(recall[i]),
+                    'f1': float(f1[i]),
+                    'support': int(true_count[i]),
+                    'predicted': int(predicted_count[i]),
+                }
+                for i, label in enumerate(self.labels)
+            },
+            'calibration': [
+                {
+                    'bin': [i / self.bins, (i + 1) / self.bins],
+                    'count': int(self.bin_count[i]),
+                    'confidence': float(self.bin_confidence[i] / self.bin_count[i]),
+                    'accuracy': float(self.bin_correct[i] / self.bin_count[i]),
+                }
+                for i in range(self.bins) if self.bin_count[i]
+            ],
+        }
+
+
+class RegressionMetrics:
+    """Acumula métricas de regresión por salida (MSE, MAE, media y desviación)."""
+
+    task = 'regression'
+
+    def __init__(self, labels: list, unit: str = ''):
+        self.labels = list(labels)
+        self.unit = unit
+        k = len(self.labels)
+        self.count = 0
+        self.abs_error = np.zeros(k)
+        self.sq_error = np.zeros(k)
+        self.pred_sum = np.zeros(k)
+        self.pred_sq = np.zeros(k)
+        self.true_sum = np.zeros(k)
+        self.true_sq = np.zeros(k)
+
+    def update(self, predictions: np.ndarray, y_true: np.ndarray):
+        predictions = np.asarray(predictions, dtype=np.float64)
+        y_true = np.asarray(y_true, dtype=np.float64)
+        error = predictions - y_true
+        self.abs_error += np.abs(error).sum(axis=0)
+        self.sq_error += np.square(error).sum(axis=0)
+        self.pred_sum += predictions.sum(axis=0)
+        self.pred_sq += np.square(predictions).sum(axis=0)
+        self.true_sum += y_true.sum(axis=0)
+        self.true_sq += np.square(y_true).sum(axis=0)
+        self.count += len(y_true)
+
+    def result(self) -> dict:
+        n = max(self.count, 1)
+        pred_mean, true_mean = self.pred_sum / n, self.true_sum / n
+        pred_std = np.sqrt(np.maximum(self.pred_sq / n - pred_mean ** 2, 0))
+        true_std = np.sqrt(np.maximum(self.true_sq / n - true_mean ** 2, 0))
+        return {
+            'task': self.task,
+            'samples': self.count,
+            'unit': self.unit,
+            'loss': float(self.sq_error.sum() / (n * len(self.labels))),
+            'mae': float(self.abs_error.sum() / (n * len(self.labels))),
+            'labels': self.labels,
+            'per_output': {
+                label: {
+                    'mae': float(self.abs_error[i] / n),
+                    'mse': float(self.sq_error[i] / n),
+                    'pred_mean': float(pred_mean[i]),
+                    'pred_std': float(pred_std[i]),
+                    'true_mean': float(true_mean[i]),
+                    'true_std': float(true_std[i]),
+                }
+                for i, label in enumerate(self.labels)
+            },
+        }
+
+
+def array_batches(X, y, batch_size: int = DEFAULT_BATCH_SIZE):
+    """Lotes (X, y) de arrays o memmaps, leyendo un lote a la vez."""
+    for start in range(0, len(X), batch_size):
+        yield (np.asarray(X[start:start + batch_size], dtype=np.float32),
+               np.asarray(y[start:start + batch_size]))
+
+
+def evaluate_batches(predict_fn, batches, metrics) -> dict:
+    """
+    Una pasada de predicción sobre `batches` alimentando `metrics`.
+
+    Args:
+        predict_fn: Función X -> predicciones (p. ej. `model.predict_on_batch`)
+        batches: Iterable de (X, y)
+        metrics: `ClassificationMetrics` o `RegressionMetrics`
+    """
+    start = time.perf_counter()
+    for X, y in batches:
+        metrics.update(np.asarray(predict_fn(X)), y)
+    result = metrics.result()
+    result['seconds'] = time.perf_counter() - start
+    return result
+
+
+def evaluate_keras(model, X_test, y_test, metrics, batch_size: int = DEFAULT_BATCH_SIZE) -> dict:
+    """Evalúa un modelo Keras sobre arrays (o memmaps) en una sola pasada."""
+    return evaluate_batches(model.predict_on_batch, array_batches(X_test, y_test, batch_size),
+                            metrics)
+
+
+def print_report(result: dict):
+    """Imprime las métricas en el formato de los scripts de entrenamiento."""
+    print(f"\nMétricas de evaluación ({result['samples']} muestras):")
+    if result['task'] == 'classification':
+        print(f"   Loss: {result['loss']:.4f}")
+        print(f"   Accuracy: {result['accuracy']:.4f}")
+        print(f"   F1 macro: {result['macro_f1']:.4f}")
+        print(f"   ECE (calibración): {result['ece']:.4f}")
+
+        labels = result['labels']
+        width = max(len(label) for label in labels)
+        print(f"\nPor clase:")
+        print(f"   {'':<{width}} {'precisión':>9} {'recall':>7} {'F1':>6} "
+              f"{'reales':>7} {'predichas':>9}")
+        for label, c in result['per_class'].items():
+            print(f"   {label:<{width}} {c['precision']:>9.3f} {c['recall']:>7.3f} "
+                  f"{c['f1']:>6.3f} {c['support']:>7} {c['predicted']:>9}")
+
+        short = [label[:6] for label in labels]
+        print(f"\nMatriz de confusión (filas = real, columnas = predicha):")
+        print(f"   {'':<{width}} " + ' '.join(f"{s:>6}" for s in short))
+        for label, row in zip(labels, result['confusion_matrix']):
+            print(f"   {label:<{width}} " + ' '.join(f"{v:>6}" for v in row))
+    else:
+        unit = f" {result['unit']}" if result['unit'] else ''
+        print(f"   MSE Loss: {result['loss']:.4f}")
+        print(f"   MAE: {result['mae']:.4f}{unit}")
+        print(f"\nPor salida:")
+        for label, o in result['per_output'].items():
+            print(f"   {label}: pred={o['pred_mean']:.3f} ± {o['pred_std']:.3f}, "
+                  f"real={o['true_mean']:.3f} ± {o['true_std']:.3f}, MAE={o['mae']:.3f}{unit}")
+
+
+def report_path(output_path) -> Path:
+    """Ruta del reporte JSON para un `.tflite` de salida."""
+    output_path = Path(output_path)
+    return output_path.with_name(f"{output_path.stem}.eval.json")
+
+
+def write_report(result: dict, output_path, name: str = None) -> Path:
+    """Escribe el resultado como `<modelo>.eval.json` junto a `output_path`."""
+    path = report_path(output_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    report = {
+        'model': name or Path(output_path).stem,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        **result,
+    }
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"   Reporte de evaluación: {path}")
+    return path
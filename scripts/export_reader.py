@@ -0,0 +1,679 @@
+"""
+Lectura en streaming de los archivos exportados por MLDataExportService.
+
+`MLDataExportService.exportTrainingData` escribe un único objeto JSON con
+algunos campos de cabecera y la lista `records`. Para exportaciones de
+varios GB no es viable cargar el archivo completo con `json.load`, así
+que este módulo recorre el archivo por bloques y decodifica cada registro
+por separado con el decodificador C de `json`.
+
+`ExportStream` extiende lo mismo a un directorio con miles de
+exportaciones (una por dispositivo): intercala los registros de varios
+archivos abiertos a la vez y los entrega en bloques de arrays, con
+memoria acotada sin importar el total de registros.
+
+La app también puede exportar en formato binario (`.tmlb`, ver
+`lib/utils/ml_binary_format.dart`): columnas float32/int little-endian
+que `BinaryExport` mapea con `np.memmap` sin decodificar valor por valor.
+`load_export_arrays` y `ExportStream` detectan el formato por el magic.
+"""
+
+import json
+import re
+import shutil
+import struct
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+_DEFAULT_CHUNK_CHARS = 1 << 20
+
+BINARY_MAGIC = b'TMLB'
+BINARY_VERSION = 1
+BINARY_EXTENSION = '.tmlb'
+UNKNOWN_ACTION = 255
+UNKNOWN_EMOTION = -1
+_TIME_TO_CRITICAL_SIZE = 4
+_PREFIX = struct.Struct('<4sII')
+_BLOCK_PREFIX = struct.Struct('<II')
+
+
+class ExportReader:
+    """
+    Itera los registros de un archivo de exportación sin cargarlo completo.
+
+    Los campos escalares de nivel superior (version, record_count, ...)
+    quedan en `header` a medida que se leen; la app los escribe antes de
+    `records`, por lo que están disponibles al recibir el primer registro.
+
+    Ejemplo:
+        reader = ExportReader('ml_training_data.json')
+        for record in reader.records():
+            ...
+    """
+
+    def __init__(self, path: str, chunk_chars: int = _DEFAULT_CHUNK_CHARS):
+        self.path = path
+        self.header = {}
+        self._chunk_chars = chunk_chars
+        self._decoder = json.JSONDecoder()
+        self._file = None
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+
+    def records(self):
+        """Generador de registros (dict) en el orden del archivo."""
+        with open(self.path, 'r', encoding='utf-8') as f:
+            self._file = f
+            self._buf, self._pos, self._eof = '', 0, False
+            yield from self._parse_document()
+        self._file = None
+
+    def _parse_document(self):
+        self._expect('{')
+        if self._peek() == '}':
+            return
+
+        while True:
+            key = self._decode_value()
+            self._expect(':')
+
+            if key == 'records':
+                yield from self._parse_records()
+            else:
+                self.header[key] = self._decode_value()
+
+            separator = self._next_char()
+            if separator == '}':
+                return
+            if separator != ',':
+                raise ValueError(f"JSON inválido en {self.path}: se esperaba ',' o '}}'")
+
+    def _parse_records(self):
+        self._expect('[')
+        if self._peek() == ']':
+            self._pos += 1
+            return
+
+        while True:
+            yield self._decode_value()
+            separator = self._next_char()
+            if separator == ']':
+                return
+            if separator != ',':
+                raise ValueError(f"JSON inválido en {self.path}: se esperaba ',' o ']'")
+
+    def _fill(self) -> bool:
+        data = self._file.read(self._chunk_chars)
+        if not data:
+            self._eof = True
+            return False
+        self._buf = self._buf[self._pos:] + data
+        self._pos = 0
+        return True
+
+    def _peek(self) -> str:
+        while True:
+            self._pos = _WHITESPACE.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ''
+
+    def _next_char(self) -> str:
+        char = self._peek()
+        self._pos += 1
+        return char
+
+    def _expect(self, char: str):
+        if self._next_char() != char:
+            raise ValueError(f"JSON inválido en {self.path}: se esperaba '{char}'")
+
+    def _decode_value(self):
+        self._peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buf, self._pos)
+                # Un número al final del buffer puede estar truncado
+                if end < len(self._buf) or self._eof:
+                    self._pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self._eof:
+                    raise
+            if not self._fill():
+                value, self._pos = self._decoder.raw_decode(self._buf, self._pos)
+                return value
+
+
+def is_binary_export(path) -> bool:
+    """True si el archivo empieza con el magic del formato binario."""
+    with open(path, 'rb') as f:
+        return f.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+
+
+def _align8(size: int) -> int:
+    return (size + 7) & ~7
+
+
+class BinaryExport:
+    """
+    Exportación binaria (`.tmlb`) mapeada en memoria.
+
+    Cada columna de cada bloque es una vista de `np.memmap` sobre el
+    archivo; `columns()` las concatena. Las acciones se guardan como
+    índices en la tabla `actions` de la cabecera y los timestamps como ms
+    desde epoch (UTC). Cada registro es un instante UTC: no hay un offset
+    horario único que falle en los cambios de horario.
+
+    Ejemplo:
+        export = BinaryExport('ml_training_data.tmlb')
+        columns = export.columns()
+        X, actions = columns['features'], columns['action']
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._data = np.memmap(self.path, dtype=np.uint8, mode='r')
+        if len(self._data) < _PREFIX.size:
+            raise ValueError(f"{self.path}: archivo binario truncado")
+
+        magic, version, header_size = _PREFIX.unpack_from(self._data, 0)
+        if magic != BINARY_MAGIC:
+            raise ValueError(f"{self.path}: no es una exportación binaria (TMLB)")
+        if version != BINARY_VERSION:
+            raise ValueError(f"{self.path}: versión de formato no soportada: {version}")
+
+        header_end = _PREFIX.size + header_size
+        self.header = json.loads(bytes(self._data[_PREFIX.size:header_end]).decode('utf-8'))
+        self.feature_count = int(self.header['feature_count'])
+        self.actions = list(self.header['actions'])
+        self.blocks = self._index_blocks(header_end)
+
+    def _index_blocks(self, offset: int) -> list:
+        """Recorre los prefijos de bloque y calcula las vistas de cada columna."""
+        blocks = []
+        total = len(self._data)
+        while offset < total:
+            if offset + _BLOCK_PREFIX.size > total:
+                raise ValueError(f"{self.path}: bloque truncado en el byte {offset}")
+            n, _ = _BLOCK_PREFIX.unpack_from(self._data, offset)
+
+            columns = {}
+            position = offset + _BLOCK_PREFIX.size
+            for name, dtype, width in (
+                ('timestamp_ms', np.int64, 1),
+                ('features', np.float32, self.feature_count),
+                ('time_to_critical', np.float32, _TIME_TO_CRITICAL_SIZE),
+                ('action', np.uint8, 1),
+                ('emotion', np.int8, 1),
+            ):
+                size = n * width * np.dtype(dtype).itemsize
+                if position + size > total:
+                    raise ValueError(f"{self.path}: bloque truncado en el byte {offset}")
+                view = np.frombuffer(self._data, dtype=dtype, count=n * width, offset=position)
+                columns[name] = view.reshape(n, width) if width > 1 else view
+                position += size
+
+            blocks.append(columns)
+            offset = _align8(position)
+        return blocks
+
+    def __len__(self) -> int:
+        return sum(len(block['action']) for block in self.blocks)
+
+    def columns(self) -> dict:
+        """Columnas completas: timestamp_ms, features, time_to_critical, action, emotion."""
+        if len(self.blocks) == 1:
+            return dict(self.blocks[0])
+        empty = {
+            'timestamp_ms': np.empty(0, dtype=np.int64),
+            'features': np.empty((0, self.feature_count), dtype=np.float32),
+            'time_to_critical': np.empty((0, _TIME_TO_CRITICAL_SIZE), dtype=np.float32),
+            'action': np.empty(0, dtype=np.uint8),
+            'emotion': np.empty(0, dtype=np.int8),
+        }
+        if not self.blocks:
+            return empty
+        return {name: np.concatenate([block[name] for block in self.blocks])
+                for name in empty}
+
+    def action_table(self, label_of, dtype=np.int32) -> np.ndarray:
+        """
+        Tabla índice de acción -> etiqueta, evaluando `label_of` una vez por acción.
+
+        `label_of` recibe un registro con solo `action_taken`; el índice
+        `UNKNOWN_ACTION` recibe un registro vacío.
+        """
+        table = np.full(UNKNOWN_ACTION + 1, label_of({}), dtype=dtype)
+        table[:len(self.actions)] = [label_of({'action_taken': a}) for a in self.actions]
+        return table
+
+    def to_epoch_ms(self, timestamp: str) -> int:
+        """Convierte un timestamp ISO 8601 (hora local si no trae zona) a ms desde epoch."""
+        return _epoch_ms(timestamp)
+
+    def to_iso(self, timestamp_ms: int) -> str:
+        """Instante ISO 8601 en UTC (con zona, así se compara bien con cualquier timestamp)."""
+        dt = datetime.fromtimestamp(int(timestamp_ms) / 1000, timezone.utc)
+        return dt.isoformat(timespec='milliseconds')
+
+    def records(self):
+        """
+        Registros como dicts, para código que trabaja registro por registro.
+
+        `features` es una fila float32 del memmap; no incluye `timestamp`
+        (usar `columns()['timestamp_ms']`).
+        """
+        for block in self.blocks:
+            for features, time_to_critical, action, emotion in zip(
+                    block['features'], block['time_to_critical'], block['action'],
+                    block['emotion']):
+                yield {
+                    'features': features,
+                    'action_taken': self.actions[action] if action < len(self.actions) else None,
+                    'time_to_critical': None if np.isnan(time_to_critical).all()
+                    else time_to_critical.tolist(),
+                    'resulting_emotion': None if emotion == UNKNOWN_EMOTION else int(emotion),
+                }
+
+
+def write_binary_export(path, records, header: dict = None, block_size: int = 4096,
+                        actions: list = None) -> int:
+    """
+    Escribe registros (dicts como los de la exportación JSON) en formato binario.
+
+    Sirve para convertir exportaciones JSON existentes
+    (`write_binary_export(out, ExportReader(src).records(), reader.header)`).
+    Los timestamps sin zona se interpretan como hora local (con el offset
+    de su propia fecha) y se guardan como instantes UTC.
+
+    Returns:
+        Registros escritos
+    """
+    header = {k: v for k, v in (header or {}).items() if k != 'records'}
+    actions = actions or header.get('actions') or _default_actions()
+    action_index = {a: i for i, a in enumerate(actions)}
+
+    feature_count, count = None, 0
+    body_path = Path(f"{path}.body.tmp")
+    with open(body_path, 'wb') as body:
+
+        def flush(batch):
+            n = len(batch)
+            ts = np.empty(n, dtype=np.int64)
+            X = np.empty((n, feature_count), dtype=np.float32)
+            ttc = np.full((n, _TIME_TO_CRITICAL_SIZE), np.nan, dtype=np.float32)
+            action = np.empty(n, dtype=np.uint8)
+            emotion = np.empty(n, dtype=np.int8)
+            for i, record in enumerate(batch):
+                ts[i] = _epoch_ms(record['timestamp'])
+                X[i] = record['features']
+                values = (record.get('time_to_critical') or [])[:_TIME_TO_CRITICAL_SIZE]
+                ttc[i, :len(values)] = values
+                action[i] = action_index.get(record.get('action_taken'), UNKNOWN_ACTION)
+                value = record.get('resulting_emotion')
+                emotion[i] = UNKNOWN_EMOTION if value is None else value
+            payload = b''.join([_BLOCK_PREFIX.pack(n, 0), ts.tobytes(), X.tobytes(),
+                                ttc.tobytes(), action.tobytes(), emotion.tobytes()])
+            body.write(payload + b'\0' * (_align8(len(payload)) - len(payload)))
+
+        batch = []
+        for record in records:
+            if feature_count is None:
+                feature_count = len(record['features'])
+            if len(record['features']) != feature_count:
+                raise ValueError(f"Todos los registros deben tener {feature_count} features")
+            batch.append(record)
+            count += 1
+            if len(batch) == block_size:
+                flush(batch)
+                batch = []
+        if batch:
+            flush(batch)
+
+    # El header (con record_count) se conoce al final: se antepone al cuerpo
+    header.pop('utc_offset_minutes', None)
+    header.update({'record_count': count, 'feature_count': feature_count or 0,
+                   'actions': actions})
+    header_bytes = json.dumps(header).encode('utf-8')
+    header_size = _align8(_PREFIX.size + len(header_bytes)) - _PREFIX.size
+
+    tmp_path = Path(f"{path}.tmp")
+    with open(tmp_path, 'wb') as f, open(body_path, 'rb') as body:
+        f.write(_PREFIX.pack(BINARY_MAGIC, BINARY_VERSION, header_size))
+        f.write(header_bytes + b' ' * (header_size - len(header_bytes)))
+        shutil.copyfileobj(body, f, 1 << 20)
+    body_path.unlink()
+    tmp_path.replace(path)
+    return count
+
+
+def _default_actions() -> list:
+    """Ids de `InteractionType` en el orden de la app."""
+    return ['feed', 'play', 'clean', 'rest', 'minigame', 'customize', 'evolve',
+            'app_open', 'app_close']
+
+
+def _load_binary_arrays(path: str, input_size: int, label_of, label_dtype,
+                        since: str = None) -> tuple:
+    """`load_export_arrays` para `.tmlb`: operaciones sobre columnas completas."""
+    start = time.perf_counter()
+    export = BinaryExport(path)
+    columns = export.columns()
+    n = len(columns['action'])
+
+    if export.feature_count != input_size:
+        X = np.empty((0, input_size), dtype=np.float32)
+        labels = np.empty(0, dtype=label_dtype)
+        count, skipped, older, latest = 0, n, 0, None
+    else:
+        timestamps = columns['timestamp_ms']
+        keep = None
+        if since is not None:
+            keep = timestamps > export.to_epoch_ms(since)
+        older = 0 if keep is None else int(n - keep.sum())
+
+        X = columns['features'] if keep is None else columns['features'][keep]
+        actions = columns['action'] if keep is None else columns['action'][keep]
+        labels = export.action_table(label_of, label_dtype)[actions]
+        X = np.array(X, dtype=np.float32)  # copia: el memmap se cierra con el export
+        count, skipped = len(X), 0
+        kept = timestamps if keep is None else timestamps[keep]
+        latest = export.to_iso(kept.max()) if len(kept) else None
+
+    elapsed = time.perf_counter() - start
+    stats = {
+        'records': count,
+        'skipped': skipped,
+        'older': older,
+        'latest_timestamp': latest,
+        'seconds': elapsed,
+        'records_per_second': n / elapsed if elapsed > 0 else 0.0,
+    }
+    return X, labels, stats
+
+
+def load_export_arrays(path: str, input_size: int, label_of,
+                       label_dtype=np.int32, initial_capacity: int = 65536,
+                       since: str = None) -> tuple:
+    """
+    Carga features y etiquetas de una exportación en buffers de NumPy.
+
+    Los registros se escriben directamente en buffers float32/int
+    preasignados (con `record_count` de la cabecera si está disponible),
+    sin listas intermedias de Python.
+
+    Las exportaciones binarias (`.tmlb`) se cargan por columnas, sin
+    recorrer los registros en Python.
+
+    Args:
+        path: Archivo JSON o binario exportado por la app
+        input_size: Longitud esperada de `features`
+        label_of: Función record -> etiqueta entera
+        label_dtype: Tipo del buffer de etiquetas
+        initial_capacity: Capacidad inicial si la cabecera no trae record_count
+        since: Timestamp ISO 8601; si se indica, solo se cargan registros
+               con `timestamp` posterior (modo incremental)
+
+    Returns:
+        tuple: (X, labels, stats) donde stats incluye records, skipped,
+               older, latest_timestamp, seconds y records_per_second
+    """
+    if is_binary_export(path):
+        return _load_binary_arrays(path, input_size, label_of, label_dtype, since)
+
+    reader = ExportReader(path)
+    start = time.perf_counter()
+
+    X = labels = None
+    count = skipped = older = 0
+    since_dt = _to_utc(since) if since else None
+    latest = latest_dt = None
+
+    for record in reader.records():
+        if X is None:
+            capacity = int(reader.header.get('record_count') or initial_capacity)
+            X = np.empty((max(capacity, 1), input_size), dtype=np.float32)
+            labels = np.empty(X.shape[0], dtype=label_dtype)
+
+        features = record.get('features', [])
+        if len(features) != input_size:
+            skipped += 1
+            continue
+
+        timestamp = record.get('timestamp')
+        if timestamp:
+            timestamp_dt = _to_utc(timestamp)
+            if since_dt is not None and timestamp_dt <= since_dt:
+                older += 1
+                continue
+            if latest_dt is None or timestamp_dt > latest_dt:
+                latest, latest_dt = timestamp, timestamp_dt
+
+        if count == X.shape[0]:
+            X = _grow(X)
+            labels = _grow(labels)
+
+        X[count] = features
+        labels[count] = label_of(record)
+        count += 1
+
+    elapsed = time.perf_counter() - start
+    if X is None:
+        X = np.empty((0, input_size), dtype=np.float32)
+        labels = np.empty(0, dtype=label_dtype)
+
+    stats = {
+        'records': count,
+        'skipped': skipped,
+        'older': older,
+        'latest_timestamp': latest,
+        'seconds': elapsed,
+        'records_per_second': (count + skipped + older) / elapsed if elapsed > 0 else 0.0,
+    }
+    return X[:count], labels[:count], stats
+
+
+def _to_utc(timestamp: str) -> datetime:
+    """
+    Timestamp ISO 8601 como datetime en UTC, para poder comparar cualquier par.
+
+    La exportación JSON escribe la hora local del dispositivo sin zona; un
+    timestamp sin zona se interpreta como hora local (igual que la marca de
+    agua que se guardó a partir de él).
+    """
+    return datetime.fromisoformat(timestamp).astimezone(timezone.utc)
+
+
+def _epoch_ms(timestamp: str) -> int:
+    """Timestamp ISO 8601 (hora local si no trae zona) como ms desde epoch."""
+    return int(round(_to_utc(timestamp).timestamp() * 1000))
+
+
+def _grow(buffer: np.ndarray) -> np.ndarray:
+    """Duplica la capacidad de un buffer preservando su contenido."""
+    grown = np.empty((buffer.shape[0] * 2,) + buffer.shape[1:], dtype=buffer.dtype)
+    grown[:buffer.shape[0]] = buffer
+    return grown
+
+
+def discover_exports(data_dir, patterns=('*.json', f'*{BINARY_EXTENSION}')) -> list:
+    """
+    Lista (ordenada, recursiva) de archivos de exportación JSON y binarios en `data_dir`.
+
+    Se omiten los `manifest.json` (cachés y datasets de `sharded_generation`).
+    """
+    return sorted(p for pattern in patterns for p in Path(data_dir).rglob(pattern)
+                  if p.is_file() and p.name != 'manifest.json')
+
+
+class ExportStream:
+    """
+    Recorre muchas exportaciones intercalando sus registros, en bloques.
+
+    Mantiene abiertos a lo sumo `cycle_length` archivos y toma un registro
+    de cada uno por turno; al agotarse un archivo abre el siguiente. Cada
+    bloque se valida completo: las filas cuyo `features` no tiene
+    `input_size` elementos o contiene valores no finitos se descartan y se
+    cuentan en `stats`. Los archivos con JSON inválido se omiten desde el
+    punto del error.
+
+    Los archivos binarios (`.tmlb`) no pasan por dicts: cada turno aportan
+    una rebanada de sus columnas mapeadas en memoria, y un archivo cuya
+    `feature_count` no es `input_size` se descarta completo. Por eso los
+    bloques tienen aproximadamente `block_size` filas.
+
+    La instancia se puede llamar sin argumentos y retorna un iterador de
+    bloques (X, y), así que sirve como `chunk_fn` de
+    `tf_pipeline.dataset_from_chunks`; cada llamada es una epoch nueva.
+
+    Ejemplo:
+        stream = ExportStream(discover_exports('exports/'), 15, action_index,
+                              target_fn=lambda labels: one_hot(labels, 6))
+        for X, y in stream():
+            ...
+    """
+
+    def __init__(self, paths, input_size: int, label_of, target_fn=None,
+                 block_size: int = 4096, cycle_length: int = 16,
+                 chunk_chars: int = 1 << 18, seed: int = None):
+        self.paths = [str(p) for p in paths]
+        self.input_size = input_size
+        self.label_of = label_of
+        self.target_fn = target_fn
+        self.block_size = block_size
+        self.cycle_length = cycle_length
+        self.chunk_chars = chunk_chars
+        self.rng = np.random.default_rng(seed) if seed is not None else None
+        self.stats = self._empty_stats()
+
+    @staticmethod
+    def _empty_stats() -> dict:
+        return {'files': 0, 'bad_files': 0, 'records': 0, 'skipped': 0, 'blocks': 0}
+
+    def __call__(self):
+        return self.blocks()
+
+    def blocks(self):
+        """Generador de bloques (X float32, y) de una pasada por todos los archivos."""
+        self.stats = self._empty_stats()
+        order = self.rng.permutation(len(self.paths)) if self.rng is not None \
+            else range(len(self.paths))
+        pending = (self.paths[i] for i in order)
+
+        def open_next():
+            for path in pending:
+                self.stats['files'] += 1
+                if path.endswith(BINARY_EXTENSION):
+                    return path, self._binary_slices(path)
+                return path, ExportReader(path, self.chunk_chars).records()
+            return None
+
+        active = []
+        while len(active) < self.cycle_length:
+            reader = open_next()
+            if reader is None:
+                break
+            active.append(reader)
+
+        # Registros JSON (listas) y rebanadas de columnas binarias (arrays)
+        features, labels = [], []
+        parts, part_rows = [], 0
+        while active:
+            i = 0
+            while i < len(active):
+                path, records = active[i]
+                try:
+                    record = next(records)
+                except StopIteration:
+                    record = None
+                except (ValueError, UnicodeDecodeError) as e:
+                    print(f"⚠️  {path}: {e}; se omite el resto del archivo")
+                    self.stats['bad_files'] += 1
+                    record = None
+
+                if record is None:
+                    reader = open_next()
+                    if reader is None:
+                        active.pop(i)
+                    else:
+                        active[i] = reader
+                    continue
+
+                if isinstance(record, tuple):
+                    parts.append(record)
+                    part_rows += len(record[1])
+                else:
+                    row = record.get('features')
+                    features.append(row if row is not None else [])
+                    labels.append(self.label_of(record))
+                i += 1
+
+                if len(features) + part_rows >= self.block_size:
+                    block = self._flush(features, labels, parts)
+                    features, labels, parts, part_rows = [], [], [], 0
+                    if block is not None:
+                        yield block
+
+        if features or parts:
+            block = self._flush(features, labels, parts)
+            if block is not None:
+                yield block
+
+    def _binary_slices(self, path):
+        """
+        Rebanadas (X, etiquetas) de las columnas de un `.tmlb`, sin pasar por dicts.
+
+        Cada turno entrega `block_size // cycle_length` filas, así un archivo
+        binario se intercala con los demás en la misma proporción que uno
+        JSON. Un archivo con otra cantidad de features se descarta completo.
+        """
+        export = BinaryExport(path)
+        if export.feature_count != self.input_size:
+            self.stats['skipped'] += len(export)
+            return
+        table = export.action_table(self.label_of)
+        step = max(1, self.block_size // self.cycle_length)
+        for block in export.blocks:
+            for start in range(0, len(block['action']), step):
+                yield (block['features'][start:start + step],
+                       table[block['action'][start:start + step]])
+
+    def _flush(self, features: list, labels: list, parts: list):
+        """Une filas JSON y rebanadas binarias en un bloque validado; None si queda vacío."""
+        if features:
+            parts = [self._rows_to_arrays(features, labels)] + parts
+        if len(parts) == 1:
+            X, label_array = parts[0]
+        else:
+            X = np.concatenate([p[0] for p in parts])
+            label_array = np.concatenate([p[1] for p in parts])
+        X = np.asarray(X, dtype=np.float32)
+
+        finite = np.isfinite(X).all(axis=1)
+        if not finite.all():
+            self.stats['skipped'] += int(len(X) - finite.sum())
+            X, label_array = X[finite], label_array[finite]
+
+        self.stats['records'] += len(X)
+        if len(X) == 0:
+            return None
+
+        self.stats['blocks'] += 1
+        y = self.target_fn(label_array) if self.target_fn is not None else label_array
+        return X, y
+
+    def _rows_to_arrays(self, features: list, labels: list) -> tuple:
+        """Convierte filas JSON a arrays, descartando las de longitud incorrecta."""
+        lengths = np.fromiter(map(len, features), dtype=np.int64, count=len(features))
+        valid = lengths == self.input_size
+        self.stats['skipped'] += int(len(features) - valid.sum())
+
+        X = np.array([f for f, ok in zip(features, valid) if ok], dtype=np.float32)
+        return X.reshape(-1, self.input_size), np.asarray(labels)[valid]
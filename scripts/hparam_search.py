@@ -0,0 +1,415 @@
+#!/usr/bin/env python3
+"""
+Búsqueda de hiperparámetros en paralelo para los modelos de Tamagotchi.
+
+Explora anchos de las capas ocultas, dropout, learning rate y tamaño de
+batch con configuraciones aleatorias y poda por successive halving (estilo
+ASHA síncrono): todas las pruebas entrenan unas pocas epochs, solo la
+mejor fracción `1/eta` continúa al siguiente escalón con `eta` veces más
+epochs, y así hasta `--max-epochs`. Cada prueba usa early stopping sobre
+la métrica de validación.
+
+Las pruebas de cada escalón se reparten en procesos (pool `spawn`, como
+`train_all.py`) con hilos de TensorFlow limitados. Cada prueba se puntúa
+con la métrica de validación del `.tflite` (cuantización dinámica, lo que
+se distribuye), su tamaño y su latencia medida en CPU, así se puede elegir
+el modelo más pequeño que cumple `--target`.
+
+Los resultados se agregan a `trials.jsonl` en `--work-dir` junto con los
+pesos de cada prueba; volver a ejecutar el mismo comando retoma la
+búsqueda sin repetir las pruebas ya registradas. La latencia se mide con
+otros procesos entrenando en paralelo, así que sirve para comparar
+pruebas entre sí; para valores absolutos usar `benchmark_tflite.py`.
+
+Uso:
+    python hparam_search.py MODEL [--trials N] [--jobs N] [--target VALOR]
+
+Ejemplo:
+    python hparam_search.py action_predictor --trials 27 --eta 3 --target 0.85 \\
+        --output ../assets/models/action_predictor.tflite
+"""
+
+import argparse
+import importlib
+import json
+import math
+import multiprocessing
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+
+from train_all import MODELS, limit_threads
+
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+DEFAULT_WORK_DIR = SCRIPTS_DIR / '.hparam_search'
+
+# Valores discretos o (mínimo, máximo) para muestreo log-uniforme
+SEARCH_SPACE = {
+    'units_1': [16, 24, 32, 48, 64],
+    'units_2': [8, 12, 16, 24, 32],
+    'dropout': [0.0, 0.1, 0.2, 0.3],
+    'learning_rate': (1e-4, 1e-2),
+    'batch_size': [16, 32, 64, 128],
+}
+
+
+def sample_config(rng: np.random.Generator) -> dict:
+    """Muestrea una configuración de `SEARCH_SPACE`."""
+    low, high = SEARCH_SPACE['learning_rate']
+    return {
+        'units_1': int(rng.choice(SEARCH_SPACE['units_1'])),
+        'units_2': int(rng.choice(SEARCH_SPACE['units_2'])),
+        'dropout': float(rng.choice(SEARCH_SPACE['dropout'])),
+        'learning_rate': float(math.exp(rng.uniform(math.log(low), math.log(high)))),
+        'batch_size': int(rng.choice(SEARCH_SPACE['batch_size'])),
+    }
+
+
+def rung_epochs(min_epochs: int, max_epochs: int, eta: int) -> list:
+    """Epochs acumuladas de cada escalón: min, min*eta, ... hasta max."""
+    budgets = []
+    epochs = min_epochs
+    while epochs < max_epochs:
+        budgets.append(epochs)
+        epochs *= eta
+    budgets.append(max_epochs)
+    return budgets
+
+
+def is_better(a: float, b: float, metric: str) -> bool:
+    """Indica si el valor `a` de la métrica es mejor que `b`."""
+    return a > b if metric == 'accuracy' else a < b
+
+
+def meets_target(value: float, target: float, metric: str) -> bool:
+    """Accuracy mínima o MAE máximo."""
+    return value >= target if metric == 'accuracy' else value <= target
+
+
+class TrialLog:
+    """
+    Registro JSONL de la búsqueda: una línea de cabecera y una por prueba/escalón.
+
+    Se escribe con flush tras cada línea, así una búsqueda interrumpida
+    conserva todo lo que ya terminó.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.header = None
+        self.results = {}
+
+        if self.path.exists():
+            with open(self.path) as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    record = json.loads(line)
+                    if record.get('type') == 'search':
+                        self.header = record
+                    else:
+                        self.results[(record['trial'], record['rung'])] = record
+
+    def get(self, trial: int, rung: int):
+        return self.results.get((trial, rung))
+
+    def append(self, record: dict):
+        if record.get('type') == 'search':
+            self.header = record
+        else:
+            self.results[(record['trial'], record['rung'])] = record
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(record) + '\n')
+            f.flush()
+
+    def latest(self) -> dict:
+        """Último escalón registrado de cada prueba (coincide con sus pesos en disco)."""
+        latest = {}
+        for (trial, rung), record in self.results.items():
+            if trial not in latest or rung > latest[trial]['rung']:
+                latest[trial] = record
+        return latest
+
+
+def _prepare_data(module, data_dir: Path, samples: int, seed: int):
+    """Genera el dataset una vez y lo guarda como .npy para los workers."""
+    if (data_dir / 'y_val.npy').exists():
+        return
+
+    X, y = module.generate_synthetic_data(samples, seed=seed)
+    X = np.asarray(X, dtype=np.float32)
+    y = np.asarray(y, dtype=np.float32)
+    order = np.random.default_rng(seed).permutation(len(X))
+    split = int(len(X) * 0.8)
+
+    data_dir.mkdir(parents=True, exist_ok=True)
+    np.save(data_dir / 'X_train.npy', X[order[:split]])
+    np.save(data_dir / 'y_train.npy', y[order[:split]])
+    np.save(data_dir / 'X_val.npy', X[order[split:]])
+    # y_val se escribe al final: su existencia marca el dataset como completo
+    np.save(data_dir / 'y_val.npy', y[order[split:]])
+
+
+def _run_trial(name: str, trial: int, rung: int, config: dict, epochs: int,
+               initial_epoch: int, work_dir: str, threads: int, patience: int,
+               latency_runs: int) -> dict:
+    """Entrena una prueba hasta `epochs` (retomando sus pesos) y la puntúa."""
+    limit_threads(threads)
+    start = time.perf_counter()
+    record = {'trial': trial, 'rung': rung, 'epochs': epochs, 'config': config}
+
+    try:
+        module = importlib.import_module(MODELS[name])
+        module.load_tensorflow()
+        tf, keras = module.tf, module.keras
+        tf.config.threading.set_intra_op_parallelism_threads(threads)
+        tf.config.threading.set_inter_op_parallelism_threads(1)
+        tf.keras.utils.set_random_seed(trial)
+
+        from tflite_utils import (convert_keras_model, measure_latency,
+                                  predict_tflite, score_predictions)
+
+        work_dir = Path(work_dir)
+        data_dir = work_dir / 'data'
+        X_train = np.load(data_dir / 'X_train.npy', mmap_mode='r')
+        y_train = np.load(data_dir / 'y_train.npy', mmap_mode='r')
+        X_val = np.load(data_dir / 'X_val.npy')
+        y_val = np.load(data_dir / 'y_val.npy')
+
+        model = module.create_model(
+            units=(config['units_1'], config['units_2']),
+            dropout=config['dropout'],
+            learning_rate=config['learning_rate'],
+        )
+        weights_path = work_dir / f'trial_{trial:03d}.weights.h5'
+        if initial_epoch and weights_path.exists():
+            model.load_weights(weights_path)
+
+        metric = module.EVAL_METRIC
+        early_stopping = keras.callbacks.EarlyStopping(
+            monitor=f'val_{metric}',
+            mode='max' if metric == 'accuracy' else 'min',
+            patience=patience,
+            restore_best_weights=True,
+        )
+        history = model.fit(
+            X_train, y_train,
+            validation_data=(X_val, y_val),
+            epochs=epochs,
+            initial_epoch=initial_epoch,
+            batch_size=config['batch_size'],
+            callbacks=[early_stopping],
+            verbose=0,
+        )
+        model.save_weights(weights_path)
+
+        content = convert_keras_model(model, mode='dynamic')
+        (work_dir / f'trial_{trial:03d}.tflite').write_bytes(content)
+        latency = measure_latency(content, X_val, runs=latency_runs, num_threads=1)
+
+        record.update({
+            'status': 'ok',
+            'epochs_run': len(history.history.get('loss', [])),
+            'stopped_early': bool(early_stopping.stopped_epoch),
+            'val_metric': score_predictions(predict_tflite(content, X_val), y_val, metric),
+            'params': int(model.count_params()),
+            'size_kb': len(content) / 1024,
+            'p50_us': latency['p50_us'],
+            'p95_us': latency['p95_us'],
+        })
+    except Exception as e:  # la prueba queda registrada como fallida
+        record.update({'status': 'error', 'error': repr(e)})
+
+    record['seconds'] = time.perf_counter() - start
+    return record
+
+
+def promote(results: list, metric: str, eta: int) -> list:
+    """
+    Pruebas que pasan al siguiente escalón: la mejor fracción `1/eta` de
+    las que terminaron bien (al menos una), ordenadas de mejor a peor.
+    """
+    ok = sorted((r for r in results if r['status'] == 'ok'),
+                key=lambda r: r['val_metric'], reverse=metric == 'accuracy')
+    keep = max(1, len(ok) // eta)
+    return [r['trial'] for r in ok[:keep]]
+
+
+def select_trial(records: list, metric: str, target: float = None):
+    """
+    Elige una prueba: la más pequeña (luego la más rápida) que cumple
+    `target`, o la de mejor métrica si no hay objetivo.
+    """
+    ok = [r for r in records if r['status'] == 'ok']
+    if target is None:
+        best = None
+        for r in ok:
+            if best is None or is_better(r['val_metric'], best['val_metric'], metric):
+                best = r
+        return best
+
+    passing = [r for r in ok if meets_target(r['val_metric'], target, metric)]
+    if not passing:
+        return None
+    return min(passing, key=lambda r: (r['size_kb'], r['p50_us']))
+
+
+def print_results(records: list, metric: str):
+    """Imprime la tabla de pruebas ordenada por métrica."""
+    ok = sorted((r for r in records if r['status'] == 'ok'),
+                key=lambda r: r['val_metric'], reverse=metric == 'accuracy')
+    print(f"\n   {'#':>3} {'unidades':>9} {'drop':>5} {'lr':>8} {'batch':>5} "
+          f"{'epochs':>6} {metric:>9} {'tamaño':>9} {'p50':>9}")
+    for r in ok:
+        c = r['config']
+        print(f"   {r['trial']:>3} {c['units_1']:>4}/{c['units_2']:<4} {c['dropout']:>5.2f} "
+              f"{c['learning_rate']:>8.1e} {c['batch_size']:>5} {r['epochs_run']:>6} "
+              f"{r['val_metric']:>9.4f} {r['size_kb']:>6.1f} KB {r['p50_us']:>6.1f} µs")
+    failed = [r for r in records if r['status'] != 'ok']
+    for r in failed:
+        print(f"   {r['trial']:>3} error: {r['error']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Búsqueda de hiperparámetros en paralelo con successive halving'
+    )
+    parser.add_argument('model', choices=list(MODELS),
+                        help='Modelo a optimizar')
+    parser.add_argument('--trials', '-n', type=int, default=27,
+                        help='Configuraciones iniciales (default: 27)')
+    parser.add_argument('--eta', type=int, default=3,
+                        help='Factor de reducción por escalón (default: 3)')
+    parser.add_argument('--min-epochs', type=int, default=5,
+                        help='Epochs del primer escalón (default: 5)')
+    parser.add_argument('--max-epochs', type=int, default=45,
+                        help='Epochs del último escalón (default: 45)')
+    parser.add_argument('--patience', type=int, default=5,
+                        help='Paciencia del early stopping (default: 5)')
+    parser.add_argument('--samples', type=int, default=5000,
+                        help='Muestras sintéticas (default: 5000)')
+    parser.add_argument('--seed', type=int, default=42,
+                        help='Semilla de datos y configuraciones (default: 42)')
+    parser.add_argument('--jobs', '-j', type=int, default=None,
+                        help='Pruebas en paralelo (default: núcleos)')
+    parser.add_argument('--threads', type=int, default=None,
+                        help='Hilos de TensorFlow por prueba (default: núcleos / jobs)')
+    parser.add_argument('--latency-runs', type=int, default=500,
+                        help='Invocaciones para medir latencia (default: 500)')
+    parser.add_argument('--target', type=float, default=None,
+                        help='Accuracy mínima o MAE máximo; elige el modelo más pequeño que lo cumpla')
+    parser.add_argument('--work-dir', type=str, default=None,
+                        help='Directorio del registro y los pesos (default: .hparam_search/MODEL)')
+    parser.add_argument('--output', '-o', type=str, default=None,
+                        help='Copiar el .tflite elegido a esta ruta')
+
+    args = parser.parse_args(argv)
+
+    module = importlib.import_module(MODELS[args.model])
+    if not module.TF_AVAILABLE:
+        print("TensorFlow es requerido para la búsqueda de hiperparámetros")
+        return 1
+    metric = module.EVAL_METRIC
+
+    work_dir = Path(args.work_dir) if args.work_dir else DEFAULT_WORK_DIR / args.model
+    work_dir.mkdir(parents=True, exist_ok=True)
+    log = TrialLog(work_dir / 'trials.jsonl')
+
+    search = {
+        'type': 'search', 'model': args.model, 'trials': args.trials, 'eta': args.eta,
+        'min_epochs': args.min_epochs, 'max_epochs': args.max_epochs,
+        'patience': args.patience, 'samples': args.samples, 'seed': args.seed,
+    }
+    if log.header is None:
+        log.append(search)
+    elif {k: log.header.get(k) for k in search} != search:
+        print(f"El registro {log.path} pertenece a otra búsqueda; "
+              f"usa otro --work-dir o bórralo")
+        return 1
+    else:
+        print(f"Retomando búsqueda: {len(log.results)} resultados en {log.path}")
+
+    cpus = os.cpu_count() or 1
+    jobs = args.jobs or cpus
+    threads = args.threads or max(1, cpus // jobs)
+    budgets = rung_epochs(args.min_epochs, args.max_epochs, args.eta)
+
+    print(f"Búsqueda de hiperparámetros: {args.model}")
+    print("=" * 55)
+    print(f"   Pruebas: {args.trials}, eta: {args.eta}, escalones (epochs): {budgets}")
+    print(f"   Procesos: {jobs}, hilos de TF por prueba: {threads}")
+
+    _prepare_data(module, work_dir / 'data', args.samples, args.seed)
+
+    rng = np.random.default_rng(args.seed)
+    configs = [sample_config(rng) for _ in range(args.trials)]
+    alive = list(range(args.trials))
+    start = time.perf_counter()
+
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=context) as pool:
+        for rung, epochs in enumerate(budgets):
+            initial_epoch = budgets[rung - 1] if rung else 0
+            pending = [t for t in alive if log.get(t, rung) is None]
+            print(f"\nEscalón {rung}: {len(alive)} pruebas hasta {epochs} epochs "
+                  f"({len(pending)} pendientes)")
+
+            futures = [
+                pool.submit(_run_trial, args.model, t, rung, configs[t], epochs,
+                            initial_epoch, str(work_dir), threads, args.patience,
+                            args.latency_runs)
+                for t in pending
+            ]
+            for future in as_completed(futures):
+                record = future.result()
+                log.append(record)
+                if record['status'] == 'ok':
+                    print(f"   prueba {record['trial']:>3}: {metric} {record['val_metric']:.4f}, "
+                          f"{record['size_kb']:.1f} KB, {record['seconds']:.1f} s")
+                else:
+                    print(f"   prueba {record['trial']:>3}: error {record['error']}")
+
+            if rung < len(budgets) - 1:
+                alive = promote([log.get(t, rung) for t in alive], metric, args.eta)
+
+    elapsed = time.perf_counter() - start
+    latest = list(log.latest().values())
+
+    print(f"\nResultados (último escalón de cada prueba):")
+    print_results(latest, metric)
+
+    trained_epochs = sum(r.get('epochs_run', 0) for r in log.results.values())
+    print(f"\n   Epochs entrenadas: {trained_epochs} "
+          f"(sin poda: {args.trials * args.max_epochs}), tiempo: {elapsed:.1f} s")
+
+    chosen = select_trial(latest, metric, args.target)
+    if chosen is None:
+        print(f"\nNinguna prueba cumple {metric} {args.target}")
+        return 1
+
+    label = f"más pequeña con {metric} dentro de {args.target}" if args.target is not None \
+        else f"mejor {metric}"
+    print(f"\nPrueba elegida ({label}): #{chosen['trial']}")
+    print(f"   {json.dumps(chosen['config'])}")
+    print(f"   {metric}: {chosen['val_metric']:.4f}, tamaño: {chosen['size_kb']:.1f} KB, "
+          f"p50: {chosen['p50_us']:.1f} µs")
+
+    with open(work_dir / 'best.json', 'w') as f:
+        json.dump(chosen, f, indent=2)
+
+    if args.output:
+        output_path = Path(args.output)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(work_dir / f"trial_{chosen['trial']:03d}.tflite", output_path)
+        print(f"\nModelo guardado en: {output_path}")
+
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
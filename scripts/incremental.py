@@ -0,0 +1,193 @@
+"""
+Estado del reentrenamiento incremental (warm start) de los modelos.
+
+Entre ejecuciones se guarda en un directorio:
+
+- `model.keras`: el último modelo Keras entrenado (con el estado del
+  optimizador), desde el que continúa el siguiente ajuste.
+- `state.json`: la marca de agua (`watermark`, el `timestamp` más nuevo ya
+  entrenado) y contadores de la historia.
+- `replay_X.npy` / `replay_y.npy`: una muestra uniforme acotada de todos
+  los registros vistos (reservoir sampling), que se mezcla con los datos
+  nuevos para que el ajuste no olvide la historia.
+- `holdout_X.npy` / `holdout_y.npy`: un conjunto de prueba fijo que se
+  separa de los registros de la primera ejecución y nunca se entrena. Las
+  ejecuciones siguientes entrenan con todos sus registros nuevos y validan
+  contra este mismo conjunto, así las métricas son comparables entre
+  ejecuciones.
+
+Así el costo de cada reentrenamiento depende de la cantidad de registros
+nuevos más el tamaño fijo de la muestra de repetición, no del total.
+"""
+
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+
+DEFAULT_STATE_DIR = Path(__file__).resolve().parent / '.incremental'
+DEFAULT_REPLAY_SIZE = 20000
+HOLDOUT_FRACTION = 0.2
+MAX_HOLDOUT_SIZE = 5000
+
+_STATE = 'state.json'
+_MODEL = 'model.keras'
+
+
+class ReplayReservoir:
+    """
+    Muestra uniforme de tamaño fijo sobre un flujo de (X, y) (algoritmo R).
+
+    `add` procesa lotes completos con NumPy: la fila t-ésima del flujo
+    reemplaza un elemento al azar con probabilidad capacity / (t + 1).
+    """
+
+    def __init__(self, capacity: int, input_size: int, output_size: int, seed: int = 0):
+        self.capacity = capacity
+        self.X = np.empty((0, input_size), dtype=np.float32)
+        self.y = np.empty((0, output_size), dtype=np.float32)
+        self.seen = 0
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+
+    def __len__(self) -> int:
+        return len(self.X)
+
+    def add(self, X: np.ndarray, y: np.ndarray):
+        """Agrega un lote de registros al flujo."""
+        X = np.asarray(X, dtype=np.float32)
+        y = np.asarray(y, dtype=np.float32)
+
+        free = min(self.capacity - len(self.X), len(X))
+        if free > 0:
+            self.X = np.concatenate([self.X, X[:free]])
+            self.y = np.concatenate([self.y, y[:free]])
+
+        rest = len(X) - free
+        if rest > 0:
+            t = self.seen + free + np.arange(rest)
+            slots = (self.rng.random(rest) * (t + 1)).astype(np.int64)
+            keep = slots < self.capacity
+            # Con posiciones repetidas gana la última, como en el algoritmo secuencial
+            self.X[slots[keep]] = X[free:][keep]
+            self.y[slots[keep]] = y[free:][keep]
+
+        self.seen += len(X)
+
+    def sample(self, n: int) -> tuple:
+        """Retorna hasta `n` filas de la muestra, sin reemplazo."""
+        n = min(n, len(self.X))
+        idx = self.rng.choice(len(self.X), size=n, replace=False)
+        return self.X[idx], self.y[idx]
+
+    def save(self, directory: Path):
+        np.save(directory / 'replay_X.npy', self.X)
+        np.save(directory / 'replay_y.npy', self.y)
+
+    def load(self, directory: Path, seen: int):
+        self.X = np.load(directory / 'replay_X.npy')
+        self.y = np.load(directory / 'replay_y.npy')
+        self.seen = seen
+        # Cada ejecución continúa con un flujo aleatorio distinto
+        self.rng = np.random.default_rng([self.seed, seen])
+
+
+class IncrementalState:
+    """
+    Estado persistente de un modelo entrenado incrementalmente.
+
+    Ejemplo:
+        state = IncrementalState.load(state_dir, INPUT_SIZE, OUTPUT_SIZE)
+        X, y, stats = load_export_arrays(path, ..., since=state.watermark)
+        X, y = state.split_holdout(X, y)
+        ...
+        state.commit(model, X, y, stats['latest_timestamp'])
+    """
+
+    def __init__(self, directory, input_size: int, output_size: int,
+                 replay_size: int = DEFAULT_REPLAY_SIZE, seed: int = 0):
+        self.directory = Path(directory)
+        self.watermark = None
+        self.total_records = 0
+        self.runs = []
+        self.replay = ReplayReservoir(replay_size, input_size, output_size, seed)
+        self.holdout = None
+
+    @classmethod
+    def load(cls, directory, input_size: int, output_size: int,
+             replay_size: int = DEFAULT_REPLAY_SIZE, seed: int = 0):
+        """Carga el estado de `directory` o crea uno vacío si no existe."""
+        state = cls(directory, input_size, output_size, replay_size, seed)
+        path = state.directory / _STATE
+        if not path.exists():
+            return state
+
+        with open(path) as f:
+            data = json.load(f)
+        state.watermark = data.get('watermark')
+        state.total_records = data.get('total_records', 0)
+        state.runs = data.get('runs', [])
+        state.replay.load(state.directory, state.total_records)
+        if (state.directory / 'holdout_X.npy').exists():
+            state.holdout = (np.load(state.directory / 'holdout_X.npy'),
+                             np.load(state.directory / 'holdout_y.npy'))
+        return state
+
+    def split_holdout(self, X_new, y_new, seed: int = 0) -> tuple:
+        """
+        Retorna los registros nuevos que se entrenan en esta ejecución.
+
+        Si todavía no hay conjunto de prueba, toma al azar un
+        `HOLDOUT_FRACTION` de `X_new` (hasta `MAX_HOLDOUT_SIZE` filas) como
+        `holdout` y retorna el resto; si ya existe, retorna todo `X_new`.
+        """
+        if self.holdout is not None:
+            return X_new, y_new
+        n = min(int(len(X_new) * HOLDOUT_FRACTION), MAX_HOLDOUT_SIZE)
+        if n == 0:
+            return X_new, y_new
+        order = np.random.default_rng(seed).permutation(len(X_new))
+        self.holdout = (X_new[order[:n]], y_new[order[:n]])
+        return X_new[order[n:]], y_new[order[n:]]
+
+    @property
+    def model_path(self) -> Path:
+        return self.directory / _MODEL
+
+    def has_checkpoint(self) -> bool:
+        return self.model_path.exists()
+
+    def commit(self, model, X_new, y_new, watermark: str, run_info: dict = None):
+        """
+        Registra un reentrenamiento terminado: guarda el modelo, agrega los
+        registros nuevos a la muestra de repetición y avanza la marca de agua.
+
+        `state.json` se escribe al final y con reemplazo atómico, así que una
+        ejecución interrumpida no avanza la marca de agua.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        model.save(self.model_path)
+
+        self.replay.add(X_new, y_new)
+        self.replay.save(self.directory)
+        if self.holdout is not None:
+            np.save(self.directory / 'holdout_X.npy', self.holdout[0])
+            np.save(self.directory / 'holdout_y.npy', self.holdout[1])
+
+        self.total_records += len(X_new)
+        self.watermark = watermark or self.watermark
+        self.runs.append({'watermark': self.watermark, 'new_records': len(X_new),
+                          **(run_info or {})})
+
+        tmp = self.directory / (_STATE + '.tmp')
+        with open(tmp, 'w') as f:
+            json.dump({
+                'watermark': self.watermark,
+                'total_records': self.total_records,
+                'replay_size': len(self.replay),
+                'holdout_size': 0 if self.holdout is None else len(self.holdout[0]),
+                'runs': self.runs,
+            }, f, indent=2)
+        os.replace(tmp, self.directory / _STATE)
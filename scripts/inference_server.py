@@ -0,0 +1,460 @@
+#!/usr/bin/env python3
+"""
+Servidor HTTP local de inferencia con micro-batching para los cuatro modelos.
+
+Carga `action_predictor`, `critical_time`, `emotion_classifier` y
+`action_recommender` una sola vez. Las peticiones concurrentes a un mismo
+modelo se agrupan en un lote: el lote sale cuando llega a `--max-batch`
+filas o cuando la petición más antigua lleva `--max-wait-ms` esperando.
+Cada lote se evalúa en un pool de hilos con un intérprete por hilo (los
+intérpretes TFLite no son thread-safe), así el event loop nunca se
+bloquea en `invoke()`.
+
+Endpoints:
+    POST /predict/<modelo>   {"inputs": [[...], ...]} o {"input": [...]}
+                             -> {"outputs": [[...], ...]}
+    GET  /metrics            Peticiones, lotes, profundidad de cola y latencia por modelo
+    GET  /health             {"status": "ok", "models": [...]}
+
+Con `--backend numpy` se usan los pesos extraídos con
+`numpy_scoring.py extract` y no hace falta TensorFlow.
+
+Uso:
+    python inference_server.py [--port 8765] [--max-batch 64] [--max-wait-ms 2] [--workers N]
+
+Ejemplo:
+    python inference_server.py --backend numpy --workers 4
+    python benchmark_server.py --concurrency 64 --duration 20
+"""
+
+import argparse
+import asyncio
+import collections
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+from train_all import MODELS, MODELS_DIR
+
+
+BACKENDS = ['tflite', 'numpy']
+DEFAULT_PORT = 8765
+_LATENCY_WINDOW = 10000
+_MAX_BODY_BYTES = 16 * 1024 * 1024
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+            413: 'Payload Too Large', 500: 'Internal Server Error',
+            503: 'Service Unavailable'}
+
+
+class TFLiteBackend:
+    """
+    Evalúa lotes con `tf.lite.Interpreter`, un intérprete por hilo y tamaño de lote.
+
+    Los lotes se rellenan hasta la siguiente potencia de 2, así cada hilo
+    mantiene unos pocos intérpretes ya dimensionados en vez de llamar a
+    `resize_tensor_input` + `allocate_tensors` en cada lote.
+    """
+
+    def __init__(self, contents: dict):
+        self.contents = contents
+        self._local = threading.local()
+
+    def _interpreter(self, name: str, batch: int):
+        from tflite_utils import load_interpreter
+
+        cache = getattr(self._local, 'interpreters', None)
+        if cache is None:
+            cache = self._local.interpreters = {}
+        key = (name, batch)
+        if key not in cache:
+            interpreter = load_interpreter(self.contents[name])
+            detail = interpreter.get_input_details()[0]
+            interpreter.resize_tensor_input(detail['index'], [batch, detail['shape'][1]])
+            interpreter.allocate_tensors()
+            cache[key] = (interpreter, detail, interpreter.get_output_details()[0])
+        return cache[key]
+
+    def predict(self, name: str, X: np.ndarray) -> np.ndarray:
+        from tflite_utils import _dequantize, _quantize
+
+        n = len(X)
+        batch = 1 << (n - 1).bit_length()
+        interpreter, input_detail, output_detail = self._interpreter(name, batch)
+        if batch != n:
+            X = np.concatenate([X, np.zeros((batch - n, X.shape[1]), dtype=np.float32)])
+        interpreter.set_tensor(input_detail['index'], _quantize(X, input_detail))
+        interpreter.invoke()
+        return _dequantize(interpreter.get_tensor(output_detail['index']), output_detail)[:n]
+
+
+class NumpyBackend:
+    """Evalúa lotes con los pesos `.npz` de `numpy_scoring` (sin TensorFlow)."""
+
+    def __init__(self, scorers: dict):
+        self.scorers = scorers
+
+    def predict(self, name: str, X: np.ndarray) -> np.ndarray:
+        return self.scorers[name].forward(X)
+
+
+def load_backend(kind: str, names: list, models_dir=MODELS_DIR, weights_dir=None):
+    """Crea el backend con los modelos `names`; los que no existen se omiten con aviso."""
+    if kind == 'numpy':
+        from numpy_scoring import DEFAULT_WEIGHTS_DIR, weights_path, NumpyMLP
+
+        scorers = {}
+        for name in names:
+            path = weights_path(name, weights_dir or DEFAULT_WEIGHTS_DIR)
+            if path.exists():
+                scorers[name] = NumpyMLP.load(path)
+            else:
+                print(f"   {name}: no existe {path}, se omite")
+        return NumpyBackend(scorers), {n: s.input_size for n, s in scorers.items()}
+
+    contents = {}
+    for name in names:
+        path = Path(models_dir) / f'{name}.tflite'
+        if path.exists():
+            contents[name] = path.read_bytes()
+        else:
+            print(f"   {name}: no existe {path}, se omite")
+
+    from tflite_utils import load_interpreter
+
+    input_sizes = {}
+    for name, content in contents.items():
+        interpreter = load_interpreter(content)
+        input_sizes[name] = int(interpreter.get_input_details()[0]['shape'][1])
+    return TFLiteBackend(contents), input_sizes
+
+
+class ModelStats:
+    """Contadores y ventana de latencias de un modelo."""
+
+    def __init__(self):
+        self.requests = 0
+        self.rows = 0
+        self.batches = 0
+        self.rejected = 0
+        self.max_queue_depth = 0
+        self.latencies_ms = collections.deque(maxlen=_LATENCY_WINDOW)
+        self.batch_sizes = collections.deque(maxlen=_LATENCY_WINDOW)
+        self.inference_ms = collections.deque(maxlen=_LATENCY_WINDOW)
+
+    def snapshot(self, queue_depth: int, in_flight: int) -> dict:
+        latencies = np.asarray(self.latencies_ms) if self.latencies_ms else np.zeros(1)
+        return {
+            'requests': self.requests,
+            'rows': self.rows,
+            'batches': self.batches,
+            'rejected': self.rejected,
+            'queue_depth': queue_depth,
+            'max_queue_depth': self.max_queue_depth,
+            'in_flight_batches': in_flight,
+            'mean_batch_rows': float(np.mean(self.batch_sizes)) if self.batch_sizes else 0.0,
+            'mean_inference_ms': float(np.mean(self.inference_ms)) if self.inference_ms else 0.0,
+            'latency_ms': {
+                'p50': float(np.percentile(latencies, 50)),
+                'p95': float(np.percentile(latencies, 95)),
+                'p99': float(np.percentile(latencies, 99)),
+                'max': float(latencies.max()),
+            },
+        }
+
+
+class MicroBatcher:
+    """
+    Cola de peticiones de un modelo que se evalúa en lotes.
+
+    Ejemplo:
+        batcher = MicroBatcher('critical_time', backend, pool, max_batch=64, max_wait_ms=2)
+        batcher.start()
+        outputs = await batcher.submit(X)
+    """
+
+    def __init__(self, name: str, backend, pool, max_batch: int = 64,
+                 max_wait_ms: float = 2.0, max_queue: int = 10000, max_in_flight: int = 1):
+        self.name = name
+        self.backend = backend
+        self.pool = pool
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.stats = ModelStats()
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._in_flight = 0
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def submit(self, X: np.ndarray) -> np.ndarray:
+        """Encola X (filas, features) y espera sus predicciones."""
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait((X, future, time.perf_counter()))
+        except asyncio.QueueFull:
+            self.stats.rejected += 1
+            raise
+        self.stats.requests += 1
+        self.stats.max_queue_depth = max(self.stats.max_queue_depth, self.queue.qsize())
+        return await future
+
+    async def _collect(self) -> list:
+        """Espera la primera petición y agrega más hasta llenar el lote o agotar la espera."""
+        items = [await self.queue.get()]
+        rows = len(items[0][0])
+        deadline = items[0][2] + self.max_wait
+        while rows < self.max_batch:
+            if self.queue.empty():
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            else:
+                item = self.queue.get_nowait()
+            items.append(item)
+            rows += len(item[0])
+        return items
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            # No se arma el siguiente lote hasta que haya un hilo libre: mientras
+            # tanto la cola sigue creciendo y el lote sale más grande
+            await self._slots.acquire()
+            items = await self._collect()
+            self._in_flight += 1
+            loop.create_task(self._dispatch(loop, items))
+
+    async def _dispatch(self, loop, items: list):
+        X = np.concatenate([x for x, _, _ in items]) if len(items) > 1 else items[0][0]
+        start = time.perf_counter()
+        try:
+            outputs = await loop.run_in_executor(self.pool, self.backend.predict, self.name, X)
+        except Exception as e:
+            for _, future, _ in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self._in_flight -= 1
+            self._slots.release()
+
+        done = time.perf_counter()
+        self.stats.batches += 1
+        self.stats.rows += len(X)
+        self.stats.batch_sizes.append(len(X))
+        self.stats.inference_ms.append((done - start) * 1000)
+
+        offset = 0
+        for x, future, enqueued in items:
+            if not future.done():
+                future.set_result(outputs[offset:offset + len(x)])
+            offset += len(x)
+            self.stats.latencies_ms.append((done - enqueued) * 1000)
+
+    def metrics(self) -> dict:
+        return self.stats.snapshot(self.queue.qsize(), self._in_flight)
+
+
+class InferenceServer:
+    """Servidor HTTP/1.1 mínimo (keep-alive) sobre `asyncio.start_server`."""
+
+    def __init__(self, batchers: dict, input_sizes: dict):
+        self.batchers = batchers
+        self.input_sizes = input_sizes
+        self.started = time.time()
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    await self._send(writer, 413, {'error': 'cabeceras demasiado grandes'}, False)
+                    break
+
+                lines = head.decode('latin-1').split('\r\n')
+                try:
+                    method, target, version = lines[0].split(' ', 2)
+                except ValueError:
+                    await self._send(writer, 400, {'error': 'línea de petición inválida'}, False)
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    if ':' in line:
+                        key, value = line.split(':', 1)
+                        headers[key.strip().lower()] = value.strip()
+
+                try:
+                    length = int(headers.get('content-length', 0) or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    await self._send(writer, 400, {'error': 'Content-Length inválido'}, False)
+                    break
+                if length > _MAX_BODY_BYTES:
+                    await self._send(writer, 413, {'error': 'cuerpo demasiado grande'}, False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+
+                keep_alive = headers.get('connection', '').lower() != 'close' and version == 'HTTP/1.1'
+                status, payload = await self.route(method, target, body)
+                await self._send(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _send(self, writer, status: int, payload: dict, keep_alive: bool):
+        body = json.dumps(payload).encode('utf-8')
+        head = (f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+    async def route(self, method: str, target: str, body: bytes) -> tuple:
+        path = target.split('?', 1)[0]
+        if path == '/health':
+            return 200, {'status': 'ok', 'models': list(self.batchers)}
+        if path == '/metrics':
+            return 200, self.metrics()
+        if not path.startswith('/predict/'):
+            return 404, {'error': f'ruta desconocida: {path}'}
+        if method != 'POST':
+            return 405, {'error': 'usa POST'}
+
+        name = path[len('/predict/'):]
+        if name not in self.batchers:
+            return 404, {'error': f'modelo desconocido: {name}', 'models': list(self.batchers)}
+
+        try:
+            request = json.loads(body)
+            X = np.asarray(request['inputs'] if 'inputs' in request else [request['input']],
+                           dtype=np.float32)
+        except (ValueError, KeyError, TypeError) as e:
+            return 400, {'error': f'JSON inválido: {e}'}
+        if X.ndim != 2 or X.shape[1] != self.input_sizes[name] or len(X) == 0:
+            return 400, {'error': f'se esperaban filas de {self.input_sizes[name]} features, '
+                                  f'se obtuvo la forma {list(X.shape)}'}
+
+        try:
+            outputs = await self.batchers[name].submit(X)
+        except asyncio.QueueFull:
+            return 503, {'error': 'cola llena'}
+        except Exception as e:
+            # Error del backend en el lote (p. ej. del intérprete): solo afecta a esta petición
+            return 500, {'error': f'{type(e).__name__}: {e}'}
+        return 200, {'outputs': outputs.tolist()}
+
+    def metrics(self) -> dict:
+        return {
+            'uptime_s': time.time() - self.started,
+            'models': {name: batcher.metrics() for name, batcher in self.batchers.items()},
+        }
+
+
+async def serve(args):
+    backend, input_sizes = load_backend(args.backend, args.models, args.models_dir,
+                                        args.weights_dir)
+    if not input_sizes:
+        print("No hay modelos para servir")
+        return 1
+
+    pool = ThreadPoolExecutor(max_workers=args.workers, thread_name_prefix='inference')
+    batchers = {
+        name: MicroBatcher(name, backend, pool, max_batch=args.max_batch,
+                           max_wait_ms=args.max_wait_ms, max_queue=args.max_queue,
+                           max_in_flight=args.workers)
+        for name in input_sizes
+    }
+    for batcher in batchers.values():
+        batcher.start()
+
+    server = InferenceServer(batchers, input_sizes)
+    tcp = await asyncio.start_server(server.handle, args.host, args.port, limit=64 * 1024)
+    print(f"   Modelos: {', '.join(input_sizes)} ({args.backend})")
+    print(f"   Lote máximo: {args.max_batch} filas, espera máxima: {args.max_wait_ms} ms, "
+          f"hilos: {args.workers}")
+    print(f"   Escuchando en http://{args.host}:{args.port}")
+
+    try:
+        async with tcp:
+            await tcp.serve_forever()
+    finally:
+        for batcher in batchers.values():
+            await batcher.stop()
+        pool.shutdown(wait=False)
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Servidor local de inferencia con micro-batching'
+    )
+    parser.add_argument('--host', type=str, default='127.0.0.1')
+    parser.add_argument('--port', '-p', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--backend', choices=BACKENDS, default='tflite',
+                        help='tflite (intérprete) o numpy (pesos de numpy_scoring.py)')
+    parser.add_argument('--models', nargs='+', default=list(MODELS), metavar='MODELO',
+                        help='Modelos a servir (default: los cuatro)')
+    parser.add_argument('--models-dir', type=str, default=str(MODELS_DIR))
+    parser.add_argument('--weights-dir', type=str, default=None,
+                        help='Directorio de .npz para --backend numpy')
+    parser.add_argument('--max-batch', type=int, default=64,
+                        help='Filas máximas por lote (default: 64)')
+    parser.add_argument('--max-wait-ms', type=float, default=2.0,
+                        help='Espera máxima para completar un lote (default: 2 ms)')
+    parser.add_argument('--max-queue', type=int, default=10000,
+                        help='Peticiones en cola por modelo antes de responder 503')
+    parser.add_argument('--workers', '-w', type=int, default=os.cpu_count() or 1,
+                        help='Hilos de inferencia (default: núcleos)')
+
+    args = parser.parse_args(argv)
+
+    unknown = [name for name in args.models if name not in MODELS]
+    if unknown:
+        print(f"Modelos desconocidos: {', '.join(unknown)}")
+        return 1
+
+    print("Servidor de inferencia de Tamagotchi")
+    print("=" * 55)
+
+    if args.backend == 'tflite':
+        from training_utils import tensorflow_available
+
+        if not tensorflow_available():
+            print("TensorFlow es requerido para --backend tflite (o usa --backend numpy)")
+            return 1
+
+    try:
+        return asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,393 @@
+#!/usr/bin/env python3
+"""
+Scoring por lotes de los modelos de Tamagotchi con NumPy puro.
+
+Los cuatro modelos son MLPs de capas Dense (ReLU en las ocultas y
+softmax, sigmoid o lineal en la salida, como en cada `create_model`), así
+que una inferencia es una cadena de `X @ W + b`. Este módulo extrae los
+pesos a un `.npz` y evalúa millones de filas con matmuls por lotes, sin
+importar TensorFlow ni pasar fila por fila por `tf.lite.Interpreter`.
+
+Subcomandos:
+    extract  Extrae los pesos de los `.tflite` a `.npz` (requiere TensorFlow)
+    score    Evalúa un archivo `.npy` de features por bloques (solo NumPy)
+    parity   Compara NumPy contra el intérprete TFLite (requiere TensorFlow)
+
+Uso:
+    python numpy_scoring.py extract [MODELO ...] [--models-dir DIR] [--output-dir DIR]
+    python numpy_scoring.py score MODELO --features X.npy --output PRED.npy
+    python numpy_scoring.py parity [MODELO ...]
+
+Ejemplo:
+    python numpy_scoring.py score critical_time --features /data/critical_time_100m/X.npy \\
+        --output /data/critical_time_100m/pred.npy --chunk-size 262144
+"""
+
+import argparse
+import time
+from pathlib import Path
+
+import numpy as np
+
+from train_all import MODELS, MODELS_DIR
+
+
+DEFAULT_WEIGHTS_DIR = Path(__file__).resolve().parent / '.numpy_weights'
+DEFAULT_CHUNK_SIZE = 65536
+ACTIVATIONS = ['relu', 'softmax', 'sigmoid', 'linear']
+
+# Operaciones TFLite que aplican la activación de la capa de salida
+_OUTPUT_OPS = {'SOFTMAX': 'softmax', 'LOGISTIC': 'sigmoid'}
+
+
+def weights_path(name: str, weights_dir=DEFAULT_WEIGHTS_DIR) -> Path:
+    """Ruta del `.npz` de un modelo."""
+    return Path(weights_dir) / f"{name}.npz"
+
+
+def weights_from_keras(model) -> list:
+    """
+    Extrae (kernel, bias, activación) de cada capa Dense de un modelo Keras.
+
+    Las capas Dropout se ignoran: en inferencia son la identidad.
+    """
+    dense = []
+    for layer in model.layers:
+        if layer.__class__.__name__ != 'Dense':
+            continue
+        kernel, bias = layer.get_weights()
+        dense.append((kernel, bias, layer.get_config()['activation']))
+    return dense
+
+
+def _dequantize_constant(interpreter, detail: dict) -> np.ndarray:
+    """Lee un tensor constante del intérprete como float32."""
+    values = interpreter.get_tensor(detail['index'])
+    if values.dtype in (np.float32, np.float16):
+        return values.astype(np.float32)
+
+    params = detail['quantization_parameters']
+    scales = np.asarray(params['scales'], dtype=np.float32)
+    zero_points = np.asarray(params['zero_points'], dtype=np.float32)
+    if scales.size > 1:
+        # Cuantización por canal a lo largo de `quantized_dimension`
+        shape = [1] * values.ndim
+        shape[params['quantized_dimension']] = -1
+        scales = scales.reshape(shape)
+        zero_points = zero_points.reshape(shape)
+    return (values.astype(np.float32) - zero_points) * scales
+
+
+def weights_from_tflite(model_content: bytes) -> list:
+    """
+    Extrae (kernel, bias, activación) de cada FULLY_CONNECTED de un `.tflite`.
+
+    Los pesos cuantizados (modos 'dynamic', 'float16' e 'int8') se
+    decuantizan a float32. TFLite fusiona la ReLU dentro de
+    FULLY_CONNECTED y el intérprete no expone esa opción, así que las
+    capas ocultas se asumen ReLU, como en todos los `create_model`; la
+    activación de salida se deduce de la operación que sigue a la última
+    capa (SOFTMAX o LOGISTIC).
+
+    El grafo de operaciones solo está disponible con el método privado
+    `Interpreter._get_ops_details()` (la API pública lista tensores pero
+    no qué operación los usa); si una versión de TensorFlow lo quita se
+    lanza RuntimeError en vez de un AttributeError a mitad de la lectura.
+    `tests/test_numpy_scoring.py` verifica la paridad con el intérprete.
+    """
+    from tflite_utils import load_interpreter
+
+    interpreter = load_interpreter(model_content)
+    interpreter.allocate_tensors()
+    tensors = {t['index']: t for t in interpreter.get_tensor_details()}
+    get_ops_details = getattr(interpreter, '_get_ops_details', None)
+    if get_ops_details is None:
+        raise RuntimeError("Esta versión de TensorFlow no expone "
+                           "Interpreter._get_ops_details(); extraer los pesos "
+                           "desde el modelo Keras con weights_from_keras")
+    ops = get_ops_details()
+    # En modo 'float16' los pesos pasan por DEQUANTIZE antes de FULLY_CONNECTED
+    dequantized = {op['outputs'][0]: op['inputs'][0] for op in ops
+                   if op['op_name'] == 'DEQUANTIZE'}
+
+    dense = []
+    output_activation = 'linear'
+    for op in ops:
+        if op['op_name'] == 'FULLY_CONNECTED':
+            _, weights_index, bias_index = op['inputs'][:3]
+            weights_index = dequantized.get(weights_index, weights_index)
+            bias_index = dequantized.get(bias_index, bias_index)
+            # TFLite guarda el kernel como (salidas, entradas)
+            kernel = _dequantize_constant(interpreter, tensors[weights_index]).T
+            if bias_index >= 0:
+                bias = _dequantize_constant(interpreter, tensors[bias_index])
+            else:
+                bias = np.zeros(kernel.shape[1], dtype=np.float32)
+            dense.append([kernel, bias, 'relu'])
+        elif op['op_name'] in _OUTPUT_OPS and dense:
+            output_activation = _OUTPUT_OPS[op['op_name']]
+
+    if not dense:
+        raise ValueError("El modelo no tiene capas FULLY_CONNECTED")
+    dense[-1][2] = output_activation
+    return [tuple(layer) for layer in dense]
+
+
+def save_weights(dense: list, path, source: str = ''):
+    """Guarda las capas en un `.npz` (kernel_i, bias_i, activations)."""
+    arrays = {}
+    for i, (kernel, bias, _) in enumerate(dense):
+        arrays[f'kernel_{i}'] = np.asarray(kernel, dtype=np.float32)
+        arrays[f'bias_{i}'] = np.asarray(bias, dtype=np.float32)
+    arrays['activations'] = np.array([activation for _, _, activation in dense])
+    arrays['source'] = np.array(source)
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    np.savez_compressed(path, **arrays)
+
+
+class NumpyMLP:
+    """
+    MLP de capas Dense evaluado con NumPy.
+
+    Ejemplo:
+        mlp = NumpyMLP.load('.numpy_weights/critical_time.npz')
+        predictions = mlp.predict(X)
+    """
+
+    def __init__(self, dense: list):
+        self.layers = []
+        for kernel, bias, activation in dense:
+            if activation not in ACTIVATIONS:
+                raise ValueError(f"Activación no soportada: {activation}")
+            self.layers.append((np.ascontiguousarray(kernel, dtype=np.float32),
+                                np.asarray(bias, dtype=np.float32), activation))
+        self.input_size = self.layers[0][0].shape[0]
+        self.output_size = self.layers[-1][0].shape[1]
+
+    @classmethod
+    def load(cls, path) -> 'NumpyMLP':
+        with np.load(path) as data:
+            activations = [str(a) for a in data['activations']]
+            return cls([(data[f'kernel_{i}'], data[f'bias_{i}'], activation)
+                        for i, activation in enumerate(activations)])
+
+    def forward(self, X: np.ndarray) -> np.ndarray:
+        """Evalúa un bloque de filas (float32, sin copiar si ya lo es)."""
+        h = np.asarray(X, dtype=np.float32)
+        for kernel, bias, activation in self.layers:
+            h = h @ kernel
+            h += bias
+            if activation == 'relu':
+                np.maximum(h, 0, out=h)
+            elif activation == 'softmax':
+                h -= h.max(axis=1, keepdims=True)
+                np.exp(h, out=h)
+                h /= h.sum(axis=1, keepdims=True)
+            elif activation == 'sigmoid':
+                # 0.5 * (1 + tanh(x / 2)) no desborda con |x| grande
+                h *= 0.5
+                np.tanh(h, out=h)
+                h += 1
+                h *= 0.5
+        return h
+
+    def predict(self, X, batch_size: int = DEFAULT_CHUNK_SIZE, out: np.ndarray = None) -> np.ndarray:
+        """
+        Evalúa X por bloques de `batch_size` filas.
+
+        X puede ser un memmap: solo se lee un bloque a la vez. Si se pasa
+        `out` (p. ej. un memmap de salida), los resultados se escriben ahí.
+        """
+        if out is None:
+            out = np.empty((len(X), self.output_size), dtype=np.float32)
+        for start in range(0, len(X), batch_size):
+            stop = min(start + batch_size, len(X))
+            out[start:stop] = self.forward(X[start:stop])
+        return out
+
+
+def load_scorer(model: str, weights_dir=DEFAULT_WEIGHTS_DIR) -> NumpyMLP:
+    """Carga un modelo por nombre (desde `weights_dir`) o por ruta a un `.npz`."""
+    path = Path(model)
+    if model in MODELS:
+        path = weights_path(model, weights_dir)
+    if not path.exists():
+        raise FileNotFoundError(
+            f"No existe {path}; ejecuta primero: python numpy_scoring.py extract {model}")
+    return NumpyMLP.load(path)
+
+
+def score_file(scorer: NumpyMLP, features_path, output_path,
+               chunk_size: int = DEFAULT_CHUNK_SIZE) -> dict:
+    """
+    Evalúa un `.npy` de features memory-mapped y escribe las predicciones en otro `.npy`.
+
+    La memoria usada depende de `chunk_size`, no del tamaño del archivo.
+    """
+    X = np.load(features_path, mmap_mode='r')
+    if X.ndim != 2 or X.shape[1] != scorer.input_size:
+        raise ValueError(f"{features_path}: se esperaban filas de {scorer.input_size} "
+                         f"features, se obtuvo la forma {X.shape}")
+
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    out = np.lib.format.open_memmap(output_path, mode='w+', dtype=np.float32,
+                                    shape=(len(X), scorer.output_size))
+    start = time.perf_counter()
+    scorer.predict(X, batch_size=chunk_size, out=out)
+    out.flush()
+    seconds = time.perf_counter() - start
+    del out
+
+    return {'rows': len(X), 'seconds': seconds,
+            'rows_per_second': len(X) / seconds if seconds > 0 else 0.0}
+
+
+def check_parity(name: str, content: bytes, n_samples: int = 10000, batch_size: int = 1024) -> dict:
+    """
+    Compara las predicciones NumPy contra `tf.lite.Interpreter` sobre las mismas entradas.
+
+    Con pesos float32 las diferencias son de redondeo; en modelos
+    cuantizados el intérprete también cuantiza las activaciones, así que
+    la diferencia es del orden del error de cuantización.
+    """
+    from benchmark_tflite import realistic_inputs
+    from tflite_utils import predict_tflite
+
+    X = realistic_inputs(name, n_samples)
+    scorer = NumpyMLP(weights_from_tflite(content))
+
+    start = time.perf_counter()
+    expected = predict_tflite(content, X, batch_size=batch_size)
+    tflite_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    predictions = scorer.predict(X)
+    numpy_s = time.perf_counter() - start
+
+    error = np.abs(predictions - expected)
+    result = {
+        'max_abs_error': float(error.max()),
+        'mean_abs_error': float(error.mean()),
+        'tflite_s': tflite_s,
+        'numpy_s': numpy_s,
+    }
+    if scorer.layers[-1][2] == 'softmax':
+        result['argmax_agreement'] = float(np.mean(
+            np.argmax(predictions, axis=1) == np.argmax(expected, axis=1)))
+    return result
+
+
+def _selected_models(names: list) -> list:
+    unknown = [name for name in names if name not in MODELS]
+    if unknown:
+        raise SystemExit(f"Modelos desconocidos: {', '.join(unknown)} "
+                         f"(opciones: {', '.join(MODELS)})")
+    return names or list(MODELS)
+
+
+def run_extract(args) -> int:
+    from training_utils import tensorflow_available
+
+    if not tensorflow_available():
+        print("TensorFlow es requerido para leer los .tflite")
+        return 1
+
+    for name in _selected_models(args.models):
+        source = Path(args.models_dir) / f'{name}.tflite'
+        if not source.exists():
+            print(f"   {name}: no existe {source}")
+            continue
+        dense = weights_from_tflite(source.read_bytes())
+        path = weights_path(name, args.output_dir)
+        save_weights(dense, path, source=str(source))
+        shapes = ' → '.join([str(dense[0][0].shape[0])] +
+                            [f"{k.shape[1]}({a})" for k, _, a in dense])
+        print(f"   {name}: {shapes}, {path.stat().st_size / 1024:.1f} KB en {path}")
+    return 0
+
+
+def run_score(args) -> int:
+    try:
+        scorer = load_scorer(args.model, args.weights_dir)
+    except FileNotFoundError as e:
+        print(e)
+        return 1
+    result = score_file(scorer, args.features, args.output, chunk_size=args.chunk_size)
+    print(f"   Filas: {result['rows']:,}")
+    print(f"   Tiempo: {result['seconds']:.2f} s ({result['rows_per_second']:,.0f} filas/s)")
+    print(f"   Predicciones: {args.output}")
+    return 0
+
+
+def run_parity(args) -> int:
+    from training_utils import tensorflow_available
+
+    if not tensorflow_available():
+        print("TensorFlow es requerido para comparar contra el intérprete")
+        return 1
+
+    print(f"   {'Modelo':<20} {'Error máx':>10} {'Error medio':>12} {'Argmax':>8} "
+          f"{'TFLite':>9} {'NumPy':>9}")
+    failed = []
+    for name in _selected_models(args.models):
+        source = Path(args.models_dir) / f'{name}.tflite'
+        if not source.exists():
+            print(f"   {name:<20} no existe {source}")
+            continue
+        r = check_parity(name, source.read_bytes(), n_samples=args.samples)
+        agreement = f"{r['argmax_agreement']:.2%}" if 'argmax_agreement' in r else '-'
+        print(f"   {name:<20} {r['max_abs_error']:>10.2e} {r['mean_abs_error']:>12.2e} "
+              f"{agreement:>8} {r['tflite_s']:>7.3f} s {r['numpy_s']:>7.3f} s")
+        if r['max_abs_error'] > args.atol:
+            failed.append(name)
+
+    if failed:
+        print(f"\nFuera de tolerancia ({args.atol:g}): {', '.join(failed)}")
+        return 1
+    print(f"\nParidad OK (tolerancia {args.atol:g})")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Scoring por lotes de los modelos con NumPy'
+    )
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    extract = subparsers.add_parser('extract', help='Extraer pesos de los .tflite a .npz')
+    extract.add_argument('models', nargs='*', metavar='MODELO',
+                         help='Modelos a extraer (default: todos)')
+    extract.add_argument('--models-dir', type=str, default=str(MODELS_DIR))
+    extract.add_argument('--output-dir', type=str, default=str(DEFAULT_WEIGHTS_DIR))
+
+    score = subparsers.add_parser('score', help='Evaluar un .npy de features por bloques')
+    score.add_argument('model', help='Nombre del modelo o ruta a un .npz')
+    score.add_argument('--features', type=str, required=True,
+                       help='Archivo .npy (N, features) float32, se lee memory-mapped')
+    score.add_argument('--output', '-o', type=str, required=True,
+                       help='Archivo .npy de salida con las predicciones')
+    score.add_argument('--weights-dir', type=str, default=str(DEFAULT_WEIGHTS_DIR))
+    score.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                       help=f'Filas por bloque (default: {DEFAULT_CHUNK_SIZE})')
+
+    parity = subparsers.add_parser('parity', help='Comparar NumPy contra el intérprete TFLite')
+    parity.add_argument('models', nargs='*', metavar='MODELO',
+                        help='Modelos a comparar (default: todos)')
+    parity.add_argument('--models-dir', type=str, default=str(MODELS_DIR))
+    parity.add_argument('--samples', type=int, default=10000)
+    parity.add_argument('--atol', type=float, default=1e-2,
+                        help='Error absoluto máximo permitido (default: 0.01)')
+
+    args = parser.parse_args(argv)
+
+    print(f"Scoring NumPy: {args.command}")
+    print("=" * 55)
+
+    commands = {'extract': run_extract, 'score': run_score, 'parity': run_parity}
+    return commands[args.command](args)
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,186 @@
+"""
+Perfilado por fases de las ejecuciones de entrenamiento.
+
+`PhaseProfiler` mide tiempo de pared, tiempo de CPU y memoria (RSS) de
+cada fase de un `train_*.py` (importar TensorFlow, datos, `fit`,
+evaluación, conversión), guarda el throughput de cada epoch y puede
+trazar la fase de `fit` con cProfile o con el profiler de TensorFlow.
+
+El resumen se imprime al terminar y, con `--profile`, se escribe un
+reporte JSON junto al `.tflite` (`<modelo>.profile.json`) para comparar
+ejecuciones y detectar regresiones.
+"""
+
+import contextlib
+import cProfile
+import io
+import json
+import platform
+import pstats
+import time
+from pathlib import Path
+
+from training_utils import peak_rss_mb
+
+
+TRACE_MODES = ['cprofile', 'tf']
+DEFAULT_TRACE_DIR = Path(__file__).resolve().parent / '.profiles'
+
+
+def current_rss_mb() -> float:
+    """RSS actual del proceso en MB (Linux); 0 si no está disponible."""
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+    except OSError:
+        return 0.0
+    import resource
+    return pages * resource.getpagesize() / (1024 * 1024)
+
+
+def report_path(output_path) -> Path:
+    """Ruta del reporte JSON para un `.tflite` de salida."""
+    output_path = Path(output_path)
+    return output_path.with_name(f"{output_path.stem}.profile.json")
+
+
+class PhaseProfiler:
+    """
+    Registra recursos por fase de una ejecución de entrenamiento.
+
+    `peak_rss_mb` de cada fase es el pico del proceso al terminarla (es
+    monótono): la fase donde sube es la que aumentó la memoria máxima.
+
+    Ejemplo:
+        profiler = PhaseProfiler('critical_time', trace='cprofile')
+        with profiler.phase('data'):
+            X, y = generate_synthetic_data(...)
+        ...
+        profiler.finish('../assets/models/critical_time.tflite')
+    """
+
+    def __init__(self, name: str, trace: str = None, trace_dir=None):
+        if trace is not None and trace not in TRACE_MODES:
+            raise ValueError(f"Modo de traza desconocido: {trace}")
+        self.name = name
+        self.trace = trace
+        self.trace_dir = Path(trace_dir) if trace_dir else None
+        self.phases = []
+        self.epochs = []
+        self.extra = {}
+        self.fit_trace = None
+        self._start = time.perf_counter()
+        self._cpu_start = time.process_time()
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        """Mide el bloque como la fase `name`."""
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        rss = current_rss_mb()
+        try:
+            yield
+        finally:
+            wall_s = time.perf_counter() - wall
+            cpu_s = time.process_time() - cpu
+            self.phases.append({
+                'phase': name,
+                'wall_s': wall_s,
+                'cpu_s': cpu_s,
+                'cpu_utilization': cpu_s / wall_s if wall_s > 0 else 0.0,
+                'rss_start_mb': rss,
+                'rss_end_mb': current_rss_mb(),
+                'peak_rss_mb': peak_rss_mb(),
+            })
+
+    @contextlib.contextmanager
+    def trace_fit(self):
+        """Traza el bloque con cProfile o el profiler de TF si se pidió."""
+        if self.trace is None:
+            yield
+            return
+
+        trace_dir = self.trace_dir or DEFAULT_TRACE_DIR
+        trace_dir.mkdir(parents=True, exist_ok=True)
+
+        if self.trace == 'tf':
+            import tensorflow as tf
+
+            logdir = str(trace_dir / f"{self.name}_tf_trace")
+            tf.profiler.experimental.start(logdir)
+            try:
+                yield
+            finally:
+                tf.profiler.experimental.stop()
+            self.fit_trace = {'mode': 'tf', 'logdir': logdir}
+            return
+
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+
+        stats_path = trace_dir / f"{self.name}_fit.prof"
+        profile.dump_stats(str(stats_path))
+        summary = io.StringIO()
+        pstats.Stats(profile, stream=summary).sort_stats('cumulative').print_stats(25)
+        self.fit_trace = {'mode': 'cprofile', 'stats': str(stats_path),
+                          'top_cumulative': summary.getvalue()}
+
+    def record_epochs(self, epoch_seconds: list, n_train: int, history: dict):
+        """Guarda duración, throughput y métricas de cada epoch de `fit`."""
+        for i, seconds in enumerate(epoch_seconds):
+            entry = {'epoch': i + 1, 'seconds': seconds}
+            if n_train and seconds > 0:
+                entry['samples_per_second'] = n_train / seconds
+            for key, values in history.items():
+                if i < len(values):
+                    entry[key] = float(values[i])
+            self.epochs.append(entry)
+
+    def report(self) -> dict:
+        """Reporte completo como dict serializable a JSON."""
+        from artifact_cache import tensorflow_version
+
+        return {
+            'model': self.name,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'platform': platform.platform(),
+            'python': platform.python_version(),
+            'tensorflow': tensorflow_version(),
+            'total_wall_s': time.perf_counter() - self._start,
+            'total_cpu_s': time.process_time() - self._cpu_start,
+            'peak_rss_mb': peak_rss_mb(),
+            'phases': self.phases,
+            'epochs': self.epochs,
+            'fit_trace': self.fit_trace,
+            **self.extra,
+        }
+
+    def print_summary(self):
+        print(f"\nPerfil por fase:")
+        print(f"   {'Fase':<12} {'Pared':>9} {'CPU':>9} {'RSS fin':>10} {'Pico RSS':>10}")
+        for p in self.phases:
+            print(f"   {p['phase']:<12} {p['wall_s']:>7.2f} s {p['cpu_s']:>7.2f} s "
+                  f"{p['rss_end_mb']:>7.1f} MB {p['peak_rss_mb']:>7.1f} MB")
+        if self.epochs:
+            rates = [e['samples_per_second'] for e in self.epochs if 'samples_per_second' in e]
+            if rates:
+                print(f"   Throughput por epoch: {min(rates):,.0f}–{max(rates):,.0f} muestras/s")
+        if self.fit_trace:
+            print(f"   Traza de fit ({self.fit_trace['mode']}): "
+                  f"{self.fit_trace.get('stats') or self.fit_trace.get('logdir')}")
+
+    def finish(self, output_path=None) -> dict:
+        """Imprime el resumen y, si se indica `output_path`, escribe el JSON junto a él."""
+        self.print_summary()
+        report = self.report()
+        if output_path is not None:
+            path = report_path(output_path)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, 'w') as f:
+                json.dump(report, f, indent=2)
+            print(f"   Reporte: {path}")
+        return report
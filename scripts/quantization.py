@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Comparación de modos de cuantización TFLite y elección automática.
+
+Cada script de entrenamiento acepta `--quantize-budget BUDGET`: después
+de entrenar convierte el modelo Keras con todos los modos de
+`tflite_utils.QUANTIZATION_MODES` (float32, dynamic, float16, int8).
+Cada variante se ejecuta en el intérprete sobre el conjunto reservado y
+se mide tamaño, tiempo de carga (crear el intérprete + `allocate_tensors`),
+latencia p50/p99 de `invoke()` y la degradación de la métrica respecto a
+float32.
+
+Se elige la variante más pequeña cuya degradación relativa no supera el
+presupuesto (a igual tamaño, la más rápida); float32 nunca degrada, así
+que siempre hay una elegible. El modo elegido se registra en
+`quantization.json` junto al .tflite y las ejecuciones siguientes sin
+`--int8`/`--no-quantize` lo usan (forma parte de la clave del almacén de
+artefactos, así que un acierto de train_all no lo deshace).
+
+Este script corre el entrenamiento real de cada modelo con
+`--quantize-budget` y resume la elección.
+
+Uso:
+    python quantization.py [MODELO ...] [--budget 0.01] [--epochs N] [--dry-run]
+
+Ejemplo:
+    python quantization.py critical_time emotion_classifier --budget 0.02 --report quant.json
+"""
+
+import argparse
+import importlib
+import json
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from tflite_utils import (QUANTIZATION_MODES, convert_keras_model, load_interpreter,
+                          measure_latency, predict_tflite, score_predictions)
+from train_all import MODELS, MODELS_DIR
+
+
+CHOICES_FILE = 'quantization.json'
+
+
+def measure_load_time(content: bytes, runs: int = 20) -> float:
+    """Mediana en ms de crear el intérprete y reservar sus tensores."""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        interpreter = load_interpreter(content)
+        interpreter.allocate_tensors()
+        timings.append(time.perf_counter() - start)
+        del interpreter
+    return float(np.median(timings) * 1000)
+
+
+def degradation(value: float, baseline: float, metric: str) -> float:
+    """
+    Empeoramiento relativo de `value` respecto a `baseline` (positivo = peor).
+
+    Para accuracy es la caída relativa; para MAE, el aumento relativo.
+    """
+    change = baseline - value if metric == 'accuracy' else value - baseline
+    return change / abs(baseline) if baseline else change
+
+
+def compare_modes(model, X_train, X_test, y_test, metric: str, modes=QUANTIZATION_MODES,
+                  runs: int = 1000, store=None) -> tuple:
+    """
+    Convierte `model` con cada modo y mide cada variante en el intérprete.
+
+    Returns:
+        tuple: (variants, results) con modo -> bytes y modo -> métricas
+    """
+    variants = {
+        mode: convert_keras_model(model, mode=mode, representative_data=X_train, store=store)
+        for mode in modes
+    }
+
+    results = {}
+    for mode, content in variants.items():
+        predictions = predict_tflite(content, X_test)
+        results[mode] = {
+            'size_kb': len(content) / 1024,
+            'load_ms': measure_load_time(content),
+            metric: score_predictions(predictions, y_test, metric),
+            **measure_latency(content, X_test, runs=runs),
+        }
+
+    baseline = results['float32'][metric] if 'float32' in results \
+        else results[next(iter(results))][metric]
+    for r in results.values():
+        r['degradation'] = degradation(r[metric], baseline, metric)
+    return variants, results
+
+
+def pick_mode(results: dict, budget: float):
+    """Modo más pequeño (luego más rápido) con degradación <= `budget`; None si ninguno."""
+    allowed = [(r['size_kb'], r['p50_us'], mode) for mode, r in results.items()
+               if r['degradation'] <= budget]
+    return min(allowed)[2] if allowed else None
+
+
+def print_modes(results: dict, metric: str, chosen: str = None):
+    print(f"   {'Modo':<8} {'Tamaño':>10} {'Carga':>9} {'p50':>10} {'p99':>10} "
+          f"{metric:>9} {'Degradación':>12}")
+    for mode, r in results.items():
+        mark = '  ← elegido' if mode == chosen else ''
+        print(f"   {mode:<8} {r['size_kb']:>7.2f} KB {r['load_ms']:>6.2f} ms "
+              f"{r['p50_us']:>7.1f} µs {r['p99_us']:>7.1f} µs {r[metric]:>9.4f} "
+              f"{r['degradation']:>+11.2%}{mark}")
+
+
+def load_choices(directory) -> dict:
+    """Modos elegidos por modelo en `directory` ({} si no hay)."""
+    path = Path(directory) / CHOICES_FILE
+    if not path.exists():
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def conversion_mode(name: str, args) -> str:
+    """
+    Modo de conversión de un script de entrenamiento.
+
+    `--int8` y `--no-quantize` mandan; si no, el modo elegido con
+    `--quantize-budget` para `name` (ver `choose_mode`) y por último
+    'dynamic'. Los scripts lo guardan en `args.quantization` antes de
+    calcular la clave del almacén, así que un acierto nunca restaura una
+    variante distinta de la elegida. Con `--quantize-budget` el modo se
+    decide después de entrenar y aquí es None.
+    """
+    if args.quantize_budget is not None:
+        return None
+    if args.int8:
+        return 'int8'
+    if args.no_quantize:
+        return 'float32'
+    return load_choices(Path(args.output).parent).get(name, {}).get('mode', 'dynamic')
+
+
+def choose_mode(name: str, model, X_train, X_test, y_test, metric: str, budget: float,
+                output_path, store=None) -> str:
+    """
+    Compara los modos sobre el modelo entrenado y registra el elegido.
+
+    La tabla y el modo se guardan en `quantization.json` junto a
+    `output_path`; las conversiones quedan en `store`, así que convertir
+    después con el modo elegido no repite el trabajo.
+    """
+    print(f"\nComparando modos de cuantización (presupuesto {budget:.2%})...")
+    _, results = compare_modes(model, X_train, X_test, y_test, metric, store=store)
+    chosen = pick_mode(results, budget) or 'float32'
+    print_modes(results, metric, chosen)
+
+    choices = load_choices(Path(output_path).parent)
+    choices[name] = {
+        'mode': chosen,
+        'budget': budget,
+        'metric': metric,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'modes': results,
+    }
+    with open(Path(output_path).parent / CHOICES_FILE, 'w') as f:
+        json.dump(choices, f, indent=2)
+    return chosen
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Comparar modos de cuantización y elegir uno por modelo'
+    )
+    parser.add_argument('models', nargs='*', metavar='MODELO',
+                        help='Modelos a comparar (default: todos)')
+    parser.add_argument('--budget', type=float, default=0.01,
+                        help='Degradación relativa máxima vs float32 (default: 0.01 = 1%%)')
+    parser.add_argument('--epochs', '-e', type=int, default=None,
+                        help='Epochs (default: los de cada script)')
+    parser.add_argument('--force', action='store_true',
+                        help='Reentrenar aunque el almacén de artefactos tenga el resultado')
+    parser.add_argument('--output-dir', type=str, default=str(MODELS_DIR),
+                        help='Donde escribir el .tflite elegido (default: assets/models)')
+    parser.add_argument('--dry-run', action='store_true',
+                        help='Comparar y elegir sin escribir el modelo')
+    parser.add_argument('--report', type=str, default=None,
+                        help='Archivo JSON con la tabla completa')
+
+    args = parser.parse_args(argv)
+
+    names = args.models or list(MODELS)
+    unknown = [name for name in names if name not in MODELS]
+    if unknown:
+        print(f"Modelos desconocidos: {', '.join(unknown)}")
+        return 1
+
+    print("Comparación de cuantización")
+    print("=" * 55)
+
+    from training_utils import tensorflow_available
+
+    if not tensorflow_available():
+        print("TensorFlow es requerido para convertir los modelos")
+        return 1
+
+    with tempfile.TemporaryDirectory() as tmp:
+        output_dir = Path(tmp if args.dry_run else args.output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        failed = []
+        for name in names:
+            # Mismos argumentos que train_all: una ejecución posterior de
+            # train_all calcula la misma clave y reutiliza esta variante
+            model_argv = ['--output', str(output_dir / f'{name}.tflite'),
+                          '--quantize-budget', str(args.budget)]
+            if args.epochs:
+                model_argv += ['--epochs', str(args.epochs)]
+            if args.force or args.dry_run:
+                model_argv.append('--force')
+            print(f"\n{name}:")
+            module = importlib.import_module(MODELS[name])
+            if module.main(model_argv):
+                failed.append(name)
+
+        choices = load_choices(output_dir)
+        report = {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'budget': args.budget,
+            'models': {name: choices[name] for name in names if name in choices},
+        }
+
+    print(f"\n{'Modelo':<20} {'Elegido':<8}")
+    for name in names:
+        chosen = report['models'].get(name, {}).get('mode', '-')
+        print(f"{name:<20} {chosen:<8}")
+    if args.dry_run:
+        print("\n(--dry-run: no se escribió ningún modelo)")
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nReporte guardado en: {args.report}")
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Generación de datos sintéticos en paralelo y por shards.
+
+Divide `--samples` filas en `--shards` rangos contiguos. Cada shard tiene
+su propio flujo aleatorio, derivado con `SeedSequence(seed).spawn(shards)`,
+y lo genera un proceso del pool que escribe directamente en su rango de
+`X.npy`/`y.npy`, dos archivos `.npy` memory-mapped compartidos. Nada pasa
+por el proceso principal, así que la memoria no depende del tamaño del
+corpus y el tiempo escala con los núcleos.
+
+El resultado es idéntico bit a bit para la misma semilla, número de
+shards y `--chunk-size`, sin importar cuántos procesos (`--jobs`) se usen
+ni en qué orden terminen. Cada bloque de `--chunk-size` filas es una
+llamada al generador, que deriva sus propios streams del flujo del shard,
+así que cambiar el número de shards o el tamaño de bloque cambia los datos.
+
+Los archivos resultantes se leen con `np.load(..., mmap_mode='r')`. Los
+scripts de entrenamiento los usan con `--data-npy DIR --pipeline tfdata`:
+el pipeline lee el memmap por bloques, sin cargar el corpus en memoria.
+
+Uso:
+    python sharded_generation.py MODEL --samples N [--shards N] [--jobs N] [--output-dir DIR]
+
+Ejemplo:
+    python sharded_generation.py critical_time --samples 100000000 --shards 64 \\
+        --output-dir /data/critical_time_100m --checksum
+"""
+
+import argparse
+import hashlib
+import importlib
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import numpy as np
+
+from train_all import MODELS, limit_threads
+
+
+DEFAULT_CHUNK_SIZE = 250_000
+_MANIFEST = 'manifest.json'
+
+
+def shard_bounds(n_samples: int, shards: int) -> list:
+    """Divide [0, n_samples) en `shards` rangos contiguos de tamaño casi igual."""
+    edges = np.linspace(0, n_samples, shards + 1).round().astype(np.int64)
+    return [(int(a), int(b)) for a, b in zip(edges[:-1], edges[1:])]
+
+
+def _write_shard(module_name: str, output_dir: str, start: int, stop: int,
+                 seed_seq: np.random.SeedSequence, chunk_size: int) -> dict:
+    """Genera las filas [start, stop) con su flujo y las escribe en los .npy compartidos."""
+    limit_threads(1)
+    began = time.perf_counter()
+
+    module = importlib.import_module(module_name)
+    rng = np.random.default_rng(seed_seq)
+    X_out = np.load(Path(output_dir) / 'X.npy', mmap_mode='r+')
+    y_out = np.load(Path(output_dir) / 'y.npy', mmap_mode='r+')
+
+    for chunk_start in range(start, stop, chunk_size):
+        chunk_stop = min(chunk_start + chunk_size, stop)
+        X, y = module.generate_synthetic_batch(chunk_stop - chunk_start, rng)
+        X_out[chunk_start:chunk_stop] = X
+        y_out[chunk_start:chunk_stop] = y
+
+    X_out.flush()
+    y_out.flush()
+    del X_out, y_out
+
+    return {'start': start, 'stop': stop, 'seconds': time.perf_counter() - began}
+
+
+def generate_sharded(name: str, n_samples: int, output_dir, seed: int = 42,
+                     shards: int = None, jobs: int = None,
+                     chunk_size: int = DEFAULT_CHUNK_SIZE) -> tuple:
+    """
+    Genera el dataset sintético de `name` por shards en `output_dir`.
+
+    Args:
+        name: Modelo (clave de `train_all.MODELS`)
+        n_samples: Filas totales
+        output_dir: Directorio donde se escriben X.npy, y.npy y el manifiesto
+        seed: Semilla raíz de `SeedSequence`
+        shards: Número de shards (default: núcleos); forma parte de la semilla efectiva
+        jobs: Procesos en paralelo (default: min(shards, núcleos))
+        chunk_size: Filas por llamada al generador dentro de cada shard; como
+                    `shards`, forma parte de la semilla efectiva
+
+    Returns:
+        tuple: (X, y) memory-mapped de solo lectura
+    """
+    cpus = os.cpu_count() or 1
+    shards = shards or cpus
+    jobs = jobs or min(shards, cpus)
+    module_name = MODELS[name]
+    module = importlib.import_module(module_name)
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    (output_dir / _MANIFEST).unlink(missing_ok=True)
+
+    # Reserva los archivos completos; cada worker escribe solo su rango
+    for filename, width in (('X.npy', module.INPUT_SIZE), ('y.npy', module.OUTPUT_SIZE)):
+        out = np.lib.format.open_memmap(output_dir / filename, mode='w+',
+                                        dtype=np.float32, shape=(n_samples, width))
+        del out
+
+    seeds = np.random.SeedSequence(seed).spawn(shards)
+    bounds = shard_bounds(n_samples, shards)
+
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=context) as pool:
+        futures = [
+            pool.submit(_write_shard, module_name, str(output_dir), start, stop,
+                        seeds[i], chunk_size)
+            for i, (start, stop) in enumerate(bounds) if stop > start
+        ]
+        for future in as_completed(futures):
+            future.result()
+
+    # El manifiesto se escribe al final: su existencia marca el dataset como completo
+    with open(output_dir / _MANIFEST, 'w') as f:
+        json.dump({
+            'name': name, 'samples': n_samples, 'seed': seed, 'shards': shards,
+            'chunk_size': chunk_size, 'created': time.time(),
+        }, f, indent=2)
+
+    return (np.load(output_dir / 'X.npy', mmap_mode='r'),
+            np.load(output_dir / 'y.npy', mmap_mode='r'))
+
+
+def load_sharded(directory) -> tuple:
+    """Abre X.npy e y.npy de `generate_sharded` como memmaps de solo lectura."""
+    directory = Path(directory)
+    return (np.load(directory / 'X.npy', mmap_mode='r'),
+            np.load(directory / 'y.npy', mmap_mode='r'))
+
+
+def data_npy_files(parser, args, name: str) -> list:
+    """
+    Valida `--data-npy` de un script de entrenamiento.
+
+    Returns:
+        list: [manifest.json] para `training_key` (identifica el dataset
+              sin hashear X.npy), o [] si no se pidió `--data-npy`
+    """
+    if not args.data_npy:
+        return []
+    if args.pipeline != 'tfdata':
+        parser.error('--data-npy requiere --pipeline tfdata (los .npy no se cargan en memoria)')
+    path = Path(args.data_npy) / _MANIFEST
+    if not path.exists():
+        parser.error(f'{args.data_npy} no tiene {_MANIFEST} (¿generación incompleta?)')
+    with open(path) as f:
+        manifest = json.load(f)
+    if manifest.get('name') != name:
+        parser.error(f"{args.data_npy} es un dataset de {manifest.get('name')}, no de {name}")
+    return [path]
+
+
+def array_checksum(array: np.ndarray, chunk_rows: int = 1_000_000) -> str:
+    """SHA-256 del contenido de un array, leyendo por bloques."""
+    digest = hashlib.sha256()
+    for start in range(0, len(array), chunk_rows):
+        digest.update(np.ascontiguousarray(array[start:start + chunk_rows]).tobytes())
+    return digest.hexdigest()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Generar datos sintéticos por shards en paralelo'
+    )
+    parser.add_argument('model', choices=list(MODELS),
+                        help='Modelo cuyo generador se usa')
+    parser.add_argument('--samples', '-n', type=int, required=True,
+                        help='Filas totales a generar')
+    parser.add_argument('--seed', type=int, default=42,
+                        help='Semilla raíz (default: 42)')
+    parser.add_argument('--shards', type=int, default=None,
+                        help='Número de shards (default: núcleos)')
+    parser.add_argument('--jobs', '-j', type=int, default=None,
+                        help='Procesos en paralelo (default: min(shards, núcleos))')
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                        help=f'Filas por lote dentro de cada shard (default: {DEFAULT_CHUNK_SIZE})')
+    parser.add_argument('--output-dir', '-o', type=str, required=True,
+                        help='Directorio de salida de X.npy / y.npy')
+    parser.add_argument('--checksum', action='store_true',
+                        help='Imprimir el SHA-256 de X e y al terminar')
+
+    args = parser.parse_args(argv)
+
+    print(f"Generación por shards: {args.model}")
+    print("=" * 55)
+
+    start = time.perf_counter()
+    X, y = generate_sharded(args.model, args.samples, args.output_dir, seed=args.seed,
+                            shards=args.shards, jobs=args.jobs, chunk_size=args.chunk_size)
+    elapsed = time.perf_counter() - start
+
+    with open(Path(args.output_dir) / _MANIFEST) as f:
+        manifest = json.load(f)
+
+    size_mb = (X.nbytes + y.nbytes) / 1024 ** 2
+    print(f"   Filas: {len(X):,} en {manifest['shards']} shards")
+    print(f"   Tiempo: {elapsed:.1f} s ({len(X) / elapsed:,.0f} filas/s)")
+    print(f"   Tamaño: {size_mb:,.1f} MB en {args.output_dir}")
+
+    if args.checksum:
+        print(f"   SHA-256 X: {array_checksum(X)}")
+        print(f"   SHA-256 y: {array_checksum(y)}")
+
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
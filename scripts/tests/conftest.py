@@ -0,0 +1,7 @@
+"""Configuración de pytest para los tests de los scripts de entrenamiento."""
+
+import sys
+from pathlib import Path
+
+# Los scripts se importan como módulos sueltos, igual que al ejecutarlos
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
@@ -0,0 +1,41 @@
+import numpy as np
+
+from train_action_predictor import (ACTIONS, generate_synthetic_batch, generate_synthetic_data,
+                                    generate_synthetic_data_loop)
+
+
+def test_misma_semilla_mismos_datos():
+    X, y = generate_synthetic_data(500, seed=1)
+    X_again, y_again = generate_synthetic_data(500, seed=1)
+    X_other, _ = generate_synthetic_data(500, seed=2)
+    np.testing.assert_array_equal(X, X_again)
+    np.testing.assert_array_equal(y, y_again)
+    assert not np.array_equal(X, X_other)
+
+
+def test_formas_y_one_hot():
+    X, y = generate_synthetic_batch(2000, np.random.default_rng(0))
+    assert X.shape == (2000, 15) and y.shape == (2000, len(ACTIONS))
+    assert X.dtype == np.float32 and y.dtype == np.float32
+    assert ((X[:, :10] >= 0) & (X[:, :10] < 1)).all()
+    np.testing.assert_array_equal(y.sum(axis=1), 1)
+    # Última acción: a lo sumo un 1, presente en ~70% de las filas
+    last_action = X[:, 10:]
+    assert set(np.unique(last_action)) <= {0.0, 1.0}
+    assert last_action.sum(axis=1).max() == 1
+    assert abs(last_action.sum() / 2000 - 0.7) < 0.05
+
+
+def test_distribucion_coincide_con_el_bucle():
+    X, y = generate_synthetic_data(20000, seed=5)
+    X_ref, y_ref = generate_synthetic_data_loop(20000)
+    np.testing.assert_allclose(y.mean(axis=0), y_ref.mean(axis=0), atol=0.02)
+
+    # La regla principal: con hambre alta feed es mucho más frecuente
+    feed_share = []
+    for features, labels in ((X, y), (X_ref, y_ref)):
+        hungry = features[:, 0] > 0.7
+        is_feed = labels.argmax(axis=1) == 0
+        assert is_feed[hungry].mean() > 3 * is_feed[~hungry].mean()
+        feed_share.append(is_feed[hungry].mean())
+    assert abs(feed_share[0] - feed_share[1]) < 0.03
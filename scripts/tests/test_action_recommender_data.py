@@ -0,0 +1,65 @@
+import numpy as np
+
+from train_action_recommender import (compute_targets, generate_synthetic_batch,
+                                      generate_synthetic_data)
+
+
+def reference_targets(row) -> list:
+    """Scores y urgencia sin ruido, con las reglas de `generate_synthetic_data_loop`."""
+    hunger, happiness, energy, health, _, bond_level = row[:6]
+    traits = row[11:23]
+    scores = [
+        hunger * 0.7 + (1 - health) * 0.2 + traits[4] * 0.1,
+        (1 - happiness) * 0.5 + traits[0] * 0.3 + energy * 0.2,
+        (1 - health) * 0.6 + (1 - happiness) * 0.2 + 0.2,
+        (1 - energy) * 0.7 + traits[3] * 0.2 + 0.1,
+        happiness * 0.3 + energy * 0.3 + bond_level * 0.2 + traits[0] * 0.2,
+    ]
+    urgency = 0.0
+    if hunger > 0.7:
+        urgency = max(urgency, (hunger - 0.7) / 0.3)
+    if happiness < 0.3:
+        urgency = max(urgency, (0.3 - happiness) / 0.3)
+    if energy < 0.2:
+        urgency = max(urgency, (0.2 - energy) / 0.2)
+    if health < 0.3:
+        urgency = max(urgency, (0.3 - health) / 0.3)
+    return list(np.clip(scores, 0, 1)) + [min(urgency, 1.0)]
+
+
+def test_targets_sin_ruido_coinciden_con_las_reglas():
+    X = np.random.default_rng(0).random((2000, 25)).astype(np.float32)
+    y = compute_targets(X, np.random.default_rng(1), target_noise=False)
+
+    expected = np.array([reference_targets(row.astype(np.float64)) for row in X])
+    np.testing.assert_allclose(y[:, [0, 1, 2, 3, 4, 6]], expected, atol=1e-5)
+    assert ((y[:, 5] >= 0.2) & (y[:, 5] < 0.3)).all()
+
+
+def test_generador_determinista_y_en_rango():
+    X, y = generate_synthetic_data(3000, seed=2)
+    X_again, y_again = generate_synthetic_data(3000, seed=2)
+    np.testing.assert_array_equal(X, X_again)
+    np.testing.assert_array_equal(y, y_again)
+
+    assert X.shape == (3000, 25) and y.shape == (3000, 7)
+    assert X.dtype == np.float32 and y.dtype == np.float32
+    np.testing.assert_allclose(X[:, 7], 1 - X[:, 6])  # reactive_ratio
+    assert y.min() >= 0 and y.max() <= 1
+
+
+def test_bloques_mantienen_formas_y_rangos():
+    X, y = generate_synthetic_data(1000, seed=2, chunk_size=64)
+    assert X.shape == (1000, 25) and y.shape == (1000, 7)
+    assert y.min() >= 0 and y.max() <= 1
+    clean = compute_targets(X, np.random.default_rng(0), target_noise=False)
+    # El ruido de los scores tiene desviación 0.05
+    assert np.abs(y[:, :5] - clean[:, :5]).mean() < 0.06
+
+
+def test_bloques_no_cambian_el_resultado():
+    X, y = generate_synthetic_batch(5000, np.random.default_rng(3))
+    X_chunked, y_chunked = generate_synthetic_batch(5000, np.random.default_rng(3),
+                                                    chunk_size=1000)
+    np.testing.assert_array_equal(X, X_chunked)
+    np.testing.assert_array_equal(y, y_chunked)
@@ -0,0 +1,74 @@
+import argparse
+
+import pytest
+
+from artifact_cache import ArtifactStore, local_sources, training_key
+
+
+@pytest.fixture
+def project(tmp_path):
+    """Script de entrenamiento con un helper local y un archivo de datos."""
+    (tmp_path / 'train_fake.py').write_text(
+        'import json\nfrom helper import f\n\n\ndef main():\n    import lazy\n'
+    )
+    (tmp_path / 'helper.py').write_text('def f():\n    return 1\n')
+    (tmp_path / 'lazy.py').write_text('x = 1\n')
+    (tmp_path / 'other.py').write_text('y = 2\n')
+    (tmp_path / 'data.json').write_text('[]')
+    return tmp_path
+
+
+def args(**overrides):
+    return argparse.Namespace(**{'epochs': 10, 'seed': 42, 'output': 'a.tflite', **overrides})
+
+
+def test_local_sources_sigue_imports_locales_y_diferidos(project):
+    sources = local_sources(project / 'train_fake.py')
+    assert [p.name for p in sources] == ['helper.py', 'lazy.py', 'train_fake.py']
+
+
+def test_training_key_es_estable(project):
+    script = project / 'train_fake.py'
+    key = training_key('fake', script, args(), [project / 'data.json'])
+    assert key == training_key('fake', script, args(), [project / 'data.json'])
+    # Los argumentos que no afectan al modelo no cambian la clave
+    assert key == training_key('fake', script, args(output='b.tflite', force=True),
+                               [project / 'data.json'])
+
+
+def test_training_key_se_invalida(project):
+    script = project / 'train_fake.py'
+    data = [project / 'data.json']
+    key = training_key('fake', script, args(), data)
+
+    assert training_key('other', script, args(), data) != key
+    assert training_key('fake', script, args(epochs=11), data) != key
+    assert training_key('fake', script, args(seed=1), data) != key
+
+    (project / 'data.json').write_text('[{}]')
+    assert training_key('fake', script, args(), data) != key
+    (project / 'data.json').write_text('[]')
+    assert training_key('fake', script, args(), data) == key
+
+    (project / 'lazy.py').write_text('x = 2\n')
+    assert training_key('fake', script, args(), data) != key
+    (project / 'lazy.py').write_text('x = 1\n')
+
+    # Un módulo que el script no importa no participa en la clave
+    (project / 'other.py').write_text('y = 3\n')
+    assert training_key('fake', script, args(), data) == key
+
+
+def test_store_put_get_y_restore(tmp_path):
+    store = ArtifactStore(tmp_path / 'store')
+    assert store.get('train', 'abc') is None
+    assert not store.restore('train', 'abc', tmp_path / 'out.tflite')
+
+    store.put('train', 'abc', b'modelo', {'name': 'fake'})
+    assert store.get('train', 'abc') == b'modelo'
+    assert store.get('convert', 'abc') is None
+
+    output = tmp_path / 'models' / 'out.tflite'
+    assert store.restore('train', 'abc', output)
+    assert output.read_bytes() == b'modelo'
+    assert not list((tmp_path / 'store' / 'train').glob('.*.tmp'))
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from compression import COMPRESSION_MODES, compress_model, pick_variant, tfmot_available
+from training_utils import tensorflow_available
+
+
+def test_pick_variant_elige_la_pareto_mas_pequena_dentro_de_la_tolerancia():
+    results = {
+        'base': {'gzip_kb': 40.0, 'delta': 0.0, 'pareto': True},
+        'prune 50%': {'gzip_kb': 25.0, 'delta': -0.004, 'pareto': True},
+        'prune 75%': {'gzip_kb': 18.0, 'delta': -0.03, 'pareto': True},
+        'cluster 16': {'gzip_kb': 20.0, 'delta': -0.001, 'pareto': False},
+    }
+    assert pick_variant(results, 'accuracy', 0.01) == 'prune 50%'
+    assert pick_variant(results, 'accuracy', 0.05) == 'prune 75%'
+    # En MAE un delta positivo es peor
+    assert pick_variant(results, 'mae', 0.0) == 'prune 75%'
+
+
+@pytest.mark.skipif(not (tensorflow_available() and tfmot_available()),
+                    reason='requiere TensorFlow y tensorflow-model-optimization')
+@pytest.mark.parametrize('mode', COMPRESSION_MODES)
+def test_compress_model_no_modifica_el_modelo_base(mode):
+    from tensorflow import keras
+
+    rng = np.random.default_rng(0)
+    X = rng.random((256, 8), dtype=np.float32)
+    y = np.eye(3, dtype=np.float32)[rng.integers(0, 3, 256)]
+
+    model = keras.Sequential([
+        keras.layers.Input(shape=(8,)),
+        keras.layers.Dense(16, activation='relu', name='hidden'),
+        keras.layers.Dense(3, activation='softmax', name='output'),
+    ])
+    model.compile(optimizer='adam', loss='categorical_crossentropy', metrics=['accuracy'])
+    model.fit(X, y, epochs=1, verbose=0)
+    before = [w.copy() for w in model.get_weights()]
+
+    compressed = compress_model(model, mode, X, y, 'accuracy', sparsity=0.75, clusters=4,
+                                epochs=1)
+
+    for original, current in zip(before, model.get_weights()):
+        np.testing.assert_array_equal(original, current)
+    assert compressed.get_layer('hidden') is not model.get_layer('hidden')
+    assert not np.array_equal(compressed.get_layer('hidden').get_weights()[0], before[0])
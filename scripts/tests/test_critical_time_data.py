@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from train_critical_time import (DECAY_RATES, METRICS, calculate_time_to_critical,
+                                 calculate_time_to_critical_batch, generate_synthetic_batch,
+                                 generate_synthetic_data, generate_synthetic_data_loop)
+
+
+def test_batch_coincide_con_el_calculo_escalar():
+    rng = np.random.default_rng(0)
+    values = rng.uniform(0, 100, (500, 4))
+    decay = np.abs([DECAY_RATES[m] for m in METRICS]) * rng.uniform(0.5, 1.5, (500, 4))
+    activity = rng.random(500)
+
+    batch = calculate_time_to_critical_batch(values, decay, activity)
+    expected = [[calculate_time_to_critical(m, values[i, j], decay[i, j], activity[i])
+                 for j, m in enumerate(METRICS)] for i in range(500)]
+    np.testing.assert_allclose(batch, expected)
+    assert batch.min() >= 0 and batch.max() <= 180
+
+
+@pytest.mark.parametrize('seed', [7, 42])
+def test_generador_vectorizado_coincide_con_el_bucle(seed):
+    X, y = generate_synthetic_data(300, seed=seed)
+    X_ref, y_ref = generate_synthetic_data_loop(300, seed=seed)
+    np.testing.assert_array_equal(X, X_ref)
+    np.testing.assert_array_equal(y, y_ref)
+
+
+def test_sin_ruido_los_features_no_cambian():
+    X, y = generate_synthetic_data(300, seed=7)
+    X_clean, y_clean = generate_synthetic_data(300, seed=7, target_noise=False)
+    np.testing.assert_array_equal(X, X_clean)
+    assert not np.array_equal(y, y_clean)
+    assert y_clean.min() >= 0 and y_clean.max() <= 180
+
+
+def test_bloques_no_cambian_el_resultado():
+    X, y = generate_synthetic_batch(1000, np.random.default_rng(3))
+    X_chunked, y_chunked = generate_synthetic_batch(1000, np.random.default_rng(3),
+                                                    chunk_size=128)
+    np.testing.assert_array_equal(X, X_chunked)
+    np.testing.assert_array_equal(y, y_chunked)
+    assert X.shape == (1000, 20) and y.shape == (1000, 4)
+    assert X.dtype == np.float32 and y.dtype == np.float32
+    assert y.min() >= 0 and y.max() <= 180
@@ -0,0 +1,72 @@
+import json
+
+import numpy as np
+
+from dataset_cache import cache_key, evict, load_or_build
+
+
+def make_builder(seed=0, n=50):
+    calls = []
+
+    def build():
+        calls.append(1)
+        rng = np.random.default_rng(seed)
+        return rng.random((n, 4), dtype=np.float32), rng.random((n, 2), dtype=np.float32)
+
+    return build, calls
+
+
+def test_segunda_carga_sale_de_cache_con_memmap(tmp_path):
+    build, calls = make_builder()
+    X, y = load_or_build('modelo', {'seed': 0}, build, cache_dir=tmp_path)
+    X_cached, y_cached = load_or_build('modelo', {'seed': 0}, build, cache_dir=tmp_path)
+
+    assert len(calls) == 1
+    # La primera carga también devuelve memmaps, no los arrays generados
+    assert isinstance(X, np.memmap) and isinstance(y, np.memmap)
+    assert isinstance(X_cached, np.memmap) and not X_cached.flags.writeable
+    np.testing.assert_array_equal(X_cached, X)
+    np.testing.assert_array_equal(y_cached, y)
+
+
+def test_cambiar_parametros_o_fuentes_invalida_la_cache(tmp_path):
+    source = tmp_path / 'train_fake.py'
+    source.write_text('x = 1\n')
+    cache_dir = tmp_path / 'cache'
+    build, calls = make_builder()
+
+    load_or_build('modelo', {'seed': 0}, build, [source], cache_dir=cache_dir)
+    load_or_build('modelo', {'seed': 1}, build, [source], cache_dir=cache_dir)
+    assert len(calls) == 2
+
+    key = cache_key('modelo', {'seed': 0}, [source])
+    source.write_text('x = 2\n')
+    assert cache_key('modelo', {'seed': 0}, [source]) != key
+    load_or_build('modelo', {'seed': 0}, build, [source], cache_dir=cache_dir)
+    assert len(calls) == 3
+
+
+def test_sin_directorio_no_se_cachea(tmp_path):
+    build, calls = make_builder()
+    load_or_build('modelo', {}, build, cache_dir=None)
+    load_or_build('modelo', {}, build, cache_dir=None)
+    assert len(calls) == 2
+
+
+def test_evict_elimina_primero_lo_menos_usado(tmp_path):
+    entries = []
+    for i in range(3):
+        build, _ = make_builder(seed=i, n=1000)
+        load_or_build('modelo', {'seed': i}, build, cache_dir=tmp_path)
+        entries.append(next(p for p in tmp_path.iterdir() if p not in entries))
+
+    # Hacer que la entrada 0 sea la más reciente
+    for age, entry in zip([3, 1, 2], entries):
+        manifest = json.loads((entry / 'manifest.json').read_text())
+        manifest['last_used'] = age
+        (entry / 'manifest.json').write_text(json.dumps(manifest))
+
+    size = json.loads((entries[0] / 'manifest.json').read_text())['bytes']
+    removed = evict(tmp_path, max_bytes=2 * size)
+    assert removed == [entries[1]]
+    assert sorted(p for p in tmp_path.iterdir()) == sorted([entries[0], entries[2]])
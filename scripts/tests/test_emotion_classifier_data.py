@@ -0,0 +1,49 @@
+import numpy as np
+
+from train_emotion_classifier import (EMOTIONS, determine_emotion, determine_emotion_batch,
+                                      emotion_distribution, generate_synthetic_data,
+                                      generate_synthetic_data_loop, label_emotions,
+                                      label_feature_file)
+
+
+def test_reglas_vectorizadas_coinciden_con_las_escalares():
+    rng = np.random.default_rng(0)
+    # Valores en una rejilla de 0.05 para caer justo en los umbrales
+    metrics = np.round(rng.integers(0, 21, (5000, 6)) * 0.05, 2)
+
+    batch = determine_emotion_batch(*metrics.T)
+    expected = [determine_emotion(*row) for row in metrics]
+    np.testing.assert_array_equal(batch, expected)
+    assert set(np.unique(batch)) == set(range(len(EMOTIONS)))
+
+
+def test_distribucion_favorece_la_emocion_base():
+    base = np.arange(len(EMOTIONS)).repeat(10)
+    probs = emotion_distribution(base, np.random.default_rng(1))
+    np.testing.assert_allclose(probs.sum(axis=1), 1.0)
+    np.testing.assert_array_equal(probs.argmax(axis=1), base)
+
+
+def test_generador_determinista_y_parecido_al_bucle():
+    X, y = generate_synthetic_data(20000, seed=3)
+    X_again, y_again = generate_synthetic_data(20000, seed=3)
+    np.testing.assert_array_equal(X, X_again)
+    np.testing.assert_array_equal(y, y_again)
+    assert X.shape == (20000, 16) and y.shape == (20000, 8)
+    np.testing.assert_array_equal(y.sum(axis=1), 1)
+
+    _, y_ref = generate_synthetic_data_loop(20000)
+    np.testing.assert_allclose(y.mean(axis=0), y_ref.mean(axis=0), atol=0.02)
+
+
+def test_etiquetar_archivo_de_features(tmp_path):
+    X, _ = generate_synthetic_data(100, seed=4)
+    path = tmp_path / 'features.npy'
+    np.save(path, X)
+
+    assert label_feature_file(str(path)) == 0
+    labels = np.load(tmp_path / 'features_labels.npy')
+    np.testing.assert_array_equal(labels, label_emotions(X))
+
+    np.save(path, X[:, :10])
+    assert label_feature_file(str(path)) == 1
@@ -0,0 +1,92 @@
+import json
+
+import numpy as np
+import pytest
+
+from evaluation import (ClassificationMetrics, RegressionMetrics, array_batches,
+                        evaluate_batches, write_report)
+
+
+LABELS = ['a', 'b', 'c', 'd']
+
+
+def random_classification(n=1000, k=4, seed=0):
+    rng = np.random.default_rng(seed)
+    logits = rng.normal(size=(n, k)) * 2
+    probabilities = np.exp(logits) / np.exp(logits).sum(axis=1, keepdims=True)
+    # Etiquetas correlacionadas con la predicción para tener aciertos y errores
+    true = np.where(rng.random(n) < 0.6, probabilities.argmax(axis=1), rng.integers(0, k, n))
+    return probabilities, true
+
+
+def test_clasificacion_por_lotes_coincide_con_el_calculo_directo():
+    probabilities, true = random_classification()
+    metrics = ClassificationMetrics(LABELS, bins=10)
+    for start in range(0, 1000, 137):
+        metrics.update(probabilities[start:start + 137], np.eye(4)[true[start:start + 137]])
+    result = metrics.result()
+
+    predicted = probabilities.argmax(axis=1)
+    assert result['samples'] == 1000
+    assert result['accuracy'] == pytest.approx((predicted == true).mean())
+    assert result['loss'] == pytest.approx(-np.log(probabilities[np.arange(1000), true]).mean())
+
+    confusion = np.zeros((4, 4), dtype=int)
+    for t, p in zip(true, predicted):
+        confusion[t, p] += 1
+    assert result['confusion_matrix'] == confusion.tolist()
+
+    f1 = []
+    for i, label in enumerate(LABELS):
+        tp = np.sum((true == i) & (predicted == i))
+        precision, recall = tp / np.sum(predicted == i), tp / np.sum(true == i)
+        f1.append(2 * precision * recall / (precision + recall))
+        assert result['per_class'][label]['precision'] == pytest.approx(precision)
+        assert result['per_class'][label]['recall'] == pytest.approx(recall)
+        assert result['per_class'][label]['support'] == np.sum(true == i)
+    assert result['macro_f1'] == pytest.approx(np.mean(f1))
+
+    confidence = probabilities.max(axis=1)
+    bins = np.minimum((confidence * 10).astype(int), 9)
+    ece = sum(abs((predicted == true)[bins == b].sum() - confidence[bins == b].sum())
+              for b in range(10)) / 1000
+    assert result['ece'] == pytest.approx(ece)
+    assert sum(c['count'] for c in result['calibration']) == 1000
+
+
+def test_clase_sin_predicciones_no_divide_por_cero():
+    metrics = ClassificationMetrics(LABELS)
+    metrics.update(np.eye(4)[[0, 0, 1]], np.array([0, 2, 1]))
+    result = metrics.result()
+    assert result['per_class']['c'] == {'precision': 0.0, 'recall': 0.0, 'f1': 0.0,
+                                        'support': 1, 'predicted': 0}
+    assert result['accuracy'] == pytest.approx(2 / 3)
+
+
+def test_regresion_por_lotes_coincide_con_el_calculo_directo():
+    rng = np.random.default_rng(1)
+    y_true = rng.uniform(0, 180, (2000, 3))
+    predictions = y_true + rng.normal(0, 5, (2000, 3))
+
+    result = evaluate_batches(lambda X: X, array_batches(predictions, y_true, batch_size=300),
+                              RegressionMetrics(['x', 'y', 'z'], unit='min'))
+    # array_batches pasa X a float32
+    predictions = predictions.astype(np.float32).astype(np.float64)
+    error = predictions - y_true
+    assert result['mae'] == pytest.approx(np.abs(error).mean())
+    assert result['loss'] == pytest.approx(np.square(error).mean())
+    for i, label in enumerate(['x', 'y', 'z']):
+        output = result['per_output'][label]
+        assert output['mae'] == pytest.approx(np.abs(error[:, i]).mean())
+        assert output['pred_std'] == pytest.approx(predictions[:, i].std())
+        assert output['true_mean'] == pytest.approx(y_true[:, i].mean())
+
+
+def test_reporte_json_junto_al_modelo(tmp_path):
+    metrics = RegressionMetrics(['x'])
+    metrics.update(np.array([[1.0], [3.0]]), np.array([[2.0], [2.0]]))
+    path = write_report(metrics.result(), tmp_path / 'modelo.tflite', 'modelo')
+
+    assert path.name == 'modelo.eval.json'
+    report = json.loads(path.read_text())
+    assert report['model'] == 'modelo' and report['mae'] == 1.0
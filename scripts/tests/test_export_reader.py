@@ -0,0 +1,211 @@
+import json
+import time
+
+import numpy as np
+import pytest
+
+from export_reader import (BINARY_MAGIC, BinaryExport, ExportReader, ExportStream,
+                           discover_exports, is_binary_export, load_export_arrays,
+                           write_binary_export)
+
+
+ACTIONS = ['feed', 'play', 'clean', 'rest', 'minigame', 'customize']
+
+
+def make_records(n, seed=0, start='2025-01-01T00:00:00'):
+    rng = np.random.default_rng(seed)
+    base = np.datetime64(start, 's')
+    return [
+        {
+            'features': rng.random(15).round(5).tolist(),
+            'action_taken': ACTIONS[i % len(ACTIONS)],
+            'time_to_critical': [10.0 + i, 20.0, 30.5, 180.0] if i % 4 else None,
+            'resulting_emotion': i % 8 if i % 5 else None,
+            'timestamp': str(base + np.timedelta64(i * 60, 's')) + '+00:00',
+        }
+        for i in range(n)
+    ]
+
+
+def write_json(path, records, **header):
+    with open(path, 'w') as f:
+        json.dump({'version': '1.0', **header, 'record_count': len(records),
+                   'records': records}, f, indent=2)
+    return path
+
+
+def action_index(record):
+    action = record.get('action_taken')
+    return ACTIONS.index(action) if action in ACTIONS else 0
+
+
+@pytest.fixture
+def tz_madrid(monkeypatch):
+    monkeypatch.setenv('TZ', 'Europe/Madrid')
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_binario_ida_y_vuelta_conserva_las_columnas(tmp_path):
+    records = make_records(10)
+    path = tmp_path / 'export.tmlb'
+
+    assert write_binary_export(path, records, {'pet_name': 'Test'}, block_size=4) == 10
+    assert is_binary_export(path)
+    assert path.read_bytes()[:4] == BINARY_MAGIC
+
+    export = BinaryExport(path)
+    columns = export.columns()
+    assert len(export) == 10 and len(export.blocks) == 3
+    assert export.header['pet_name'] == 'Test'
+    np.testing.assert_allclose(columns['features'], [r['features'] for r in records], rtol=1e-6)
+    assert [ACTIONS[a] for a in columns['action']] == [r['action_taken'] for r in records]
+
+    for original, decoded in zip(records, export.records()):
+        assert decoded['time_to_critical'] == original['time_to_critical']
+        assert decoded['resulting_emotion'] == original['resulting_emotion']
+    assert export.to_iso(columns['timestamp_ms'][3]) == '2025-01-01T00:03:00.000+00:00'
+
+
+def test_binario_guarda_instantes_utc_a_ambos_lados_del_cambio_de_horario(tmp_path, tz_madrid):
+    records = make_records(2)
+    records[0]['timestamp'] = '2025-01-15T09:30:00.000'  # CET, UTC+1
+    records[1]['timestamp'] = '2025-07-15T09:30:00.000'  # CEST, UTC+2
+    path = tmp_path / 'export.tmlb'
+    write_binary_export(path, records, {'utc_offset_minutes': 60})
+
+    export = BinaryExport(path)
+    assert 'utc_offset_minutes' not in export.header
+    assert [export.to_iso(ts) for ts in export.columns()['timestamp_ms']] == [
+        '2025-01-15T08:30:00.000+00:00', '2025-07-15T07:30:00.000+00:00']
+
+
+def test_binario_y_json_cargan_los_mismos_arrays(tmp_path):
+    records = make_records(50)
+    json_path = write_json(tmp_path / 'export.json', records)
+    binary_path = tmp_path / 'export.tmlb'
+    write_binary_export(binary_path, ExportReader(str(json_path)).records(), block_size=16)
+
+    X_json, y_json, stats_json = load_export_arrays(str(json_path), 15, action_index)
+    X_bin, y_bin, stats_bin = load_export_arrays(str(binary_path), 15, action_index)
+
+    np.testing.assert_array_equal(X_json, X_bin)
+    np.testing.assert_array_equal(y_json, y_bin)
+    assert stats_json['records'] == stats_bin['records'] == 50
+
+
+def test_binario_rechaza_archivos_truncados_o_ajenos(tmp_path):
+    path = tmp_path / 'export.tmlb'
+    write_binary_export(path, make_records(8))
+    truncated = tmp_path / 'truncated.tmlb'
+    truncated.write_bytes(path.read_bytes()[:-40])
+    other = tmp_path / 'other.tmlb'
+    other.write_bytes(b'{"records": []}         ')
+
+    with pytest.raises(ValueError):
+        BinaryExport(truncated)
+    with pytest.raises(ValueError):
+        BinaryExport(other)
+
+
+def test_lector_en_streaming_coincide_con_json_load(tmp_path):
+    records = make_records(25)
+    path = write_json(tmp_path / 'export.json', records, pet_name='Pío "ñ" \\ 🐣')
+
+    reader = ExportReader(str(path), chunk_chars=7)
+    assert list(reader.records()) == records
+    assert reader.header['pet_name'] == 'Pío "ñ" \\ 🐣'
+    assert reader.header['record_count'] == 25
+
+
+def test_lector_rechaza_json_mal_formado(tmp_path):
+    path = tmp_path / 'export.json'
+    path.write_text('{"records": [{"a": 1} {"a": 2}]}')
+    with pytest.raises(ValueError):
+        list(ExportReader(str(path)).records())
+
+
+def test_arrays_descartan_filas_invalidas_y_crecen_sin_record_count(tmp_path):
+    records = make_records(30)
+    records[3]['features'] = records[3]['features'][:10]
+    path = tmp_path / 'export.json'
+    with open(path, 'w') as f:
+        json.dump({'records': records}, f)
+
+    X, labels, stats = load_export_arrays(str(path), 15, action_index, initial_capacity=2)
+    valid = [r for i, r in enumerate(records) if i != 3]
+    np.testing.assert_array_equal(X, np.array([r['features'] for r in valid], dtype=np.float32))
+    np.testing.assert_array_equal(labels, [action_index(r) for r in valid])
+    assert stats['records'] == 29 and stats['skipped'] == 1
+    assert stats['latest_timestamp'] == records[-1]['timestamp']
+
+
+def test_filtro_since_compara_instantes_utc(tmp_path):
+    records = make_records(10)
+    path = write_json(tmp_path / 'export.json', records)
+
+    # 01:05 en +01:00 son las 00:05 UTC: los registros 0..5 quedan fuera
+    X, _, stats = load_export_arrays(str(path), 15, action_index,
+                                     since='2025-01-01T01:05:00+01:00')
+    assert stats['older'] == 6 and stats['records'] == 4
+    np.testing.assert_array_equal(X[0], np.float32(records[6]['features']))
+
+
+def write_mixed_exports(directory):
+    """Dos JSON, un binario, un JSON roto tras 3 registros y un binario de otra forma."""
+    (directory / 'sub').mkdir(parents=True)
+    first, second = make_records(40, seed=1), make_records(25, seed=2)
+    binary = make_records(30, seed=3)
+    second[4]['features'] = second[4]['features'][:3]
+    second[7]['features'][2] = float('nan')
+    write_json(directory / 'a.json', first)
+    write_json(directory / 'sub' / 'b.json', second)
+    write_binary_export(directory / 'c.tmlb', binary, block_size=8)
+
+    broken = make_records(6, seed=4)
+    parts = json.dumps({'records': broken}).split('}, {')
+    (directory / 'd.json').write_text('}, {'.join(parts[:3]) + '}; {' + '}, {'.join(parts[3:]))
+
+    other = make_records(5, seed=5)
+    for record in other:
+        record['features'] = record['features'][:10]
+    write_binary_export(directory / 'e.tmlb', other)
+
+    expected = first + [r for i, r in enumerate(second) if i not in (4, 7)] + binary + broken[:3]
+    return expected
+
+
+def test_stream_intercala_json_y_binario_y_cuenta_descartes(tmp_path):
+    expected = write_mixed_exports(tmp_path)
+    paths = discover_exports(tmp_path)
+    assert len(paths) == 5
+
+    stream = ExportStream(paths, 15, action_index, block_size=16, cycle_length=3,
+                          chunk_chars=64)
+    blocks = list(stream())
+    X = np.concatenate([b[0] for b in blocks])
+    labels = np.concatenate([b[1] for b in blocks])
+
+    def key(features, label):
+        return tuple(np.float32(features).tolist()) + (int(label),)
+
+    assert sorted(map(key, X, labels)) == \
+        sorted(key(r['features'], action_index(r)) for r in expected)
+    assert stream.stats == {'files': 5, 'bad_files': 1, 'records': len(expected),
+                            'skipped': 2 + 5, 'blocks': len(blocks)}
+    assert all(len(b[0]) <= 16 + 16 // 3 for b in blocks)
+
+
+def test_stream_cada_llamada_es_una_epoch(tmp_path):
+    write_mixed_exports(tmp_path)
+    stream = ExportStream(discover_exports(tmp_path), 15, action_index, block_size=32,
+                          seed=0, target_fn=lambda labels: np.eye(6)[labels])
+
+    epochs = [[b for b in stream()] for _ in range(2)]
+    rows = [np.concatenate([b[0] for b in epoch]) for epoch in epochs]
+    assert len(rows[0]) == len(rows[1]) == stream.stats['records']
+    np.testing.assert_array_equal(np.sort(rows[0], axis=0), np.sort(rows[1], axis=0))
+    y = epochs[0][0][1]
+    assert y.shape[1] == 6 and (y.sum(axis=1) == 1).all()
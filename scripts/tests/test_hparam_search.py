@@ -0,0 +1,68 @@
+import json
+
+import numpy as np
+
+from hparam_search import SEARCH_SPACE, TrialLog, promote, rung_epochs, sample_config, select_trial
+
+
+def record(trial, val_metric, rung=0, status='ok', size_kb=10.0, p50_us=50.0):
+    return {'trial': trial, 'rung': rung, 'status': status, 'val_metric': val_metric,
+            'size_kb': size_kb, 'p50_us': p50_us}
+
+
+def test_rung_epochs_multiplica_por_eta_hasta_el_maximo():
+    assert rung_epochs(5, 45, 3) == [5, 15, 45]
+    assert rung_epochs(5, 50, 3) == [5, 15, 45, 50]
+    assert rung_epochs(10, 10, 3) == [10]
+
+
+def test_sample_config_respeta_el_espacio():
+    rng = np.random.default_rng(0)
+    low, high = SEARCH_SPACE['learning_rate']
+    for _ in range(50):
+        config = sample_config(rng)
+        assert config['units_1'] in SEARCH_SPACE['units_1']
+        assert config['batch_size'] in SEARCH_SPACE['batch_size']
+        assert low <= config['learning_rate'] <= high
+
+
+def test_promote_conserva_la_mejor_fraccion():
+    results = [record(t, v) for t, v in enumerate([0.7, 0.9, 0.8, 0.6, 0.85, 0.5])]
+    results.append(record(6, None, status='error'))
+    assert promote(results, 'accuracy', 3) == [1, 4]
+    # En MAE menor es mejor
+    assert promote(results, 'mae', 3) == [5, 3]
+    # Siempre pasa al menos una prueba
+    assert promote(results[:2], 'accuracy', 3) == [1]
+    assert promote([record(0, None, status='error')], 'accuracy', 3) == []
+
+
+def test_trial_log_se_retoma_desde_disco(tmp_path):
+    path = tmp_path / 'trials.jsonl'
+    log = TrialLog(path)
+    log.append({'type': 'search', 'model': 'fake', 'trials': 3})
+    log.append(record(0, 0.7))
+    log.append(record(1, 0.8))
+    log.append(record(1, 0.9, rung=1))
+
+    resumed = TrialLog(path)
+    assert resumed.header == {'type': 'search', 'model': 'fake', 'trials': 3}
+    assert resumed.get(1, 1)['val_metric'] == 0.9
+    assert resumed.get(2, 0) is None
+    assert {t: r['rung'] for t, r in resumed.latest().items()} == {0: 0, 1: 1}
+    assert len(path.read_text().splitlines()) == 4
+    assert json.loads(path.read_text().splitlines()[0])['type'] == 'search'
+
+
+def test_select_trial_con_y_sin_objetivo():
+    records = [
+        record(0, 0.90, size_kb=40.0),
+        record(1, 0.86, size_kb=12.0, p50_us=80.0),
+        record(2, 0.87, size_kb=12.0, p50_us=40.0),
+        record(3, 0.95, status='error'),
+    ]
+    assert select_trial(records, 'accuracy')['trial'] == 0
+    # La más pequeña que cumple el objetivo; a igual tamaño, la más rápida
+    assert select_trial(records, 'accuracy', target=0.85)['trial'] == 2
+    assert select_trial(records, 'accuracy', target=0.95) is None
+    assert select_trial(records, 'mae')['trial'] == 1
@@ -0,0 +1,91 @@
+import json
+
+import numpy as np
+
+from incremental import HOLDOUT_FRACTION, IncrementalState, ReplayReservoir
+
+
+class FakeModel:
+    def save(self, path):
+        path.write_text('modelo')
+
+
+def stream(n, start=0):
+    ids = np.arange(start, start + n, dtype=np.float32)[:, None]
+    return ids, ids * 2
+
+
+def test_reservorio_se_llena_y_mantiene_la_capacidad():
+    reservoir = ReplayReservoir(100, 1, 1)
+    reservoir.add(*stream(60))
+    assert len(reservoir) == 60
+    reservoir.add(*stream(500, start=60))
+    assert len(reservoir) == 100 and reservoir.seen == 560
+    np.testing.assert_array_equal(reservoir.y, reservoir.X * 2)
+    assert len(np.unique(reservoir.X)) == 100
+
+
+def test_reservorio_por_lotes_es_determinista():
+    whole = ReplayReservoir(50, 1, 1, seed=3)
+    whole.add(*stream(1000))
+
+    batched = ReplayReservoir(50, 1, 1, seed=3)
+    for start in range(0, 1000, 70):
+        batched.add(*stream(min(70, 1000 - start), start=start))
+    np.testing.assert_array_equal(whole.X, batched.X)
+
+
+def test_reservorio_es_una_muestra_uniforme():
+    counts = np.zeros(1000)
+    for seed in range(300):
+        reservoir = ReplayReservoir(100, 1, 1, seed=seed)
+        for start in range(0, 1000, 250):
+            reservoir.add(*stream(250, start=start))
+        counts[reservoir.X[:, 0].astype(int)] += 1
+
+    # Cada registro debería aparecer en ~10% de las muestras
+    inclusion = counts / 300
+    assert abs(inclusion.mean() - 0.1) < 1e-9
+    for part in np.split(inclusion, 4):
+        assert abs(part.mean() - 0.1) < 0.01
+
+
+def test_sample_no_repite_filas():
+    reservoir = ReplayReservoir(100, 1, 1)
+    reservoir.add(*stream(300))
+    X, y = reservoir.sample(80)
+    assert len(np.unique(X)) == 80
+    np.testing.assert_array_equal(y, X * 2)
+    assert len(reservoir.sample(500)[0]) == 100
+
+
+def test_holdout_se_fija_en_la_primera_ejecucion(tmp_path):
+    state = IncrementalState.load(tmp_path, 1, 1, replay_size=50)
+    X, y = stream(100)
+
+    X_train, y_train = state.split_holdout(X, y)
+    X_hold, _ = state.holdout
+    assert len(X_hold) == int(100 * HOLDOUT_FRACTION) and len(X_train) == 80
+    assert not set(X_hold[:, 0]) & set(X_train[:, 0])
+
+    X_more, _ = stream(40, start=100)
+    assert len(state.split_holdout(X_more, X_more * 2)[0]) == 40
+
+
+def test_commit_y_load_conservan_el_estado(tmp_path):
+    state = IncrementalState.load(tmp_path, 1, 1, replay_size=50)
+    X, y = stream(100)
+    X_train, y_train = state.split_holdout(X, y)
+    state.commit(FakeModel(), X_train, y_train, '2025-01-01T00:00:00+00:00',
+                 run_info={'data': 'a.json'})
+    state.commit(FakeModel(), *stream(10, start=100), None)
+
+    loaded = IncrementalState.load(tmp_path, 1, 1, replay_size=50)
+    assert loaded.watermark == '2025-01-01T00:00:00+00:00'
+    assert loaded.total_records == 90 and loaded.has_checkpoint()
+    np.testing.assert_array_equal(loaded.replay.X, state.replay.X)
+    np.testing.assert_array_equal(loaded.holdout[0], state.holdout[0])
+    assert [run['new_records'] for run in loaded.runs] == [80, 10]
+
+    saved = json.loads((tmp_path / 'state.json').read_text())
+    assert saved['holdout_size'] == 20 and saved['replay_size'] == 50
@@ -0,0 +1,173 @@
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from inference_server import InferenceServer, MicroBatcher
+
+
+class RecordingBackend:
+    """Backend de prueba: suma las features de cada fila y registra los lotes."""
+
+    def __init__(self, fail: bool = False):
+        self.batches = []
+        self.fail = fail
+
+    def predict(self, name, X):
+        self.batches.append(len(X))
+        if self.fail:
+            raise RuntimeError('fallo del backend')
+        return X.sum(axis=1, keepdims=True)
+
+
+def run_with_batcher(coroutine_fn, backend, **kwargs):
+    async def main():
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            batcher = MicroBatcher('test', backend, pool, **kwargs)
+            batcher.start()
+            try:
+                return await coroutine_fn(batcher)
+            finally:
+                await batcher.stop()
+    return asyncio.run(main())
+
+
+def test_agrupa_peticiones_concurrentes_y_devuelve_sus_filas():
+    backend = RecordingBackend()
+    requests = [np.full((i % 3 + 1, 4), i, dtype=np.float32) for i in range(20)]
+
+    async def submit_all(batcher):
+        return await asyncio.gather(*(batcher.submit(X) for X in requests)), batcher.stats
+
+    outputs, stats = run_with_batcher(submit_all, backend, max_batch=64, max_wait_ms=50)
+
+    for X, out in zip(requests, outputs):
+        np.testing.assert_array_equal(out, X.sum(axis=1, keepdims=True))
+    assert sum(backend.batches) == sum(len(X) for X in requests)
+    assert len(backend.batches) < len(requests)
+    assert stats.requests == 20 and stats.batches == len(backend.batches)
+
+
+def test_respeta_el_tamaño_maximo_de_lote():
+    backend = RecordingBackend()
+
+    async def submit_all(batcher):
+        return await asyncio.gather(*(batcher.submit(np.ones((1, 2), np.float32))
+                                      for _ in range(30)))
+
+    run_with_batcher(submit_all, backend, max_batch=8, max_wait_ms=50)
+
+    assert max(backend.batches) <= 8
+    assert sum(backend.batches) == 30
+
+
+def test_propaga_el_error_del_backend_a_cada_peticion():
+    async def submit_all(batcher):
+        return await asyncio.gather(*(batcher.submit(np.ones((1, 2), np.float32))
+                                      for _ in range(3)), return_exceptions=True)
+
+    results = run_with_batcher(submit_all, RecordingBackend(fail=True), max_wait_ms=20)
+
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_rechaza_con_la_cola_llena():
+    release = threading.Event()
+
+    class BlockingBackend(RecordingBackend):
+        def predict(self, name, X):
+            release.wait(5)
+            return super().predict(name, X)
+
+    async def overflow(batcher):
+        # El primer lote queda en curso y ocupa el único hilo; el segundo
+        # espera en la cola (capacidad 1) y el tercero se rechaza
+        first = asyncio.ensure_future(batcher.submit(np.ones((1, 2), np.float32)))
+        await asyncio.sleep(0.05)
+        second = asyncio.ensure_future(batcher.submit(np.ones((1, 2), np.float32)))
+        await asyncio.sleep(0)
+        with pytest.raises(asyncio.QueueFull):
+            await batcher.submit(np.ones((1, 2), np.float32))
+        release.set()
+        await asyncio.gather(first, second)
+        return batcher.stats
+
+    stats = run_with_batcher(overflow, BlockingBackend(), max_batch=1, max_queue=1,
+                             max_wait_ms=1)
+
+    assert stats.rejected == 1 and stats.requests == 2
+
+
+async def http_request(port: int, raw: bytes) -> tuple:
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(raw)
+    await writer.drain()
+    head = await reader.readuntil(b'\r\n\r\n')
+    length = int([line for line in head.decode().split('\r\n')
+                  if line.lower().startswith('content-length')][0].split(':')[1])
+    body = json.loads(await reader.readexactly(length))
+    writer.close()
+    return int(head.split(b' ')[1]), body
+
+
+def run_with_server(coroutine_fn, backend=None):
+    async def main():
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            batcher = MicroBatcher('critical_time', backend or RecordingBackend(), pool,
+                                   max_wait_ms=1)
+            batcher.start()
+            server = InferenceServer({'critical_time': batcher}, {'critical_time': 3})
+            tcp = await asyncio.start_server(server.handle, '127.0.0.1', 0)
+            port = tcp.sockets[0].getsockname()[1]
+            try:
+                async with tcp:
+                    return await coroutine_fn(port)
+            finally:
+                await batcher.stop()
+    return asyncio.run(main())
+
+
+def test_predict_por_http():
+    body = json.dumps({'inputs': [[1, 2, 3], [4, 5, 6]]}).encode()
+    raw = (b'POST /predict/critical_time HTTP/1.1\r\nConnection: close\r\n'
+           b'Content-Length: ' + str(len(body)).encode() + b'\r\n\r\n' + body)
+
+    status, payload = run_with_server(lambda port: http_request(port, raw))
+
+    assert status == 200
+    assert np.allclose(payload['outputs'], [[6], [15]])
+
+
+@pytest.mark.parametrize('value', [b'abc', b'-5'])
+def test_content_length_invalido_responde_400(value):
+    raw = b'POST /predict/critical_time HTTP/1.1\r\nContent-Length: ' + value + b'\r\n\r\n'
+
+    status, payload = run_with_server(lambda port: http_request(port, raw))
+
+    assert status == 400
+    assert 'Content-Length' in payload['error']
+
+
+def test_filas_de_otro_tamaño_responden_400():
+    body = json.dumps({'input': [1, 2]}).encode()
+    raw = (b'POST /predict/critical_time HTTP/1.1\r\nConnection: close\r\n'
+           b'Content-Length: ' + str(len(body)).encode() + b'\r\n\r\n' + body)
+
+    status, _ = run_with_server(lambda port: http_request(port, raw))
+
+    assert status == 400
+
+
+def test_error_del_backend_responde_500():
+    body = json.dumps({'input': [1, 2, 3]}).encode()
+    raw = (b'POST /predict/critical_time HTTP/1.1\r\nConnection: close\r\n'
+           b'Content-Length: ' + str(len(body)).encode() + b'\r\n\r\n' + body)
+
+    status, payload = run_with_server(lambda port: http_request(port, raw),
+                                      backend=RecordingBackend(fail=True))
+
+    assert status == 500
+    assert payload['error'] == 'RuntimeError: fallo del backend'
@@ -0,0 +1,108 @@
+import numpy as np
+import pytest
+
+from numpy_scoring import NumpyMLP, save_weights, score_file, weights_path
+from train_all import MODELS, MODELS_DIR
+from training_utils import tensorflow_available
+
+
+def random_dense(sizes, output_activation, seed=0):
+    rng = np.random.default_rng(seed)
+    dense = []
+    for i, (n_in, n_out) in enumerate(zip(sizes[:-1], sizes[1:])):
+        activation = output_activation if i == len(sizes) - 2 else 'relu'
+        dense.append((rng.normal(0, 0.5, (n_in, n_out)).astype(np.float32),
+                      rng.normal(0, 0.1, n_out).astype(np.float32), activation))
+    return dense
+
+
+def reference_forward(dense, X):
+    h = np.asarray(X, dtype=np.float64)
+    for kernel, bias, activation in dense:
+        h = h @ kernel.astype(np.float64) + bias
+        if activation == 'relu':
+            h = np.maximum(h, 0)
+        elif activation == 'softmax':
+            e = np.exp(h - h.max(axis=1, keepdims=True))
+            h = e / e.sum(axis=1, keepdims=True)
+        elif activation == 'sigmoid':
+            h = 1 / (1 + np.exp(-h))
+    return h
+
+
+@pytest.mark.parametrize('activation', ['softmax', 'sigmoid', 'linear'])
+def test_forward_coincide_con_referencia_float64(activation):
+    dense = random_dense([15, 32, 16, 6], activation)
+    X = np.random.default_rng(1).random((500, 15), dtype=np.float32)
+
+    np.testing.assert_allclose(NumpyMLP(dense).forward(X), reference_forward(dense, X),
+                               rtol=1e-5, atol=1e-5)
+
+
+def test_sigmoid_no_desborda_con_entradas_grandes():
+    dense = [(np.array([[1000.0], [-1000.0]], dtype=np.float32),
+              np.zeros(1, dtype=np.float32), 'sigmoid')]
+    out = NumpyMLP(dense).forward(np.array([[1, 0], [0, 1]], dtype=np.float32))
+
+    assert np.isfinite(out).all()
+    np.testing.assert_allclose(out[:, 0], [1.0, 0.0])
+
+
+def test_rechaza_activaciones_desconocidas():
+    dense = random_dense([4, 2], 'tanh')
+    with pytest.raises(ValueError):
+        NumpyMLP(dense)
+
+
+def test_guardar_y_cargar_conserva_las_capas(tmp_path):
+    dense = random_dense([20, 24, 4], 'linear')
+    path = weights_path('critical_time', tmp_path)
+    save_weights(dense, path, source='test')
+    loaded = NumpyMLP.load(path)
+
+    assert [a for _, _, a in loaded.layers] == ['relu', 'linear']
+    X = np.random.default_rng(2).random((50, 20), dtype=np.float32)
+    np.testing.assert_array_equal(loaded.forward(X), NumpyMLP(dense).forward(X))
+
+
+def test_score_file_por_bloques_coincide_con_una_pasada(tmp_path):
+    scorer = NumpyMLP(random_dense([15, 8, 6], 'softmax'))
+    X = np.random.default_rng(3).random((1000, 15), dtype=np.float32)
+    np.save(tmp_path / 'X.npy', X)
+
+    result = score_file(scorer, tmp_path / 'X.npy', tmp_path / 'pred.npy', chunk_size=128)
+
+    assert result['rows'] == 1000
+    np.testing.assert_allclose(np.load(tmp_path / 'pred.npy'), scorer.forward(X), rtol=1e-6)
+
+
+def test_score_file_rechaza_features_de_otro_tamaño(tmp_path):
+    scorer = NumpyMLP(random_dense([15, 6], 'softmax'))
+    np.save(tmp_path / 'X.npy', np.zeros((10, 20), dtype=np.float32))
+
+    with pytest.raises(ValueError):
+        score_file(scorer, tmp_path / 'X.npy', tmp_path / 'pred.npy')
+
+
+@pytest.mark.skipif(not tensorflow_available(), reason='requiere TensorFlow')
+@pytest.mark.parametrize('name', list(MODELS))
+def test_paridad_con_el_interprete(name):
+    from benchmark_tflite import realistic_inputs
+    from numpy_scoring import weights_from_tflite
+    from tflite_utils import predict_tflite
+
+    path = MODELS_DIR / f'{name}.tflite'
+    if not path.exists():
+        pytest.skip(f'no existe {path}')
+    content = path.read_bytes()
+    X = realistic_inputs(name, 2000)
+
+    expected = predict_tflite(content, X)
+    predictions = NumpyMLP(weights_from_tflite(content)).forward(X)
+
+    # Los modelos cuantizados también cuantizan activaciones en el intérprete
+    scale = max(1.0, float(np.abs(expected).max()))
+    assert np.abs(predictions - expected).max() <= 1e-2 * scale
+    if expected.shape[1] > 1 and np.allclose(expected.sum(axis=1), 1, atol=1e-3):
+        agreement = np.mean(np.argmax(predictions, axis=1) == np.argmax(expected, axis=1))
+        assert agreement >= 0.99
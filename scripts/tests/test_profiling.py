@@ -0,0 +1,55 @@
+import json
+
+import pytest
+
+from profiling import PhaseProfiler, report_path
+
+
+def test_fases_epochs_y_reporte_junto_al_modelo(tmp_path, capsys):
+    profiler = PhaseProfiler('fake')
+    with profiler.phase('data'):
+        sum(range(100_000))
+    with profiler.phase('fit'):
+        pass
+    profiler.record_epochs([0.5, 0.25], 1000, {'loss': [0.9, 0.4], 'val_loss': [1.0]})
+    profiler.extra['quantization'] = 'dynamic'
+
+    output = tmp_path / 'models' / 'fake.tflite'
+    report = profiler.finish(output)
+
+    assert [p['phase'] for p in report['phases']] == ['data', 'fit']
+    data = report['phases'][0]
+    assert data['wall_s'] > 0 and data['cpu_s'] >= 0 and data['peak_rss_mb'] > 0
+    assert report['epochs'] == [
+        {'epoch': 1, 'seconds': 0.5, 'samples_per_second': 2000.0, 'loss': 0.9,
+         'val_loss': 1.0},
+        {'epoch': 2, 'seconds': 0.25, 'samples_per_second': 4000.0, 'loss': 0.4},
+    ]
+
+    path = report_path(output)
+    assert path == tmp_path / 'models' / 'fake.profile.json'
+    saved = json.loads(path.read_text())
+    assert saved['model'] == 'fake' and saved['quantization'] == 'dynamic'
+    assert saved['phases'] == report['phases']
+    assert 'Throughput por epoch: 2,000–4,000 muestras/s' in capsys.readouterr().out
+
+
+def test_fase_con_excepcion_se_registra():
+    profiler = PhaseProfiler('fake')
+    with pytest.raises(RuntimeError):
+        with profiler.phase('convert'):
+            raise RuntimeError('fallo')
+    assert [p['phase'] for p in profiler.phases] == ['convert']
+    # Sin output_path no se escribe nada
+    assert profiler.finish()['fit_trace'] is None
+
+
+def test_traza_cprofile_de_fit(tmp_path):
+    profiler = PhaseProfiler('fake', trace='cprofile', trace_dir=tmp_path)
+    with profiler.trace_fit():
+        sorted(range(1000), key=lambda x: -x)
+    assert profiler.fit_trace['mode'] == 'cprofile'
+    assert (tmp_path / 'fake_fit.prof').exists()
+
+    with pytest.raises(ValueError):
+        PhaseProfiler('fake', trace='otro')
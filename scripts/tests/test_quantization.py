@@ -0,0 +1,68 @@
+import argparse
+import json
+
+import pytest
+
+from artifact_cache import training_key
+from quantization import CHOICES_FILE, conversion_mode, degradation, pick_mode
+
+
+def make_args(tmp_path, **kwargs):
+    defaults = {'output': str(tmp_path / 'critical_time.tflite'), 'int8': False,
+                'no_quantize': False, 'quantize_budget': None, 'epochs': 50}
+    return argparse.Namespace(**{**defaults, **kwargs})
+
+
+def write_choice(tmp_path, name, mode):
+    with open(tmp_path / CHOICES_FILE, 'w') as f:
+        json.dump({name: {'mode': mode}}, f)
+
+
+def test_degradacion_segun_metrica():
+    assert degradation(0.9, 1.0, 'accuracy') == pytest.approx(0.1)
+    assert degradation(1.1, 1.0, 'mae') == pytest.approx(0.1)
+    assert degradation(0.9, 1.0, 'mae') == pytest.approx(-0.1)
+
+
+def test_pick_mode_elige_el_mas_pequeno_dentro_del_presupuesto():
+    results = {
+        'float32': {'size_kb': 40.0, 'p50_us': 10.0, 'degradation': 0.0},
+        'dynamic': {'size_kb': 12.0, 'p50_us': 12.0, 'degradation': 0.004},
+        'float16': {'size_kb': 20.0, 'p50_us': 9.0, 'degradation': 0.0},
+        'int8': {'size_kb': 11.0, 'p50_us': 8.0, 'degradation': 0.03},
+    }
+    assert pick_mode(results, 0.01) == 'dynamic'
+    assert pick_mode(results, 0.05) == 'int8'
+    assert pick_mode(results, -1.0) is None
+
+
+def test_conversion_mode_respeta_flags_y_eleccion_registrada(tmp_path):
+    assert conversion_mode('critical_time', make_args(tmp_path)) == 'dynamic'
+
+    write_choice(tmp_path, 'critical_time', 'float16')
+    assert conversion_mode('critical_time', make_args(tmp_path)) == 'float16'
+    assert conversion_mode('emotion_classifier', make_args(tmp_path)) == 'dynamic'
+    assert conversion_mode('critical_time', make_args(tmp_path, int8=True)) == 'int8'
+    assert conversion_mode('critical_time', make_args(tmp_path, no_quantize=True)) == 'float32'
+    assert conversion_mode('critical_time', make_args(tmp_path, quantize_budget=0.01)) is None
+
+
+def test_eleccion_cambia_la_clave_de_una_ejecucion_normal(tmp_path):
+    script = tmp_path / 'train_fake.py'
+    script.write_text('x = 1\n')
+
+    def plain_key():
+        args = make_args(tmp_path)
+        args.quantization = conversion_mode('critical_time', args)
+        return training_key('critical_time', script, args)
+
+    before = plain_key()
+    write_choice(tmp_path, 'critical_time', 'int8')
+    after = plain_key()
+    assert before != after
+
+    # La clave con la que una ejecución con presupuesto guarda su resultado
+    budget_args = make_args(tmp_path, quantize_budget=0.01)
+    budget_args.quantization = 'int8'
+    recorded = argparse.Namespace(**{**vars(budget_args), 'quantize_budget': None})
+    assert training_key('critical_time', script, recorded) == after
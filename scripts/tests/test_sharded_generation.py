@@ -0,0 +1,76 @@
+import argparse
+import json
+
+import numpy as np
+import pytest
+
+import train_critical_time
+from export_reader import discover_exports
+from sharded_generation import array_checksum, data_npy_files, generate_sharded, shard_bounds
+
+
+def test_shards_cubren_el_rango_sin_huecos():
+    bounds = shard_bounds(1003, 4)
+    assert bounds[0][0] == 0 and bounds[-1][1] == 1003
+    assert all(a[1] == b[0] for a, b in zip(bounds, bounds[1:]))
+    assert max(b - a for a, b in bounds) - min(b - a for a, b in bounds) <= 1
+    # Con más shards que filas algunos quedan vacíos
+    assert sum(b - a for a, b in shard_bounds(2, 4)) == 2
+
+
+def test_mismo_resultado_con_cualquier_numero_de_procesos(tmp_path):
+    X1, y1 = generate_sharded('critical_time', 1000, tmp_path / 'a', seed=7, shards=4,
+                              jobs=1, chunk_size=128)
+    X3, y3 = generate_sharded('critical_time', 1000, tmp_path / 'b', seed=7, shards=4,
+                              jobs=3, chunk_size=128)
+    assert array_checksum(X1) == array_checksum(X3)
+    assert array_checksum(y1) == array_checksum(y3)
+
+    manifest = json.loads((tmp_path / 'a' / 'manifest.json').read_text())
+    assert manifest['shards'] == 4 and manifest['samples'] == 1000
+
+
+def test_cada_shard_usa_su_propio_flujo(tmp_path):
+    X, y = generate_sharded('critical_time', 600, tmp_path, seed=7, shards=2, jobs=2,
+                            chunk_size=1000)
+
+    seeds = np.random.SeedSequence(7).spawn(2)
+    for (start, stop), seed_seq in zip(shard_bounds(600, 2), seeds):
+        X_ref, y_ref = train_critical_time.generate_synthetic_batch(
+            stop - start, np.random.default_rng(seed_seq))
+        np.testing.assert_array_equal(X[start:stop], X_ref)
+        np.testing.assert_array_equal(y[start:stop], y_ref)
+
+
+@pytest.mark.parametrize('shards', [2, 3])
+def test_cambiar_shards_cambia_los_datos(tmp_path, shards):
+    X, _ = generate_sharded('critical_time', 300, tmp_path / 'ref', seed=7, shards=1, jobs=1)
+    X_other, _ = generate_sharded('critical_time', 300, tmp_path / 'other', seed=7,
+                                  shards=shards, jobs=1)
+    assert X_other.shape == X.shape
+    assert not np.array_equal(X, X_other)
+
+
+def test_data_npy_valida_el_directorio(tmp_path):
+    generate_sharded('critical_time', 200, tmp_path / 'ok', seed=7, shards=2, jobs=1)
+    parser = argparse.ArgumentParser()
+
+    def files(directory, pipeline='tfdata', name='critical_time'):
+        args = argparse.Namespace(data_npy=str(directory), pipeline=pipeline)
+        return data_npy_files(parser, args, name)
+
+    assert files(tmp_path / 'ok') == [tmp_path / 'ok' / 'manifest.json']
+    for bad in ({'pipeline': 'numpy'}, {'name': 'emotion_classifier'},
+                {'directory': tmp_path / 'missing'}):
+        with pytest.raises(SystemExit):
+            files(**{'directory': tmp_path / 'ok', **bad})
+    assert data_npy_files(parser, argparse.Namespace(data_npy=None), 'critical_time') == []
+
+
+def test_script_de_entrenamiento_lee_el_dataset_por_shards(tmp_path, capsys):
+    X, _ = generate_sharded('critical_time', 300, tmp_path, seed=7, shards=2, jobs=1)
+    assert train_critical_time.main(['--data-npy', str(tmp_path), '--pipeline', 'tfdata',
+                                     '--data-only', '--no-cache']) == 0
+    assert f"X {X.shape}" in capsys.readouterr().out
+    # Los manifiestos no son exportaciones de la app
+    assert discover_exports(tmp_path) == []
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from tf_pipeline import DEFAULT_BLOCK_SIZE, make_datasets, split_blocks
+from training_utils import tensorflow_available
+
+
+@pytest.mark.parametrize('n', [2000, 3000, 8193, 16384, 100_000])
+def test_validacion_respeta_validation_split(n):
+    block_size, train_blocks, val_blocks, n_train, n_val = split_blocks(n, 0.2, seed=1)
+    assert n_train + n_val == n
+    assert abs(n_val / n - 0.2) < 0.01
+    assert not set(train_blocks) & set(val_blocks)
+    assert block_size <= DEFAULT_BLOCK_SIZE
+
+
+def test_bloques_grandes_se_mantienen_con_muchos_datos():
+    block_size, *_ = split_blocks(10_000_000, 0.2)
+    assert block_size == DEFAULT_BLOCK_SIZE
+
+
+def test_sin_validacion_o_sin_datos_suficientes():
+    _, _, val_blocks, n_train, n_val = split_blocks(2000, 0.0)
+    assert len(val_blocks) == 0 and (n_train, n_val) == (2000, 0)
+    # Siempre queda al menos un bloque para entrenar
+    _, _, _, n_train, n_val = split_blocks(1, 0.2)
+    assert (n_train, n_val) == (1, 0)
+
+
+@pytest.mark.skipif(not tensorflow_available(), reason='requiere TensorFlow')
+def test_make_datasets_con_pocas_filas_tiene_validacion():
+    rng = np.random.default_rng(0)
+    X = rng.random((2000, 5), dtype=np.float32)
+    y = rng.random((2000, 2), dtype=np.float32)
+
+    train_ds, val_ds, n_train, n_val = make_datasets(X, y, batch_size=64, seed=3)
+    assert val_ds is not None and n_val == 400
+    assert sum(len(b[0]) for b in val_ds) == n_val
+    assert sum(len(b[0]) for b in train_ds) == n_train
@@ -0,0 +1,144 @@
+"""
+Pipeline de entrada `tf.data` para los scripts de entrenamiento.
+
+Alternativa a pasar arrays completos a `model.fit`: los datos se leen por
+bloques (por ejemplo desde los `.npy` memory-mapped de `dataset_cache`),
+se mezclan con un buffer acotado, se agrupan en batches y se precargan
+mientras el modelo entrena. El ruido de targets puede aplicarse con
+`map_fn` dentro del pipeline, de modo que cada epoch ve ruido nuevo sin
+materializarlo de antemano.
+
+TensorFlow se importa dentro de las funciones para que los modos sin
+entrenamiento no dependan de él.
+"""
+
+import numpy as np
+
+
+DEFAULT_BLOCK_SIZE = 8192
+DEFAULT_SHUFFLE_BUFFER = 10000
+# Bloques mínimos al dividir: con pocos datos los bloques se achican para
+# que la validación se acerque a `validation_split` (error < 1/MIN_BLOCKS)
+MIN_BLOCKS = 100
+
+
+def dataset_from_chunks(chunk_fn, input_size: int, output_size: int,
+                        batch_size: int = 32, shuffle_buffer: int = DEFAULT_SHUFFLE_BUFFER,
+                        seed: int = 42, map_fn=None):
+    """
+    Construye un `tf.data.Dataset` a partir de un generador de bloques.
+
+    Args:
+        chunk_fn: Función sin argumentos que retorna un iterador de
+                  bloques (X, y); se llama de nuevo en cada epoch
+        input_size: Número de features
+        output_size: Número de salidas
+        batch_size: Tamaño de batch
+        shuffle_buffer: Tamaño del buffer de mezcla (0 = sin mezclar)
+        seed: Semilla de la mezcla
+        map_fn: Transformación opcional (X, y) -> (X, y) por batch
+
+    Returns:
+        tf.data.Dataset de batches (X, y) float32
+    """
+    import tensorflow as tf
+
+    def generator():
+        for X_chunk, y_chunk in chunk_fn():
+            yield (np.asarray(X_chunk, dtype=np.float32),
+                   np.asarray(y_chunk, dtype=np.float32))
+
+    ds = tf.data.Dataset.from_generator(
+        generator,
+        output_signature=(
+            tf.TensorSpec(shape=(None, input_size), dtype=tf.float32),
+            tf.TensorSpec(shape=(None, output_size), dtype=tf.float32),
+        ),
+    ).unbatch()
+
+    if shuffle_buffer:
+        ds = ds.shuffle(shuffle_buffer, seed=seed, reshuffle_each_iteration=True)
+
+    ds = ds.batch(batch_size)
+
+    if map_fn is not None:
+        ds = ds.map(map_fn, num_parallel_calls=tf.data.AUTOTUNE)
+
+    return ds.prefetch(tf.data.AUTOTUNE)
+
+
+def array_blocks(X, y, blocks, block_size: int, seed: int = None):
+    """
+    Retorna una función que recorre `blocks` de (X, y) por rebanadas contiguas.
+
+    Si `seed` no es None el orden de los bloques se permuta en cada epoch,
+    lo que combinado con el buffer de mezcla evita depender del orden del
+    archivo sin cargarlo completo en memoria.
+    """
+    rng = np.random.default_rng(seed) if seed is not None else None
+
+    def chunk_fn():
+        order = rng.permutation(blocks) if rng is not None else blocks
+        for block in order:
+            start = int(block) * block_size
+            yield X[start:start + block_size], y[start:start + block_size]
+
+    return chunk_fn
+
+
+def split_blocks(n: int, validation_split: float = 0.2, seed: int = 42,
+                 block_size: int = DEFAULT_BLOCK_SIZE) -> tuple:
+    """
+    Reparte n filas en bloques de entrenamiento y validación al azar.
+
+    `block_size` se reduce si no alcanza para `MIN_BLOCKS` bloques.
+
+    Returns:
+        tuple: (block_size, train_blocks, val_blocks, n_train, n_val)
+    """
+    block_size = max(1, min(block_size, -(-n // MIN_BLOCKS)))
+    n_blocks = max(1, -(-n // block_size))
+    blocks = np.random.default_rng(seed).permutation(n_blocks)
+
+    n_val_blocks = min(int(round(n_blocks * validation_split)), n_blocks - 1)
+    val_blocks = np.sort(blocks[:n_val_blocks])
+    train_blocks = blocks[n_val_blocks:]
+
+    def rows(block_ids):
+        return sum(min(block_size, n - int(b) * block_size) for b in block_ids)
+
+    return block_size, train_blocks, val_blocks, rows(train_blocks), rows(val_blocks)
+
+
+def make_datasets(X, y, batch_size: int = 32, validation_split: float = 0.2,
+                  shuffle_buffer: int = DEFAULT_SHUFFLE_BUFFER, seed: int = 42,
+                  map_fn=None, block_size: int = DEFAULT_BLOCK_SIZE) -> tuple:
+    """
+    Divide (X, y) en datasets de entrenamiento y validación por bloques
+    (ver `split_blocks`).
+
+    A diferencia de `validation_split` de Keras (que toma el último 20%
+    sin mezclar), los bloques de validación se eligen al azar antes de
+    dividir. X e y pueden ser arrays memory-mapped: solo se leen los
+    bloques que se están consumiendo. `map_fn` (el ruido de targets) se
+    aplica solo al entrenamiento.
+
+    Returns:
+        tuple: (train_ds, val_ds, n_train, n_val)
+    """
+    block_size, train_blocks, val_blocks, n_train, n_val = split_blocks(
+        X.shape[0], validation_split, seed, block_size)
+
+    train_ds = dataset_from_chunks(
+        array_blocks(X, y, train_blocks, block_size, seed=seed),
+        X.shape[1], y.shape[1],
+        batch_size=batch_size, shuffle_buffer=shuffle_buffer, seed=seed, map_fn=map_fn,
+    )
+    # Sin `map_fn`: la validación mide sobre los targets limpios, igual que en modo numpy
+    val_ds = dataset_from_chunks(
+        array_blocks(X, y, val_blocks, block_size),
+        X.shape[1], y.shape[1],
+        batch_size=batch_size, shuffle_buffer=0,
+    ) if len(val_blocks) else None
+
+    return train_ds, val_ds, n_train, n_val
@@ -0,0 +1,218 @@
+"""
+Helpers de conversión y evaluación de modelos TensorFlow Lite.
+
+Centraliza los modos de cuantización que usan los `train_*.py`, la
+ejecución por lotes con `tf.lite.Interpreter` (incluyendo modelos con
+entrada/salida int8) y la medición de latencia en CPU.
+
+TensorFlow se importa dentro de las funciones para que importar este
+módulo no tenga costo cuando no se convierte ningún modelo.
+"""
+
+import time
+
+import numpy as np
+
+
+QUANTIZATION_MODES = ['float32', 'dynamic', 'float16', 'int8']
+
+
+def representative_dataset(X, num_samples: int = 500, seed: int = 0):
+    """
+    Generador de datos representativos para calibrar la cuantización INT8.
+
+    Toma `num_samples` filas al azar de los datos de entrenamiento y las
+    entrega de una en una, como espera `TFLiteConverter`.
+    """
+    rng = np.random.default_rng(seed)
+    n = min(num_samples, len(X))
+    indices = np.sort(rng.choice(len(X), size=n, replace=False))
+
+    def generator():
+        for i in indices:
+            yield [np.asarray(X[i:i + 1], dtype=np.float32)]
+
+    return generator
+
+
+def convert_keras_model(model, mode: str = 'dynamic', representative_data=None,
+                        int8_io: bool = False, store=None) -> bytes:
+    """
+    Convierte un modelo Keras a TFLite con el modo de cuantización indicado.
+
+    En modo 'int8' todas las operaciones son enteras; por defecto la
+    entrada y salida siguen siendo float32 (con Quantize/Dequantize en los
+    extremos) porque `MLService` en la app alimenta tensores float32.
+
+    Args:
+        model: Modelo Keras entrenado
+        mode: 'float32' (sin cuantizar), 'dynamic' (pesos int8,
+              `Optimize.DEFAULT`), 'float16' (pesos float16) o 'int8'
+              (entero completo)
+        representative_data: Features de entrenamiento, requeridos para 'int8'
+        int8_io: En modo 'int8', usar también tensores de entrada/salida int8
+        store: `artifact_cache.ArtifactStore` opcional; si ya se convirtió un
+               modelo con los mismos pesos y modo se reutiliza el resultado
+
+    Returns:
+        Bytes del modelo .tflite
+    """
+    import tensorflow as tf
+
+    if mode not in QUANTIZATION_MODES:
+        raise ValueError(f"Modo de cuantización desconocido: {mode}")
+
+    if store is not None:
+        from artifact_cache import conversion_key
+
+        key = conversion_key(model, mode, representative_data, int8_io)
+        cached = store.get('convert', key)
+        if cached is not None:
+            return cached
+        content = convert_keras_model(model, mode, representative_data, int8_io)
+        store.put('convert', key, content, {'mode': mode, 'int8_io': int8_io})
+        return content
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+
+    if mode == 'dynamic':
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    elif mode == 'float16':
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif mode == 'int8':
+        if representative_data is None:
+            raise ValueError("La cuantización INT8 requiere datos representativos")
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = representative_dataset(representative_data)
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        if int8_io:
+            converter.inference_input_type = tf.int8
+            converter.inference_output_type = tf.int8
+
+    return converter.convert()
+
+
+def _quantize(X: np.ndarray, detail: dict) -> np.ndarray:
+    """Cuantiza la entrada si el tensor del intérprete es entero."""
+    dtype = detail['dtype']
+    if dtype == np.float32:
+        return np.asarray(X, dtype=np.float32)
+    scale, zero_point = detail['quantization']
+    info = np.iinfo(dtype)
+    q = np.round(np.asarray(X, dtype=np.float32) / scale + zero_point)
+    return np.clip(q, info.min, info.max).astype(dtype)
+
+
+def _dequantize(values: np.ndarray, detail: dict) -> np.ndarray:
+    """Convierte la salida del intérprete a float32."""
+    if detail['dtype'] == np.float32:
+        return values
+    scale, zero_point = detail['quantization']
+    return (values.astype(np.float32) - zero_point) * scale
+
+
+def load_interpreter(model_content: bytes, num_threads: int = 1):
+    """Crea un `tf.lite.Interpreter` desde bytes .tflite."""
+    import tensorflow as tf
+
+    return tf.lite.Interpreter(model_content=model_content, num_threads=num_threads)
+
+
+def predict_tflite(model_content: bytes, X, batch_size: int = 1024,
+                   num_threads: int = 1) -> np.ndarray:
+    """
+    Ejecuta un modelo .tflite sobre X por lotes y retorna salidas float32.
+
+    Soporta modelos con entrada/salida int8 (cuantiza y decuantiza usando
+    los parámetros de cada tensor).
+    """
+    interpreter = load_interpreter(model_content, num_threads=num_threads)
+    input_detail = interpreter.get_input_details()[0]
+    output_detail = interpreter.get_output_details()[0]
+
+    outputs = []
+    current_batch = None
+    for start in range(0, len(X), batch_size):
+        batch = X[start:start + batch_size]
+        if len(batch) != current_batch:
+            interpreter.resize_tensor_input(input_detail['index'], [len(batch), X.shape[1]])
+            interpreter.allocate_tensors()
+            current_batch = len(batch)
+        interpreter.set_tensor(input_detail['index'], _quantize(batch, input_detail))
+        interpreter.invoke()
+        outputs.append(_dequantize(interpreter.get_tensor(output_detail['index']), output_detail))
+
+    return np.concatenate(outputs)
+
+
+def measure_latency(model_content: bytes, X, runs: int = 1000, warmup: int = 50,
+                    num_threads: int = 1) -> dict:
+    """
+    Mide la latencia de `invoke()` con una muestra por llamada.
+
+    Returns:
+        dict con p50/p95/p99 y media en microsegundos
+    """
+    interpreter = load_interpreter(model_content, num_threads=num_threads)
+    interpreter.allocate_tensors()
+    input_detail = interpreter.get_input_details()[0]
+
+    samples = _quantize(np.asarray(X[:max(1, min(len(X), runs))]), input_detail)
+    timings = np.empty(runs)
+
+    for i in range(warmup + runs):
+        interpreter.set_tensor(input_detail['index'], samples[i % len(samples)][None, :])
+        start = time.perf_counter()
+        interpreter.invoke()
+        if i >= warmup:
+            timings[i - warmup] = time.perf_counter() - start
+
+    timings *= 1e6
+    return {
+        'mean_us': float(timings.mean()),
+        'p50_us': float(np.percentile(timings, 50)),
+        'p95_us': float(np.percentile(timings, 95)),
+        'p99_us': float(np.percentile(timings, 99)),
+    }
+
+
+def score_predictions(predictions: np.ndarray, y_true: np.ndarray, metric: str) -> float:
+    """Calcula 'accuracy' (clasificación one-hot) o 'mae' (regresión)."""
+    if metric == 'accuracy':
+        return float(np.mean(np.argmax(predictions, axis=1) == np.argmax(y_true, axis=1)))
+    if metric == 'mae':
+        return float(np.mean(np.abs(predictions - y_true)))
+    raise ValueError(f"Métrica desconocida: {metric}")
+
+
+def compare_with_float(model, quantized: bytes, X_test, y_test, metric: str) -> dict:
+    """
+    Compara un modelo cuantizado contra la conversión float32 del mismo modelo.
+
+    Imprime tamaño, latencia p50 en CPU y la métrica de ambos, más la
+    diferencia de la métrica.
+
+    Returns:
+        dict con los resultados de 'float32', 'quantized' y 'delta'
+    """
+    baseline = convert_keras_model(model, mode='float32')
+
+    results = {}
+    for name, content in (('float32', baseline), ('quantized', quantized)):
+        predictions = predict_tflite(content, X_test)
+        results[name] = {
+            'size_kb': len(content) / 1024,
+            metric: score_predictions(predictions, y_test, metric),
+            **measure_latency(content, X_test),
+        }
+    results['delta'] = results['quantized'][metric] - results['float32'][metric]
+
+    print(f"\nComparación contra float32:")
+    print(f"   {'Modelo':<10} {'Tamaño':>10} {'p50':>10} {metric:>10}")
+    for name in ('float32', 'quantized'):
+        r = results[name]
+        print(f"   {name:<10} {r['size_kb']:>7.2f} KB {r['p50_us']:>7.1f} µs {r[metric]:>10.4f}")
+    print(f"   Δ {metric}: {results['delta']:+.4f}")
+
+    return results
@@ -34,43 +34,80 @@ Uso:
 
 Ejemplo:
     python train_action_predictor.py --data ml_training_data.json --epochs 100
+
+Reentrenamiento incremental con una exportación nueva (parte del último
+modelo y solo entrena registros posteriores a la marca de agua):
+    python train_action_predictor.py --data ml_training_data.json --incremental
+
+Entrenamiento en streaming sobre un directorio de exportaciones:
+    python train_action_predictor.py --data-dir exports/ --epochs 10
 """
 
 import argparse
-import json
 import numpy as np
 import os
 from pathlib import Path
 
-# Verificar disponibilidad de TensorFlow
-try:
-    import tensorflow as tf
-    from tensorflow import keras
-    from tensorflow.keras import layers
-    TF_AVAILABLE = True
-except ImportError:
-    TF_AVAILABLE = False
-    print("⚠️  TensorFlow no está instalado. Instálalo con: pip install tensorflow")
+from artifact_cache import (DEFAULT_STORE_DIR, ArtifactStore, local_sources,
+                            skipped_run_outputs, training_key)
+from compression import COMPRESSION_MODES, compare_compressed, compress_model, tfmot_available
+from dataset_cache import DEFAULT_CACHE_DIR, load_or_build
+from evaluation import (ClassificationMetrics, evaluate_batches, evaluate_keras, print_report,
+                        write_report)
+from export_reader import ExportStream, discover_exports, load_export_arrays
+from incremental import DEFAULT_REPLAY_SIZE, DEFAULT_STATE_DIR, IncrementalState
+from profiling import TRACE_MODES, PhaseProfiler
+from quantization import choose_mode, conversion_mode
+from sharded_generation import data_npy_files, load_sharded
+from tflite_utils import compare_with_float, convert_keras_model
+from training_utils import (fit_datasets, fit_model, import_tensorflow, one_hot,
+                            run_data_only, sample_categorical, tensorflow_available)
+
+# TensorFlow se importa bajo demanda con load_tensorflow() para que los
+# modos sin entrenamiento (--help, --data-only) arranquen rápido
+TF_AVAILABLE = tensorflow_available()
+tf = keras = layers = None
+
+
+def load_tensorflow():
+    """Importa TensorFlow/Keras en este módulo la primera vez que se necesita."""
+    global tf, keras, layers
+    if tf is None:
+        tf, keras, layers = import_tensorflow()
 
 
 # Constantes del modelo
 INPUT_SIZE = 15
 OUTPUT_SIZE = 6
+EVAL_METRIC = 'accuracy'  # métrica principal de validación
 ACTIONS = ['feed', 'play', 'clean', 'rest', 'minigame', 'other']
+ACTION_TO_IDX = {action: idx for idx, action in enumerate(ACTIONS)}
 
 
-def create_model():
-    """Crea la arquitectura del modelo ActionPredictor."""
+def create_model(units: tuple = (32, 16), dropout: float = 0.2,
+                 learning_rate: float = 0.001):
+    """
+    Crea la arquitectura del modelo ActionPredictor.
+
+    Los valores por defecto son la arquitectura que se distribuye; los
+    parámetros permiten a `hparam_search.py` explorar variantes.
+
+    Args:
+        units: Neuronas de las dos capas ocultas
+        dropout: Tasa de dropout tras la primera capa
+        learning_rate: Learning rate de Adam
+    """
+    load_tensorflow()
     model = keras.Sequential([
         layers.Input(shape=(INPUT_SIZE,), name='input'),
-        layers.Dense(32, activation='relu', name='dense_1'),
-        layers.Dropout(0.2, name='dropout'),
-        layers.Dense(16, activation='relu', name='dense_2'),
+        layers.Dense(units[0], activation='relu', name='dense_1'),
+        layers.Dropout(dropout, name='dropout'),
+        layers.Dense(units[1], activation='relu', name='dense_2'),
         layers.Dense(OUTPUT_SIZE, activation='softmax', name='output')
     ])
 
     model.compile(
-        optimizer='adam',
+        optimizer=keras.optimizers.Adam(learning_rate=learning_rate),
         loss='categorical_crossentropy',
         metrics=['accuracy']
     )
@@ -78,45 +115,93 @@ def create_model():
     return model
 
 
-def load_training_data(data_path: str) -> tuple:
+def _action_index(record) -> int:
+    """Índice de `action_taken` en ACTIONS; las acciones desconocidas son 'other'."""
+    return ACTION_TO_IDX.get(record.get('action_taken', 'other'), 5)  # 5 = 'other'
+
+
+def load_training_data(data_path: str, since: str = None, return_stats: bool = False) -> tuple:
     """
     Carga datos de entrenamiento desde archivo JSON exportado por la app.
 
+    El archivo se lee en streaming (ver `export_reader.py`), así que la
+    memoria no depende del tamaño de la exportación más allá de los
+    arrays finales.
+
+    Args:
+        data_path: Archivo exportado por MLDataExportService
+        since: Solo registros con `timestamp` posterior (modo incremental)
+        return_stats: Retornar también las estadísticas de lectura
+
     Returns:
-        tuple: (X_train, y_train) arrays de numpy
+        tuple: (X_train, y_train) arrays de numpy, más stats si `return_stats`
     """
-    with open(data_path, 'r') as f:
-        data = json.load(f)
-
-    records = data.get('records', [])
-    if not records:
+    X, labels, stats = load_export_arrays(data_path, INPUT_SIZE, _action_index,
+                                          label_dtype=np.int8, since=since)
+
+    if stats['skipped']:
+        print(f"⚠️  {stats['skipped']} registros ignorados: features no tiene {INPUT_SIZE} elementos")
+    if stats['older']:
+        print(f"   {stats['older']} registros ya entrenados (timestamp <= {since})")
+    if stats['records'] == 0 and since is None:
         raise ValueError("No se encontraron registros en el archivo de datos")
 
-    X = []
-    y = []
+    print(f"   Leídos {stats['records']} registros en {stats['seconds']:.2f} s "
+          f"({stats['records_per_second']:,.0f} registros/s)")
 
-    action_to_idx = {action: idx for idx, action in enumerate(ACTIONS)}
+    if return_stats:
+        return X, one_hot(labels, OUTPUT_SIZE), stats
+    return X, one_hot(labels, OUTPUT_SIZE)
 
-    for record in records:
-        features = record.get('features', [])
-        action = record.get('action_taken', 'other')
 
-        if len(features) != INPUT_SIZE:
-            print(f"⚠️  Registro ignorado: features tiene {len(features)} elementos, se esperaban {INPUT_SIZE}")
-            continue
+def generate_synthetic_batch(n_samples: int, rng: np.random.Generator) -> tuple:
+    """
+    Genera un lote de datos sintéticos con operaciones vectorizadas.
 
-        X.append(features)
+    Aplica las mismas reglas heurísticas que `generate_synthetic_data_loop`
+    sobre columnas completas (máscaras booleanas) y muestrea todas las
+    acciones de una sola vez desde la distribución resultante.
 
-        # One-hot encoding de la acción
-        action_idx = action_to_idx.get(action, 5)  # 5 = 'other'
-        y_one_hot = [0] * OUTPUT_SIZE
-        y_one_hot[action_idx] = 1
-        y.append(y_one_hot)
+    Args:
+        n_samples: Número de muestras a generar
+        rng: Generador de números aleatorios
 
-    return np.array(X, dtype=np.float32), np.array(y, dtype=np.float32)
+    Returns:
+        tuple: (X, y) arrays float32 de forma (n, 15) y (n, 6)
+    """
+    X = np.zeros((n_samples, INPUT_SIZE), dtype=np.float32)
+
+    # Features continuos: hunger ... minutes_since_last
+    X[:, :10] = rng.random((n_samples, 10), dtype=np.float32)
 
+    # One-hot de última acción (70% tiene última acción)
+    has_last_action = rng.random(n_samples) > 0.3
+    last_action = rng.integers(0, 5, n_samples)
+    rows = np.flatnonzero(has_last_action)
+    X[rows, 10 + last_action[rows]] = 1.0
 
-def generate_synthetic_data(n_samples: int = 1000) -> tuple:
+    hunger, happiness, energy, health = X[:, 0], X[:, 1], X[:, 2], X[:, 3]
+
+    # Base probability + ruido para todas las acciones
+    action_probs = 0.5 + rng.random((n_samples, OUTPUT_SIZE)) * 0.3
+
+    # Reglas principales
+    action_probs[:, 0] += np.where(hunger > 0.7, 3.0, 0.0)     # feed
+    action_probs[:, 1] += np.where(happiness < 0.4, 2.5, 0.0)  # play
+    action_probs[:, 3] += np.where(energy < 0.3, 2.0, 0.0)     # rest
+    action_probs[:, 2] += np.where(health < 0.4, 2.5, 0.0)     # clean
+
+    # Reglas secundarias
+    action_probs[:, 4] += np.where((happiness > 0.7) & (energy > 0.5), 1.5, 0.0)  # minigame
+
+    action_probs /= action_probs.sum(axis=1, keepdims=True)
+
+    action_idx = sample_categorical(action_probs, rng)
+
+    return X, one_hot(action_idx, OUTPUT_SIZE)
+
+
+def generate_synthetic_data(n_samples: int = 1000, seed: int = 42) -> tuple:
     """
     Genera datos sintéticos para entrenamiento inicial.
 
@@ -126,6 +211,30 @@ def generate_synthetic_data(n_samples: int = 1000) -> tuple:
     - Si energy < 0.3 → probablemente rest
     - Si health < 0.4 → probablemente clean
 
+    Args:
+        n_samples: Número de muestras a generar
+        seed: Semilla del `np.random.Generator`
+
+    Returns:
+        tuple: (X, y) arrays de numpy
+    """
+    rng = np.random.default_rng(seed)
+    return generate_synthetic_batch(n_samples, rng)
+
+
+def generate_synthetic_data_loop(n_samples: int = 1000) -> tuple:
+    """
+    Genera datos sintéticos muestra por muestra (implementación original).
+
+    Se conserva como referencia para `benchmark_data_generation.py`;
+    el entrenamiento usa `generate_synthetic_data`.
+
+    Los datos siguen reglas heurísticas simples:
+    - Si hunger > 0.7 → probablemente feed
+    - Si happiness < 0.4 → probablemente play
+    - Si energy < 0.3 → probablemente rest
+    - Si health < 0.4 → probablemente clean
+
     Returns:
         tuple: (X, y) arrays de numpy
     """
@@ -198,23 +307,25 @@ def generate_synthetic_data(n_samples: int = 1000) -> tuple:
     return np.array(X, dtype=np.float32), np.array(y, dtype=np.float32)
 
 
-def convert_to_tflite(model, output_path: str, quantize: bool = True):
+def convert_to_tflite(model, output_path: str, mode: str = 'dynamic',
+                      representative_data=None, store=None, int8_io: bool = False) -> bytes:
     """
     Convierte el modelo Keras a TensorFlow Lite.
 
     Args:
         model: Modelo Keras entrenado
         output_path: Ruta de salida para el archivo .tflite
-        quantize: Si True, aplica cuantización INT8
-    """
-    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+        mode: Modo de `tflite_utils.QUANTIZATION_MODES` (ver
+              `quantization.conversion_mode`)
+        representative_data: Features para calibrar la cuantización INT8
+        store: ArtifactStore para reutilizar conversiones de los mismos pesos
+        int8_io: En modo 'int8', usar también entrada y salida int8
 
-    if quantize:
-        converter.optimizations = [tf.lite.Optimize.DEFAULT]
-        # Para cuantización completa INT8, necesitaríamos datos representativos
-        # converter.target_spec.supported_types = [tf.int8]
-
-    tflite_model = converter.convert()
+    Returns:
+        bytes: Modelo .tflite
+    """
+    tflite_model = convert_keras_model(model, mode=mode, representative_data=representative_data,
+                                      int8_io=int8_io, store=store)
 
     with open(output_path, 'wb') as f:
         f.write(tflite_model)
@@ -224,28 +335,207 @@ def convert_to_tflite(model, output_path: str, quantize: bool = True):
     print(f"✅ Modelo guardado en: {output_path}")
     print(f"   Tamaño: {size_kb:.2f} KB")
 
+    return tflite_model
+
+
+def evaluate_model(model, X_test, y_test, report_path=None):
+    """
+    Evalúa el modelo con una sola pasada de predicción (ver `evaluation.py`).
+
+    Si se indica `report_path` (el .tflite de salida), escribe las
+    métricas completas en `<modelo>.eval.json` junto a él.
+    """
+    result = evaluate_keras(model, X_test, y_test, ClassificationMetrics(ACTIONS))
+    print_report(result)
+    if report_path is not None:
+        write_report(result, report_path, 'action_predictor')
+    return result
+
+
+def run_incremental(args, store=None) -> int:
+    """
+    Reentrenamiento incremental (--incremental).
+
+    Carga el último checkpoint Keras de `--state-dir`, ajusta solo con los
+    registros de `--data` posteriores a la marca de agua mezclados con una
+    muestra acotada de registros anteriores, y guarda el nuevo estado. El
+    costo por epoch es proporcional a los registros nuevos, no al total.
+    """
+    if not args.data:
+        print("❌ --incremental requiere --data")
+        return 1
+    if not TF_AVAILABLE:
+        print("❌ TensorFlow es requerido para entrenar el modelo")
+        return 1
+
+    state = IncrementalState.load(args.state_dir, INPUT_SIZE, OUTPUT_SIZE,
+                                  replay_size=args.replay_size, seed=args.seed)
+    print(f"\n📦 Cargando registros nuevos desde: {args.data}")
+    print(f"   Marca de agua: {state.watermark or '(ninguna, primer entrenamiento)'}")
+    X_new, y_new, stats = load_training_data(args.data, since=state.watermark,
+                                             return_stats=True)
+
+    if len(X_new) == 0:
+        print("\n✅ No hay registros nuevos; el modelo está al día")
+        return 0
+
+    # Todos los registros nuevos se entrenan (salvo el conjunto de prueba
+    # fijo que se separa en la primera ejecución): la marca de agua avanza
+    # sobre ellos y no se vuelven a leer
+    first_holdout = state.holdout is None
+    X_new, y_new = state.split_holdout(X_new, y_new, seed=args.seed)
+    if first_holdout and state.holdout is not None:
+        print(f"   Conjunto de prueba fijo: {len(state.holdout[0])} registros "
+              f"(se reservan una sola vez)")
+
+    X_replay, y_replay = state.replay.sample(int(len(X_new) * args.replay_ratio))
+    rng = np.random.default_rng(args.seed)
+    order = rng.permutation(len(X_new) + len(X_replay))
+    X_train = np.concatenate([X_new, X_replay])[order]
+    y_train = np.concatenate([y_new, y_replay])[order]
+
+    print(f"   Nuevos: {len(X_new)}, repetición: {len(X_replay)} "
+          f"(historia total: {state.total_records + len(X_new)})")
+
+    load_tensorflow()
+    if state.has_checkpoint():
+        print(f"\n🏗️  Continuando desde: {state.model_path}")
+        model = keras.models.load_model(state.model_path)
+    else:
+        print(f"\n🏗️  Sin checkpoint previo, creando modelo...")
+        model = create_model()
+
+    print(f"\n🚀 Ajustando hasta {args.epochs} epochs con {len(X_train)} muestras...")
+    fit_model(
+        model, X_train, y_train,
+        epochs=args.epochs,
+        batch_size=32,
+        pipeline=args.pipeline,
+        shuffle_buffer=args.shuffle_buffer,
+        seed=args.seed,
+        early_stopping=args.early_stopping,
+        patience=args.patience,
+        time_budget=args.time_budget,
+        validation_data=state.holdout,
+    )
+    if state.holdout is not None:
+        evaluate_model(model, *state.holdout)
+
+    print(f"\n📱 Convirtiendo a TensorFlow Lite...")
+    output_path = Path(args.output)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    convert_to_tflite(
+        model, str(output_path), mode=args.quantization, int8_io=args.int8_io,
+        representative_data=X_train, store=store
+    )
+
+    state.commit(model, X_new, y_new, stats['latest_timestamp'],
+                 run_info={'data': Path(args.data).name, 'replay_records': len(X_replay)})
+    print(f"\n💾 Estado guardado en {state.directory} (marca de agua: {state.watermark})")
+
+    print("\n✅ ¡Reentrenamiento incremental completado!")
+    return 0
 
-def evaluate_model(model, X_test, y_test):
-    """Evalúa el modelo y muestra métricas."""
-    loss, accuracy = model.evaluate(X_test, y_test, verbose=0)
-    print(f"\n📊 Métricas de evaluación:")
-    print(f"   Loss: {loss:.4f}")
-    print(f"   Accuracy: {accuracy:.4f}")
 
-    # Predicciones para análisis
-    predictions = model.predict(X_test, verbose=0)
-    predicted_classes = np.argmax(predictions, axis=1)
-    true_classes = np.argmax(y_test, axis=1)
+def run_data_dir(args, store=None, artifact_key=None) -> int:
+    """
+    Entrenamiento fuera de memoria sobre un directorio de exportaciones (--data-dir).
+
+    Los archivos se dividen por dispositivo: un 20% de los archivos (al
+    menos uno si hay dos o más) se reserva para validación, de modo que
+    la validación mide cómo generaliza el modelo a dispositivos no vistos.
+    Los registros se leen en streaming con `ExportStream` y pasan por un
+    pipeline `tf.data` con buffer de mezcla acotado; nunca se concatenan
+    todos en memoria.
+    """
+    paths = discover_exports(args.data_dir)
+    if not paths:
+        print(f"❌ No se encontraron exportaciones (.json o .tmlb) en {args.data_dir}")
+        return 1
+
+    order = np.random.default_rng(args.seed).permutation(len(paths))
+    n_val = max(1, round(len(paths) * 0.2)) if len(paths) > 1 else 0
+    val_paths = [paths[i] for i in order[:n_val]]
+    train_paths = [paths[i] for i in order[n_val:]]
+
+    def stream(file_paths, seed=None):
+        return ExportStream(file_paths, INPUT_SIZE, _action_index,
+                            target_fn=lambda labels: one_hot(labels, OUTPUT_SIZE),
+                            cycle_length=args.cycle_length, seed=seed)
+
+    train_stream = stream(train_paths, seed=args.seed)
+    val_stream = stream(val_paths) if val_paths else None
+
+    print(f"\n📦 {len(paths)} exportaciones en {args.data_dir}: "
+          f"{len(train_paths)} de entrenamiento, {len(val_paths)} de validación")
+
+    if args.data_only:
+        for name, data in (('train', train_stream), ('val', val_stream)):
+            if data is None:
+                continue
+            for _ in data():
+                pass
+            st = data.stats
+            print(f"   {name}: {st['records']} registros válidos, {st['skipped']} descartados, "
+                  f"{st['bad_files']} archivos inválidos de {st['files']}")
+        return 0 if train_stream.stats['records'] else 1
+
+    if not TF_AVAILABLE:
+        print("❌ TensorFlow es requerido para entrenar el modelo")
+        return 1
+    load_tensorflow()
+    from tf_pipeline import dataset_from_chunks
+
+    train_ds = dataset_from_chunks(train_stream, INPUT_SIZE, OUTPUT_SIZE, batch_size=32,
+                                   shuffle_buffer=args.shuffle_buffer, seed=args.seed)
+    val_ds = dataset_from_chunks(val_stream, INPUT_SIZE, OUTPUT_SIZE, batch_size=32,
+                                 shuffle_buffer=0) if val_stream else None
+
+    print(f"\n🏗️  Creando modelo...")
+    model = create_model()
+
+    print(f"\n🚀 Entrenando hasta {args.epochs} epochs en streaming...")
+    fit_datasets(
+        model, train_ds, val_ds,
+        epochs=args.epochs,
+        early_stopping=args.early_stopping,
+        patience=args.patience,
+        time_budget=args.time_budget,
+        n_train=train_stream.stats['records'] or None,
+    )
+    st = train_stream.stats
+    print(f"   Última epoch: {st['records']} registros de {st['files']} archivos, "
+          f"{st['skipped']} descartados por validación")
+
+    if val_stream is not None:
+        # Una pasada en streaming: la validación puede no caber en memoria
+        print(f"\n📊 Validación (dispositivos no vistos):")
+        result = evaluate_batches(model.predict_on_batch, val_stream(),
+                                  ClassificationMetrics(ACTIONS))
+        print_report(result)
+        if args.eval_report:
+            write_report(result, args.output, 'action_predictor')
+
+    # Un bloque basta para calibrar la cuantización INT8
+    representative = next(iter(train_stream()), (None, None))[0] \
+        if args.quantization == 'int8' else None
+
+    print(f"\n📱 Convirtiendo a TensorFlow Lite...")
+    output_path = Path(args.output)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tflite_model = convert_to_tflite(
+        model, str(output_path), mode=args.quantization, int8_io=args.int8_io,
+        representative_data=representative, store=store
+    )
+    if store is not None and artifact_key:
+        store.put('train', artifact_key, tflite_model,
+                  {'name': 'action_predictor', 'quantization': args.quantization})
 
-    # Matriz de confusión simplificada
-    print(f"\n📈 Distribución de predicciones:")
-    for i, action in enumerate(ACTIONS):
-        pred_count = np.sum(predicted_classes == i)
-        true_count = np.sum(true_classes == i)
-        print(f"   {action}: {pred_count} predichas, {true_count} reales")
+    print("\n✅ ¡Entrenamiento completado!")
+    return 0
 
 
-def main():
+def main(argv=None):
     parser = argparse.ArgumentParser(
         description='Entrenar modelo ActionPredictor para Tamagotchi'
     )
@@ -254,6 +544,25 @@ def main():
         type=str,
         help='Ruta al archivo JSON con datos de entrenamiento'
     )
+    parser.add_argument(
+        '--data-dir',
+        type=str,
+        help='Directorio con exportaciones JSON (una por dispositivo); entrena en streaming'
+    )
+    parser.add_argument(
+        '--data-npy',
+        type=str,
+        default=None,
+        metavar='DIR',
+        help='Entrenar con el X.npy/y.npy de sharded_generation.py en DIR (memory-mapped; '
+             'requiere --pipeline tfdata)'
+    )
+    parser.add_argument(
+        '--cycle-length',
+        type=int,
+        default=16,
+        help='Archivos abiertos e intercalados a la vez con --data-dir (default: 16)'
+    )
     parser.add_argument(
         '--epochs', '-e',
         type=int,
@@ -272,35 +581,237 @@ def main():
         default=0,
         help='Generar N muestras sintéticas (0 = usar datos reales)'
     )
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=42,
+        help='Semilla para los datos sintéticos (default: 42)'
+    )
     parser.add_argument(
         '--no-quantize',
         action='store_true',
         help='No aplicar cuantización al modelo'
     )
+    parser.add_argument(
+        '--int8',
+        action='store_true',
+        help='Cuantización entera completa (INT8) con datos representativos'
+    )
+    parser.add_argument(
+        '--int8-io',
+        action='store_true',
+        help='Con --int8, entrada y salida int8 (sin esto siguen en float32, como las '
+             'alimenta MLService en la app)'
+    )
+    parser.add_argument(
+        '--quantize-budget',
+        type=float,
+        default=None,
+        metavar='BUDGET',
+        help='Comparar todos los modos de cuantización con el modelo entrenado y '
+             'quedarse con el más pequeño que degrade <= BUDGET (ver quantization.py)'
+    )
+    parser.add_argument(
+        '--pipeline',
+        choices=['numpy', 'tfdata'],
+        default='numpy',
+        help='Entrada de entrenamiento: arrays en memoria o pipeline tf.data (default: numpy)'
+    )
+    parser.add_argument(
+        '--shuffle-buffer',
+        type=int,
+        default=10000,
+        help='Tamaño del buffer de mezcla del pipeline tf.data (default: 10000)'
+    )
+    parser.add_argument(
+        '--cache-dir',
+        type=str,
+        default=str(DEFAULT_CACHE_DIR),
+        help='Directorio de la caché de datasets'
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='No leer ni escribir la caché de datasets'
+    )
+    parser.add_argument(
+        '--early-stopping',
+        action='store_true',
+        help='Detener cuando val_loss deja de mejorar y reducir el learning rate en mesetas'
+    )
+    parser.add_argument(
+        '--patience',
+        type=int,
+        default=5,
+        help='Epochs sin mejora antes de detener con --early-stopping (default: 5)'
+    )
+    parser.add_argument(
+        '--time-budget',
+        type=float,
+        default=None,
+        help='Tiempo máximo de entrenamiento en segundos'
+    )
+    parser.add_argument(
+        '--incremental',
+        action='store_true',
+        help='Continuar desde el último modelo entrenando solo registros nuevos de --data'
+    )
+    parser.add_argument(
+        '--state-dir',
+        type=str,
+        default=str(DEFAULT_STATE_DIR / 'action_predictor'),
+        help='Directorio del checkpoint, la marca de agua y la muestra de repetición'
+    )
+    parser.add_argument(
+        '--replay-size',
+        type=int,
+        default=DEFAULT_REPLAY_SIZE,
+        help=f'Tamaño máximo de la muestra de registros antiguos (default: {DEFAULT_REPLAY_SIZE})'
+    )
+    parser.add_argument(
+        '--replay-ratio',
+        type=float,
+        default=1.0,
+        help='Registros antiguos mezclados por cada registro nuevo (default: 1.0)'
+    )
+    parser.add_argument(
+        '--artifact-dir',
+        type=str,
+        default=str(DEFAULT_STORE_DIR),
+        help='Almacén de artefactos .tflite para no reentrenar modelos sin cambios'
+    )
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='Entrenar aunque exista un .tflite idéntico en el almacén de artefactos'
+    )
+    parser.add_argument(
+        '--eval-report',
+        action='store_true',
+        help='Escribir las métricas de evaluación completas en JSON junto al .tflite'
+    )
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help='Escribir un reporte JSON de tiempos y memoria por fase junto al .tflite'
+    )
+    parser.add_argument(
+        '--profile-trace',
+        choices=TRACE_MODES,
+        default=None,
+        help='Trazar model.fit con cProfile o con el profiler de TensorFlow'
+    )
+    parser.add_argument(
+        '--compress',
+        choices=COMPRESSION_MODES,
+        default=None,
+        help='Podar y/o agrupar los pesos con un ajuste corto antes de convertir (requiere tfmot)'
+    )
+    parser.add_argument(
+        '--sparsity',
+        type=float,
+        default=0.5,
+        help='Dispersión objetivo de la poda (default: 0.5)'
+    )
+    parser.add_argument(
+        '--clusters',
+        type=int,
+        default=16,
+        help='Centroides por capa del clustering (default: 16)'
+    )
+    parser.add_argument(
+        '--compress-epochs',
+        type=int,
+        default=2,
+        help='Epochs del ajuste de compresión (default: 2)'
+    )
+    parser.add_argument(
+        '--data-only',
+        action='store_true',
+        help='Solo generar/validar/cachear el dataset y salir, sin cargar TensorFlow'
+    )
 
-    args = parser.parse_args()
-
-    if not TF_AVAILABLE:
-        print("❌ TensorFlow es requerido para entrenar el modelo")
-        print("   Instálalo con: pip install tensorflow")
-        return 1
+    args = parser.parse_args(argv)
+    if args.int8_io and not args.int8:
+        parser.error('--int8-io requiere --int8')
+    if args.quantize_budget is not None and (args.int8 or args.no_quantize):
+        parser.error('--quantize-budget no se combina con --int8 ni --no-quantize')
+    if args.quantize_budget is not None and (args.incremental or args.data_dir):
+        parser.error('--quantize-budget no se admite con --incremental ni --data-dir')
+    if args.data_npy and (args.incremental or args.data_dir):
+        parser.error('--data-npy no se combina con --incremental ni --data-dir')
+    args.quantization = conversion_mode('action_predictor', args)
+    npy_files = data_npy_files(parser, args, 'action_predictor')
 
     print("🤖 Entrenamiento de ActionPredictor para Tamagotchi")
     print("=" * 50)
 
-    # Cargar o generar datos
-    if args.synthetic > 0:
-        print(f"\n📦 Generando {args.synthetic} muestras sintéticas...")
-        X, y = generate_synthetic_data(args.synthetic)
-    elif args.data:
-        print(f"\n📦 Cargando datos desde: {args.data}")
-        X, y = load_training_data(args.data)
+    store = ArtifactStore(args.artifact_dir)
+    if args.incremental:
+        return run_incremental(args, store)
+
+    # Reutilizar el .tflite si nada de lo que define el modelo cambió
+    if args.data_dir:
+        data_files = discover_exports(args.data_dir)
+    elif args.data_npy:
+        data_files = npy_files
+    elif args.data and args.synthetic <= 0:
+        data_files = [args.data]
     else:
-        print("\n📦 Generando 2000 muestras sintéticas (default)...")
-        X, y = generate_synthetic_data(2000)
+        data_files = []
+    artifact_key = training_key('action_predictor', __file__, args, data_files)
+    if not args.force and not args.data_only and store.restore('train', artifact_key, args.output):
+        print(f"\n♻️  Sin cambios: {args.output} reutilizado del almacén de artefactos")
+        for flag in skipped_run_outputs(args):
+            print(f"   {flag} omitido: no hubo entrenamiento (usar --force)")
+        return 0
+
+    if args.data_dir:
+        return run_data_dir(args, store, artifact_key)
+
+    profiler = PhaseProfiler('action_predictor', trace=args.profile_trace)
+
+    # Cargar o generar datos
+    cache_dir = None if args.no_cache else args.cache_dir
+    with profiler.phase('data'):
+        if args.data_npy:
+            print(f"\n📦 Abriendo dataset por shards: {args.data_npy}")
+            X, y = load_sharded(args.data_npy)
+        elif args.data and args.synthetic <= 0:
+            print(f"\n📦 Cargando datos desde: {args.data}")
+            X, y = load_or_build(
+                'action_predictor', {'data': Path(args.data).name},
+                lambda: load_training_data(args.data),
+                source_files=[*local_sources(__file__), args.data], cache_dir=cache_dir
+            )
+        else:
+            n_samples = args.synthetic if args.synthetic > 0 else 2000
+            if args.synthetic > 0:
+                print(f"\n📦 Generando {n_samples} muestras sintéticas...")
+            else:
+                print(f"\n📦 Generando {n_samples} muestras sintéticas (default)...")
+            X, y = load_or_build(
+                'action_predictor', {'samples': n_samples, 'seed': args.seed},
+                lambda: generate_synthetic_data(n_samples, seed=args.seed),
+                source_files=local_sources(__file__), cache_dir=cache_dir
+            )
 
     print(f"   Total de muestras: {len(X)}")
 
+    if args.data_only:
+        return run_data_only(X, y, INPUT_SIZE, OUTPUT_SIZE)
+
+    if not TF_AVAILABLE:
+        print("❌ TensorFlow es requerido para entrenar el modelo")
+        print("   Instálalo con: pip install tensorflow")
+        return 1
+    if args.compress and not tfmot_available():
+        print("❌ --compress requiere tensorflow-model-optimization")
+        print("   Instálalo con: pip install tensorflow-model-optimization")
+        return 1
+    with profiler.phase('tf_import'):
+        load_tensorflow()
+
     # Dividir en train/test
     split_idx = int(len(X) * 0.8)
     X_train, X_test = X[:split_idx], X[split_idx:]
@@ -314,22 +825,61 @@ def main():
     model.summary()
 
     print(f"\n🚀 Entrenando por {args.epochs} epochs...")
-    history = model.fit(
-        X_train, y_train,
-        epochs=args.epochs,
-        batch_size=32,
-        validation_split=0.2,
-        verbose=1
-    )
+    with profiler.phase('fit'):
+        history = fit_model(
+            model, X_train, y_train,
+            epochs=args.epochs,
+            batch_size=32,
+            pipeline=args.pipeline,
+            shuffle_buffer=args.shuffle_buffer,
+            seed=args.seed,
+            early_stopping=args.early_stopping,
+            patience=args.patience,
+            time_budget=args.time_budget,
+            profiler=profiler,
+        )
 
     # Evaluar
-    evaluate_model(model, X_test, y_test)
+    with profiler.phase('evaluate'):
+        evaluate_model(model, X_test, y_test,
+                       report_path=args.output if args.eval_report else None)
+
+    baseline_model = model
+    if args.compress:
+        with profiler.phase('compress'):
+            model = compress_model(model, args.compress, X_train, y_train, EVAL_METRIC,
+                                   sparsity=args.sparsity, clusters=args.clusters,
+                                   epochs=args.compress_epochs)
 
     # Convertir a TFLite
     print(f"\n📱 Convirtiendo a TensorFlow Lite...")
     output_path = Path(args.output)
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    convert_to_tflite(model, str(output_path), quantize=not args.no_quantize)
+    with profiler.phase('convert'):
+        if args.quantize_budget is not None:
+            args.quantization = choose_mode('action_predictor', model, X_train, X_test, y_test,
+                                            EVAL_METRIC, args.quantize_budget, output_path,
+                                            store=store)
+        tflite_model = convert_to_tflite(
+            model, str(output_path), mode=args.quantization, int8_io=args.int8_io,
+            representative_data=X_train, store=store
+        )
+    info = {'name': 'action_predictor', 'quantization': args.quantization}
+    store.put('train', artifact_key, tflite_model, info)
+    if args.quantize_budget is not None:
+        # Sin --quantize-budget se usará el modo elegido: guardar el resultado
+        # también con esa clave para que train_all lo restaure tal cual
+        plain_args = argparse.Namespace(**{**vars(args), 'quantize_budget': None})
+        plain_key = training_key('action_predictor', __file__, plain_args, data_files)
+        store.put('train', plain_key, tflite_model, info)
+    if args.compress:
+        compare_compressed(baseline_model, tflite_model, X_test, y_test, EVAL_METRIC,
+                           mode=args.quantization, representative_data=X_train,
+                           label=args.compress)
+    if args.quantization == 'int8':
+        compare_with_float(model, tflite_model, X_test, y_test, metric=EVAL_METRIC)
+
+    profiler.finish(output_path if args.profile else None)
 
     print("\n✨ ¡Entrenamiento completado!")
     return 0
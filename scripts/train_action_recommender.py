@@ -31,33 +31,61 @@ import argparse
 import numpy as np
 from pathlib import Path
 
-try:
-    import tensorflow as tf
-    from tensorflow import keras
-    from tensorflow.keras import layers
-    TF_AVAILABLE = True
-except ImportError:
-    TF_AVAILABLE = False
-    print("TensorFlow no está instalado.")
+from artifact_cache import (DEFAULT_STORE_DIR, ArtifactStore, local_sources,
+                            skipped_run_outputs, training_key)
+from compression import COMPRESSION_MODES, compare_compressed, compress_model, tfmot_available
+from dataset_cache import DEFAULT_CACHE_DIR, load_or_build
+from evaluation import RegressionMetrics, evaluate_keras, print_report, write_report
+from profiling import TRACE_MODES, PhaseProfiler
+from quantization import choose_mode, conversion_mode
+from sharded_generation import data_npy_files, load_sharded
+from tflite_utils import compare_with_float, convert_keras_model
+from training_utils import (fit_model, import_tensorflow, run_data_only,
+                            tensorflow_available)
+
+# TensorFlow se importa bajo demanda con load_tensorflow() para que los
+# modos sin entrenamiento (--help, --data-only) arranquen rápido
+TF_AVAILABLE = tensorflow_available()
+tf = keras = layers = None
+
+
+def load_tensorflow():
+    """Importa TensorFlow/Keras en este módulo la primera vez que se necesita."""
+    global tf, keras, layers
+    if tf is None:
+        tf, keras, layers = import_tensorflow()
 
 
 INPUT_SIZE = 25
 OUTPUT_SIZE = 7
+EVAL_METRIC = 'mae'  # métrica principal de validación
 ACTIONS = ['feed', 'play', 'clean', 'rest', 'minigame', 'other']
 
 
-def create_model():
-    """Crea la arquitectura del modelo ActionRecommender."""
+def create_model(units: tuple = (48, 24), dropout: float = 0.2,
+                 learning_rate: float = 0.001):
+    """
+    Crea la arquitectura del modelo ActionRecommender.
+
+    Los valores por defecto son la arquitectura que se distribuye; los
+    parámetros permiten a `hparam_search.py` explorar variantes.
+
+    Args:
+        units: Neuronas de las dos capas ocultas
+        dropout: Tasa de dropout tras la primera capa
+        learning_rate: Learning rate de Adam
+    """
+    load_tensorflow()
     model = keras.Sequential([
         layers.Input(shape=(INPUT_SIZE,), name='input'),
-        layers.Dense(48, activation='relu', name='dense_1'),
-        layers.Dropout(0.2, name='dropout'),
-        layers.Dense(24, activation='relu', name='dense_2'),
+        layers.Dense(units[0], activation='relu', name='dense_1'),
+        layers.Dropout(dropout, name='dropout'),
+        layers.Dense(units[1], activation='relu', name='dense_2'),
         layers.Dense(OUTPUT_SIZE, activation='sigmoid', name='output')
     ])
 
     model.compile(
-        optimizer='adam',
+        optimizer=keras.optimizers.Adam(learning_rate=learning_rate),
         loss='mse',
         metrics=['mae']
     )
@@ -65,8 +93,135 @@ def create_model():
     return model
 
 
-def generate_synthetic_data(n_samples: int = 3000) -> tuple:
+def _score_weights() -> tuple:
+    """
+    Matriz (25, 6) y bias (6,) de las reglas lineales de recomendación.
+
+    Cada score es combinación lineal de features, así que los seis se
+    calculan para todo el lote con un solo producto matricial.
+    """
+    W = np.zeros((INPUT_SIZE, len(ACTIONS)))
+    b = np.zeros(len(ACTIONS))
+    hunger, happiness, energy, health, bond_level = 0, 1, 2, 3, 5
+    playful, calm, foodie = 11 + 0, 11 + 3, 11 + 4  # traits
+
+    # feed: hunger * 0.7 + (1 - health) * 0.2 + foodie * 0.1
+    W[hunger, 0], W[health, 0], W[foodie, 0], b[0] = 0.7, -0.2, 0.1, 0.2
+    # play: (1 - happiness) * 0.5 + playful * 0.3 + energy * 0.2
+    W[happiness, 1], W[playful, 1], W[energy, 1], b[1] = -0.5, 0.3, 0.2, 0.5
+    # clean: (1 - health) * 0.6 + (1 - happiness) * 0.2 + 0.2
+    W[health, 2], W[happiness, 2], b[2] = -0.6, -0.2, 0.6 + 0.2 + 0.2
+    # rest: (1 - energy) * 0.7 + calm * 0.2 + 0.1
+    W[energy, 3], W[calm, 3], b[3] = -0.7, 0.2, 0.7 + 0.1
+    # minigame: happiness * 0.3 + energy * 0.3 + bond * 0.2 + playful * 0.2
+    W[happiness, 4], W[energy, 4], W[bond_level, 4], W[playful, 4] = 0.3, 0.3, 0.2, 0.2
+    # other: 0.2 + ruido uniforme (se suma aparte)
+    b[5] = 0.2
+
+    return W, b
+
+
+SCORE_WEIGHTS, SCORE_BIAS = _score_weights()
+
+# Urgencia por métrica: (valor - umbral) * signo / rango, activa cuando es > 0
+URGENCY_THRESHOLDS = np.array([0.7, 0.3, 0.2, 0.3])  # hunger, happiness, energy, health
+URGENCY_SIGNS = np.array([1.0, -1.0, -1.0, -1.0])
+URGENCY_SPANS = np.array([0.3, 0.3, 0.2, 0.3])
+
+# Desviación estándar del ruido de cada target (6 scores + urgencia)
+TARGET_NOISE_STD = np.array([0.05] * len(ACTIONS) + [0.1], dtype=np.float32)
+
+
+def compute_targets(X: np.ndarray, rng: np.random.Generator,
+                    target_noise: bool = True,
+                    noise_rng: np.random.Generator = None) -> np.ndarray:
+    """
+    Calcula la matriz de targets (n, 7) a partir de features (n, 25).
+
+    Con `target_noise=False` se omite el ruido gaussiano, que entonces
+    puede aplicarse con `add_target_noise` dentro del pipeline tf.data.
+    El ruido sale de `noise_rng` (por defecto `rng`) en un solo sorteo.
+
+    Returns:
+        Matriz float32 con 6 scores de acción y la urgencia en la columna 6
+    """
+    n = X.shape[0]
+    y = np.empty((n, OUTPUT_SIZE), dtype=np.float32)
+
+    scores = X @ SCORE_WEIGHTS + SCORE_BIAS
+    scores[:, 5] += rng.random(n) * 0.1
+    np.clip(scores, 0, 1, out=scores)
+
+    # Máximo enmascarado sobre las métricas en estado crítico (0 si ninguna)
+    criticality = (X[:, :4] - URGENCY_THRESHOLDS) * URGENCY_SIGNS / URGENCY_SPANS
+    y[:, :6] = scores
+    y[:, 6] = np.max(criticality, axis=1, initial=0.0, where=criticality > 0)
+    if target_noise:
+        if noise_rng is None:
+            noise_rng = rng
+        y += noise_rng.normal(0, TARGET_NOISE_STD, (n, OUTPUT_SIZE))
+    np.clip(y, 0, 1, out=y)
+
+    return y
+
+
+def _split_streams(rng: np.random.Generator) -> tuple:
+    """Deriva streams independientes para features, el término de 'other' y el ruido."""
+    feature_rng, other_rng, noise_rng = rng.spawn(3)
+    return feature_rng, other_rng, noise_rng
+
+
+def generate_synthetic_batch(n_samples: int, rng: np.random.Generator,
+                             chunk_size: int = None, target_noise: bool = True) -> tuple:
+    """
+    Genera datos sintéticos con operaciones vectorizadas.
+
+    Cada tipo de sorteo usa su propio stream, así que procesar por bloques
+    no cambia el resultado: `chunk_size` solo acota la memoria temporal.
+
+    Args:
+        n_samples: Número de muestras a generar
+        rng: Generador de números aleatorios
+        chunk_size: Si se indica, procesa en bloques de este tamaño para
+                    acotar la memoria temporal con muchas muestras
+        target_noise: Si False, genera targets sin ruido
+
+    Returns:
+        tuple: (X, y) arrays float32 de forma (n, 25) y (n, 7)
+    """
+    feature_rng, other_rng, noise_rng = _split_streams(rng)
+
+    X = np.empty((n_samples, INPUT_SIZE), dtype=np.float32)
+    y = np.empty((n_samples, OUTPUT_SIZE), dtype=np.float32)
+    chunk_size = chunk_size or max(n_samples, 1)
+
+    for start in range(0, n_samples, chunk_size):
+        stop = min(start + chunk_size, n_samples)
+        Xc = X[start:stop]
+        feature_rng.random(dtype=np.float32, out=Xc)
+        Xc[:, 7] = 1 - Xc[:, 6]  # reactive_ratio
+        y[start:stop] = compute_targets(Xc, other_rng, target_noise=target_noise,
+                                        noise_rng=noise_rng)
+
+    return X, y
+
+
+def generate_synthetic_data(n_samples: int = 3000, seed: int = 42,
+                            chunk_size: int = None, target_noise: bool = True) -> tuple:
     """Genera datos sintéticos para entrenamiento."""
+    rng = np.random.default_rng(seed)
+    return generate_synthetic_batch(n_samples, rng, chunk_size=chunk_size,
+                                    target_noise=target_noise)
+
+
+def add_target_noise(X, y):
+    """Agrega ruido gaussiano a los targets dentro del pipeline tf.data."""
+    noise = tf.random.normal(tf.shape(y)) * TARGET_NOISE_STD
+    return X, tf.clip_by_value(y + noise, 0.0, 1.0)
+
+
+def generate_synthetic_data_loop(n_samples: int = 3000) -> tuple:
+    """Genera datos sintéticos muestra por muestra (referencia para benchmarks)."""
     np.random.seed(42)
 
     X = []
@@ -157,12 +312,11 @@ def generate_synthetic_data(n_samples: int = 3000) -> tuple:
     return np.array(X, dtype=np.float32), np.array(y, dtype=np.float32)
 
 
-def convert_to_tflite(model, output_path: str, quantize: bool = True):
+def convert_to_tflite(model, output_path: str, mode: str = 'dynamic',
+                      representative_data=None, store=None, int8_io: bool = False) -> bytes:
     """Convierte el modelo Keras a TensorFlow Lite."""
-    converter = tf.lite.TFLiteConverter.from_keras_model(model)
-    if quantize:
-        converter.optimizations = [tf.lite.Optimize.DEFAULT]
-    tflite_model = converter.convert()
+    tflite_model = convert_keras_model(model, mode=mode, representative_data=representative_data,
+                                      int8_io=int8_io, store=store)
 
     with open(output_path, 'wb') as f:
         f.write(tflite_model)
@@ -171,26 +325,24 @@ def convert_to_tflite(model, output_path: str, quantize: bool = True):
     print(f"Modelo guardado en: {output_path}")
     print(f"   Tamaño: {size_kb:.2f} KB")
 
+    return tflite_model
 
-def evaluate_model(model, X_test, y_test):
-    """Evalúa el modelo."""
-    loss, mae = model.evaluate(X_test, y_test, verbose=0)
-    print(f"\nMétricas de evaluación:")
-    print(f"   MSE Loss: {loss:.4f}")
-    print(f"   MAE: {mae:.4f}")
 
-    predictions = model.predict(X_test, verbose=0)
+def evaluate_model(model, X_test, y_test, report_path=None):
+    """
+    Evalúa el modelo con una sola pasada de predicción (ver `evaluation.py`).
 
-    print(f"\nEstadísticas por salida:")
-    labels = ACTIONS + ['urgency']
-    for i, label in enumerate(labels):
-        pred_mean = np.mean(predictions[:, i])
-        true_mean = np.mean(y_test[:, i])
-        error = np.mean(np.abs(predictions[:, i] - y_test[:, i]))
-        print(f"   {label}: pred={pred_mean:.3f}, real={true_mean:.3f}, MAE={error:.3f}")
+    Si se indica `report_path` (el .tflite de salida), escribe las
+    métricas completas en `<modelo>.eval.json` junto a él.
+    """
+    result = evaluate_keras(model, X_test, y_test, RegressionMetrics(ACTIONS + ['urgency']))
+    print_report(result)
+    if report_path is not None:
+        write_report(result, report_path, 'action_recommender')
+    return result
 
 
-def main():
+def main(argv=None):
     parser = argparse.ArgumentParser(
         description='Entrenar modelo ActionRecommender para Tamagotchi'
     )
@@ -198,21 +350,99 @@ def main():
     parser.add_argument('--output', '-o', type=str,
                         default='../assets/models/action_recommender.tflite')
     parser.add_argument('--samples', '-s', type=int, default=3000)
+    parser.add_argument('--data-npy', type=str, default=None, metavar='DIR',
+                        help='X.npy/y.npy de sharded_generation.py (requiere --pipeline tfdata)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--chunk-size', type=int, default=None,
+                        help='Generar los datos en bloques de N muestras')
     parser.add_argument('--no-quantize', action='store_true')
-
-    args = parser.parse_args()
-
-    if not TF_AVAILABLE:
-        print("TensorFlow es requerido")
-        return 1
+    parser.add_argument('--int8', action='store_true',
+                        help='Cuantización entera completa con datos representativos')
+    parser.add_argument('--int8-io', action='store_true',
+                        help='Con --int8, entrada y salida int8 (por defecto siguen en float32)')
+    parser.add_argument('--quantize-budget', type=float, default=None, metavar='BUDGET',
+                        help='Elegir el modo de cuantización más pequeño que degrade <= BUDGET '
+                             '(ver quantization.py)')
+    parser.add_argument('--pipeline', choices=['numpy', 'tfdata'], default='numpy')
+    parser.add_argument('--shuffle-buffer', type=int, default=10000)
+    parser.add_argument('--cache-dir', type=str, default=str(DEFAULT_CACHE_DIR))
+    parser.add_argument('--no-cache', action='store_true')
+    parser.add_argument('--early-stopping', action='store_true',
+                        help='Detener por val_loss y reducir el learning rate en mesetas')
+    parser.add_argument('--patience', type=int, default=5)
+    parser.add_argument('--time-budget', type=float, default=None,
+                        help='Tiempo máximo de entrenamiento en segundos')
+    parser.add_argument('--artifact-dir', type=str, default=str(DEFAULT_STORE_DIR))
+    parser.add_argument('--force', action='store_true',
+                        help='Entrenar aunque el almacén de artefactos tenga el modelo')
+    parser.add_argument('--eval-report', action='store_true',
+                        help='Escribir las métricas de evaluación en JSON junto al .tflite')
+    parser.add_argument('--profile', action='store_true',
+                        help='Escribir un reporte JSON por fase junto al .tflite')
+    parser.add_argument('--profile-trace', choices=TRACE_MODES, default=None)
+    parser.add_argument('--compress', choices=COMPRESSION_MODES, default=None,
+                        help='Podar y/o agrupar pesos antes de convertir (requiere tfmot)')
+    parser.add_argument('--sparsity', type=float, default=0.5)
+    parser.add_argument('--clusters', type=int, default=16)
+    parser.add_argument('--compress-epochs', type=int, default=2)
+    parser.add_argument('--data-only', action='store_true',
+                        help='Solo generar/validar/cachear el dataset, sin TensorFlow')
+
+    args = parser.parse_args(argv)
+    if args.int8_io and not args.int8:
+        parser.error('--int8-io requiere --int8')
+    if args.quantize_budget is not None and (args.int8 or args.no_quantize):
+        parser.error('--quantize-budget no se combina con --int8 ni --no-quantize')
+    args.quantization = conversion_mode('action_recommender', args)
+    data_files = data_npy_files(parser, args, 'action_recommender')
 
     print("Entrenamiento de ActionRecommender para Tamagotchi")
     print("=" * 55)
 
-    print(f"\nGenerando {args.samples} muestras sintéticas...")
-    X, y = generate_synthetic_data(args.samples)
+    # Reutilizar el .tflite si nada de lo que define el modelo cambió
+    store = ArtifactStore(args.artifact_dir)
+    artifact_key = training_key('action_recommender', __file__, args, data_files)
+    if not args.force and not args.data_only and store.restore('train', artifact_key, args.output):
+        print(f"\nSin cambios: {args.output} reutilizado del almacén de artefactos")
+        for flag in skipped_run_outputs(args):
+            print(f"   {flag} omitido: no hubo entrenamiento (usar --force)")
+        return 0
+
+    profiler = PhaseProfiler('action_recommender', trace=args.profile_trace)
+
+    # En modo tfdata el ruido de targets se aplica dentro del pipeline
+    target_noise = args.pipeline == 'numpy'
+    with profiler.phase('data'):
+        if args.data_npy:
+            print(f"\nAbriendo dataset por shards: {args.data_npy}")
+            X, y = load_sharded(args.data_npy)
+        else:
+            print(f"\nGenerando {args.samples} muestras sintéticas...")
+            X, y = load_or_build(
+                'action_recommender',
+                {'samples': args.samples, 'seed': args.seed, 'chunk_size': args.chunk_size,
+                 'target_noise': target_noise},
+                lambda: generate_synthetic_data(args.samples, seed=args.seed,
+                                                chunk_size=args.chunk_size,
+                                                target_noise=target_noise),
+                source_files=local_sources(__file__),
+                cache_dir=None if args.no_cache else args.cache_dir
+            )
     print(f"   Total de muestras: {len(X)}")
 
+    if args.data_only:
+        return run_data_only(X, y, INPUT_SIZE, OUTPUT_SIZE)
+
+    if not TF_AVAILABLE:
+        print("TensorFlow es requerido")
+        return 1
+    if args.compress and not tfmot_available():
+        print("--compress requiere tensorflow-model-optimization")
+        print("   Instálalo con: pip install tensorflow-model-optimization")
+        return 1
+    with profiler.phase('tf_import'):
+        load_tensorflow()
+
     split_idx = int(len(X) * 0.8)
     X_train, X_test = X[:split_idx], X[split_idx:]
     y_train, y_test = y[:split_idx], y[split_idx:]
@@ -223,20 +453,61 @@ def main():
     model.summary()
 
     print(f"\nEntrenando por {args.epochs} epochs...")
-    model.fit(
-        X_train, y_train,
-        epochs=args.epochs,
-        batch_size=32,
-        validation_split=0.2,
-        verbose=1
-    )
-
-    evaluate_model(model, X_test, y_test)
+    with profiler.phase('fit'):
+        fit_model(
+            model, X_train, y_train,
+            epochs=args.epochs,
+            batch_size=32,
+            pipeline=args.pipeline,
+            shuffle_buffer=args.shuffle_buffer,
+            seed=args.seed,
+            # Los .npy por shards ya traen el ruido de targets
+            map_fn=add_target_noise if args.pipeline == 'tfdata' and not args.data_npy else None,
+            early_stopping=args.early_stopping,
+            patience=args.patience,
+            time_budget=args.time_budget,
+            profiler=profiler,
+        )
+
+    with profiler.phase('evaluate'):
+        evaluate_model(model, X_test, y_test,
+                       report_path=args.output if args.eval_report else None)
+
+    baseline_model = model
+    if args.compress:
+        with profiler.phase('compress'):
+            model = compress_model(model, args.compress, X_train, y_train, EVAL_METRIC,
+                                   sparsity=args.sparsity, clusters=args.clusters,
+                                   epochs=args.compress_epochs)
 
     print(f"\nConvirtiendo a TensorFlow Lite...")
     output_path = Path(args.output)
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    convert_to_tflite(model, str(output_path), quantize=not args.no_quantize)
+    with profiler.phase('convert'):
+        if args.quantize_budget is not None:
+            args.quantization = choose_mode('action_recommender', model, X_train, X_test, y_test,
+                                            EVAL_METRIC, args.quantize_budget, output_path,
+                                            store=store)
+        tflite_model = convert_to_tflite(
+            model, str(output_path), mode=args.quantization, int8_io=args.int8_io,
+            representative_data=X_train, store=store
+        )
+    info = {'name': 'action_recommender', 'quantization': args.quantization}
+    store.put('train', artifact_key, tflite_model, info)
+    if args.quantize_budget is not None:
+        # Sin --quantize-budget se usará el modo elegido: guardar el resultado
+        # también con esa clave para que train_all lo restaure tal cual
+        plain_args = argparse.Namespace(**{**vars(args), 'quantize_budget': None})
+        plain_key = training_key('action_recommender', __file__, plain_args, data_files)
+        store.put('train', plain_key, tflite_model, info)
+    if args.compress:
+        compare_compressed(baseline_model, tflite_model, X_test, y_test, EVAL_METRIC,
+                           mode=args.quantization, representative_data=X_train,
+                           label=args.compress)
+    if args.quantization == 'int8':
+        compare_with_float(model, tflite_model, X_test, y_test, metric=EVAL_METRIC)
+
+    profiler.finish(output_path if args.profile else None)
 
     print("\n¡Entrenamiento completado!")
     return 0
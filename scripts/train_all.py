@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Entrena los cuatro modelos de Tamagotchi en paralelo.
+
+Cada modelo se entrena en su propio proceso (pool con contexto `spawn`,
+así cada worker importa TensorFlow desde cero) con un número limitado de
+hilos de TensorFlow para no sobresuscribir los núcleos. Los `.tflite` se
+escriben en `assets/models/` y la salida de cada script va a un log
+propio en `--log-dir`.
+
+Con núcleos suficientes el tiempo total queda limitado por el modelo más
+lento, no por la suma de los cuatro. Los modelos sin cambios se copian del
+almacén de artefactos (ver `artifact_cache.py`) sin reentrenar; `--force`
+reentrena todos.
+
+Uso:
+    python train_all.py [--jobs N] [--epochs N] [--models NAME ...]
+
+Ejemplo:
+    python train_all.py --jobs 4 --epochs 30
+"""
+
+import argparse
+import contextlib
+import importlib
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+MODELS_DIR = SCRIPTS_DIR.parent / 'assets' / 'models'
+DEFAULT_LOG_DIR = SCRIPTS_DIR / '.train_logs'
+
+# modelo -> módulo de entrenamiento
+MODELS = {
+    'action_predictor': 'train_action_predictor',
+    'critical_time': 'train_critical_time',
+    'emotion_classifier': 'train_emotion_classifier',
+    'action_recommender': 'train_action_recommender',
+}
+
+
+def limit_threads(threads: int):
+    """Limita los hilos de TF/BLAS; debe llamarse antes de importar TensorFlow."""
+    os.environ['TF_NUM_INTRAOP_THREADS'] = str(threads)
+    os.environ['TF_NUM_INTEROP_THREADS'] = '1'
+    os.environ['OMP_NUM_THREADS'] = str(threads)
+    os.environ.setdefault('TF_CPP_MIN_LOG_LEVEL', '2')
+
+
+def _train_worker(name: str, argv: list, threads: int, log_path: str) -> dict:
+    """Entrena un modelo dentro de un proceso del pool."""
+    # Los hilos de TensorFlow se limitan con variables de entorno y no con
+    # tf.config; así un modelo reutilizado del almacén de artefactos no paga
+    # la importación de TensorFlow
+    limit_threads(threads)
+    start = time.perf_counter()
+
+    with open(log_path, 'w') as log, contextlib.redirect_stdout(log):
+        module = importlib.import_module(MODELS[name])
+        # Solo el módulo del script: TensorFlow se importa después, dentro de main()
+        script_import_seconds = time.perf_counter() - start
+
+        try:
+            status = module.main(argv)
+        except Exception as e:  # el error queda en el log y en el resumen
+            print(f"Error entrenando {name}: {e!r}")
+            status = 1
+
+    return {
+        'name': name,
+        'status': status or 0,
+        'script_import_seconds': script_import_seconds,
+        'seconds': time.perf_counter() - start,
+        'log': log_path,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Entrenar los cuatro modelos de Tamagotchi en paralelo'
+    )
+    parser.add_argument('--models', '-m', nargs='+', choices=list(MODELS),
+                        default=list(MODELS),
+                        help='Modelos a entrenar (default: todos)')
+    parser.add_argument('--jobs', '-j', type=int, default=None,
+                        help='Procesos en paralelo (default: min(modelos, núcleos))')
+    parser.add_argument('--threads', type=int, default=None,
+                        help='Hilos de TensorFlow por proceso (default: núcleos / jobs)')
+    parser.add_argument('--epochs', '-e', type=int, default=None,
+                        help='Epochs para todos los modelos (default: el de cada script)')
+    parser.add_argument('--early-stopping', action='store_true',
+                        help='Pasar --early-stopping a todos los modelos')
+    parser.add_argument('--time-budget', type=float, default=None,
+                        help='Presupuesto de entrenamiento en segundos por modelo')
+    parser.add_argument('--force', action='store_true',
+                        help='Reentrenar aunque el almacén de artefactos tenga el modelo')
+    parser.add_argument('--output-dir', '-o', type=str, default=str(MODELS_DIR),
+                        help='Directorio de salida de los .tflite')
+    parser.add_argument('--log-dir', type=str, default=str(DEFAULT_LOG_DIR),
+                        help='Directorio para los logs de cada modelo')
+
+    args = parser.parse_args(argv)
+
+    cpus = os.cpu_count() or 1
+    jobs = args.jobs or min(len(args.models), cpus)
+    threads = args.threads or max(1, cpus // jobs)
+
+    output_dir = Path(args.output_dir)
+    log_dir = Path(args.log_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    log_dir.mkdir(parents=True, exist_ok=True)
+
+    print("Entrenamiento de todos los modelos de Tamagotchi")
+    print("=" * 55)
+    print(f"   Modelos: {', '.join(args.models)}")
+    print(f"   Procesos: {jobs}, hilos de TF por proceso: {threads}")
+
+    results = []
+    start = time.perf_counter()
+
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=context) as pool:
+        futures = []
+        for name in args.models:
+            model_argv = ['--output', str(output_dir / f'{name}.tflite')]
+            if args.epochs is not None:
+                model_argv += ['--epochs', str(args.epochs)]
+            if args.early_stopping:
+                model_argv.append('--early-stopping')
+            if args.time_budget is not None:
+                model_argv += ['--time-budget', str(args.time_budget)]
+            if args.force:
+                model_argv.append('--force')
+            log_path = str(log_dir / f'{name}.log')
+            futures.append(pool.submit(_train_worker, name, model_argv, threads, log_path))
+
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            mark = 'OK' if result['status'] == 0 else 'ERROR'
+            print(f"   [{mark}] {result['name']} en {result['seconds']:.1f} s")
+
+    wall_seconds = time.perf_counter() - start
+    sum_seconds = sum(r['seconds'] for r in results)
+
+    print(f"\nResumen de tiempos:")
+    for r in sorted(results, key=lambda r: r['seconds'], reverse=True):
+        print(f"   {r['name']:<20} {r['seconds']:>7.1f} s "
+              f"(import del script {r['script_import_seconds']:.1f} s)  log: {r['log']}")
+    print(f"   {'Suma secuencial':<20} {sum_seconds:>7.1f} s")
+    print(f"   {'Tiempo total':<20} {wall_seconds:>7.1f} s "
+          f"({sum_seconds / wall_seconds:.1f}x)")
+
+    failed = [r['name'] for r in results if r['status'] != 0]
+    if failed:
+        print(f"\nFallaron: {', '.join(failed)}")
+        return 1
+
+    print(f"\n¡Modelos guardados en {output_dir}!")
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
@@ -30,19 +30,35 @@ import numpy as np
 import os
 from pathlib import Path
 
-try:
-    import tensorflow as tf
-    from tensorflow import keras
-    from tensorflow.keras import layers
-    TF_AVAILABLE = True
-except ImportError:
-    TF_AVAILABLE = False
-    print("TensorFlow no está instalado. Instálalo con: pip install tensorflow")
+from artifact_cache import (DEFAULT_STORE_DIR, ArtifactStore, local_sources,
+                            skipped_run_outputs, training_key)
+from compression import COMPRESSION_MODES, compare_compressed, compress_model, tfmot_available
+from dataset_cache import DEFAULT_CACHE_DIR, load_or_build
+from evaluation import RegressionMetrics, evaluate_keras, print_report, write_report
+from profiling import TRACE_MODES, PhaseProfiler
+from quantization import choose_mode, conversion_mode
+from sharded_generation import data_npy_files, load_sharded
+from tflite_utils import compare_with_float, convert_keras_model
+from training_utils import (fit_model, import_tensorflow, run_data_only,
+                            tensorflow_available)
+
+# TensorFlow se importa bajo demanda con load_tensorflow() para que los
+# modos sin entrenamiento (--help, --data-only) arranquen rápido
+TF_AVAILABLE = tensorflow_available()
+tf = keras = layers = None
+
+
+def load_tensorflow():
+    """Importa TensorFlow/Keras en este módulo la primera vez que se necesita."""
+    global tf, keras, layers
+    if tf is None:
+        tf, keras, layers = import_tensorflow()
 
 
 # Constantes del modelo
 INPUT_SIZE = 20
 OUTPUT_SIZE = 4
+EVAL_METRIC = 'mae'  # métrica principal de validación
 METRICS = ['hunger', 'happiness', 'energy', 'health']
 
 # Umbrales críticos (para calcular tiempo hasta crítico)
@@ -61,18 +77,39 @@ DECAY_RATES = {
     'health': -0.02,     # Decrece ~1.2/hora
 }
 
+# Versiones en array (orden METRICS) para el cálculo vectorizado
+METRIC_THRESHOLDS = np.array([CRITICAL_THRESHOLDS[m] for m in METRICS])
+METRIC_DECAY_RATES = np.array([DECAY_RATES[m] for m in METRICS])
+METRIC_RISES = np.array([m == 'hunger' for m in METRICS])  # hunger sube hasta crítico
 
-def create_model():
-    """Crea la arquitectura del modelo CriticalTimePredictor."""
+# Desviación estándar del ruido de targets (minutos)
+TARGET_NOISE_STD = 5.0
+
+
+def create_model(units: tuple = (32, 16), dropout: float = 0.0,
+                 learning_rate: float = 0.001):
+    """
+    Crea la arquitectura del modelo CriticalTimePredictor.
+
+    Los valores por defecto son la arquitectura que se distribuye; los
+    parámetros permiten a `hparam_search.py` explorar variantes.
+
+    Args:
+        units: Neuronas de las dos capas ocultas
+        dropout: Tasa de dropout tras la primera capa (0 = sin Dropout)
+        learning_rate: Learning rate de Adam
+    """
+    load_tensorflow()
     model = keras.Sequential([
         layers.Input(shape=(INPUT_SIZE,), name='input'),
-        layers.Dense(32, activation='relu', name='dense_1'),
-        layers.Dense(16, activation='relu', name='dense_2'),
+        layers.Dense(units[0], activation='relu', name='dense_1'),
+        *([layers.Dropout(dropout, name='dropout')] if dropout > 0 else []),
+        layers.Dense(units[1], activation='relu', name='dense_2'),
         layers.Dense(OUTPUT_SIZE, activation='linear', name='output')
     ])
 
     model.compile(
-        optimizer='adam',
+        optimizer=keras.optimizers.Adam(learning_rate=learning_rate),
         loss='mse',
         metrics=['mae']
     )
@@ -114,51 +151,154 @@ def calculate_time_to_critical(metric_name: str, current_value: float,
     return np.clip(time_to_critical, 0, 180)
 
 
-def generate_synthetic_data(n_samples: int = 2000) -> tuple:
+def calculate_time_to_critical_batch(current_values: np.ndarray,
+                                     decay_rates: np.ndarray,
+                                     user_activity: np.ndarray) -> np.ndarray:
+    """
+    Versión vectorizada de `calculate_time_to_critical` para las 4 métricas.
+
+    Args:
+        current_values: Matriz (n, 4) de valores actuales (0-100), en orden METRICS
+        decay_rates: Matriz (n, 4) de tasas de cambio por minuto
+        user_activity: Vector (n,) con el factor de actividad del usuario (0-1)
+
+    Returns:
+        Matriz (n, 4) de minutos hasta crítico (0-180, clamped)
+    """
+    adjusted_rate = decay_rates * (1 - user_activity[:, None] * 0.5)
+
+    distance = np.where(
+        METRIC_RISES,
+        METRIC_THRESHOLDS - current_values,
+        current_values - METRIC_THRESHOLDS,
+    )
+    rate = np.maximum(np.where(METRIC_RISES, adjusted_rate, np.abs(adjusted_rate)), 0.01)
+
+    time_to_critical = np.where(distance > 0, distance / rate, 0.0)
+    return np.clip(time_to_critical, 0, 180)
+
+
+# Rangos de las variables aleatorias por muestra, en el orden en que se consumen:
+#   0-3 métricas, 4-7 factor de decaimiento, 8-11 tiempo desde acción,
+#   12 proactive, 13 frequency, 14 consistency, 15 hour, 16 weekday,
+#   17 hours_since_last, 18 sorteo de is_active_time
+_UNIFORM_LOW = np.array([0.0] * 4 + [0.5] * 4 + [0.0] * 11)
+_UNIFORM_SPAN = np.array([100.0] * 4 + [1.0] * 4 + [1.0] * 11)
+
+# Escala para normalizar las tasas de decaimiento en los features
+_DECAY_FEATURE_SCALE = np.array([0.2, 0.1, 0.1, 0.05])
+
+
+def _split_streams(rng: np.random.Generator) -> tuple:
+    """Deriva streams independientes para features y ruido de targets."""
+    feature_rng, noise_rng = rng.spawn(2)
+    return feature_rng, noise_rng
+
+
+def generate_synthetic_batch(n_samples: int, rng: np.random.Generator,
+                             chunk_size: int = 1_000_000, target_noise: bool = True) -> tuple:
+    """
+    Genera datos sintéticos con operaciones vectorizadas.
+
+    Consume los streams aleatorios en el mismo orden que
+    `generate_synthetic_data_loop`, por lo que ambos producen exactamente
+    los mismos arrays para el mismo generador. Se procesa en bloques de
+    `chunk_size` filas para acotar la memoria temporal en float64.
+
+    Con `target_noise=False` los targets se generan sin ruido, para
+    aplicarlo después con `add_target_noise` dentro del pipeline tf.data.
+
+    Returns:
+        tuple: (X, y) arrays float32 de forma (n, 20) y (n, 4)
+    """
+    feature_rng, noise_rng = _split_streams(rng)
+
+    X = np.empty((n_samples, INPUT_SIZE), dtype=np.float32)
+    y = np.empty((n_samples, OUTPUT_SIZE), dtype=np.float32)
+
+    for start in range(0, n_samples, chunk_size):
+        stop = min(start + chunk_size, n_samples)
+        n = stop - start
+
+        u = _UNIFORM_LOW + _UNIFORM_SPAN * feature_rng.random((n, len(_UNIFORM_LOW)))
+        metrics = u[:, 0:4]
+        decay = np.abs(METRIC_DECAY_RATES) * u[:, 4:8]
+        proactive_ratio = u[:, 12]
+        interaction_frequency = u[:, 13]
+        consistency_score = u[:, 14]
+        user_activity = (proactive_ratio + interaction_frequency + consistency_score) / 3
+
+        Xc = X[start:stop]
+        Xc[:, 0:4] = metrics / 100
+        Xc[:, 4:8] = decay / _DECAY_FEATURE_SCALE
+        Xc[:, 8:12] = u[:, 8:12]
+        Xc[:, 12] = proactive_ratio
+        Xc[:, 13] = 1 - proactive_ratio
+        Xc[:, 14] = interaction_frequency
+        Xc[:, 15] = consistency_score
+        Xc[:, 16:19] = u[:, 15:18]
+        Xc[:, 19] = u[:, 18] > 0.3
+
+        targets = calculate_time_to_critical_batch(metrics, decay, user_activity)
+        if target_noise:
+            targets = targets + noise_rng.normal(0, TARGET_NOISE_STD, size=(n, OUTPUT_SIZE))
+        y[start:stop] = np.clip(targets, 0, 180)
+
+    return X, y
+
+
+def generate_synthetic_data(n_samples: int = 2000, seed: int = 42,
+                            target_noise: bool = True) -> tuple:
     """
     Genera datos sintéticos para entrenamiento.
 
     Returns:
         tuple: (X, y) arrays de numpy
     """
-    np.random.seed(42)
+    rng = np.random.default_rng(seed)
+    return generate_synthetic_batch(n_samples, rng, target_noise=target_noise)
+
+
+def add_target_noise(X, y):
+    """Agrega ruido gaussiano a los targets dentro del pipeline tf.data."""
+    noise = tf.random.normal(tf.shape(y), stddev=TARGET_NOISE_STD)
+    return X, tf.clip_by_value(y + noise, 0.0, 180.0)
+
+
+def generate_synthetic_data_loop(n_samples: int = 2000, seed: int = 42) -> tuple:
+    """
+    Genera datos sintéticos muestra por muestra con `calculate_time_to_critical`.
+
+    Ruta escalar de referencia para validar y medir `generate_synthetic_batch`.
+
+    Returns:
+        tuple: (X, y) arrays de numpy
+    """
+    feature_rng, noise_rng = _split_streams(np.random.default_rng(seed))
 
     X = []
     y = []
 
     for _ in range(n_samples):
-        # Métricas actuales (0-100, luego normalizadas a 0-1)
-        hunger = np.random.uniform(0, 100)
-        happiness = np.random.uniform(0, 100)
-        energy = np.random.uniform(0, 100)
-        health = np.random.uniform(0, 100)
+        (hunger, happiness, energy, health,
+         decay_hunger, decay_happiness, decay_energy, decay_health,
+         time_since_feed, time_since_play, time_since_rest, time_since_clean,
+         proactive_ratio, interaction_frequency, consistency_score,
+         time_of_day, day_of_week, hours_since_last,
+         active_draw) = _UNIFORM_LOW + _UNIFORM_SPAN * feature_rng.random(len(_UNIFORM_LOW))
 
         # Tasas de decaimiento estimadas (variación aleatoria)
-        decay_hunger = DECAY_RATES['hunger'] * np.random.uniform(0.5, 1.5)
-        decay_happiness = abs(DECAY_RATES['happiness']) * np.random.uniform(0.5, 1.5)
-        decay_energy = abs(DECAY_RATES['energy']) * np.random.uniform(0.5, 1.5)
-        decay_health = abs(DECAY_RATES['health']) * np.random.uniform(0.5, 1.5)
-
-        # Tiempo desde última acción de cada tipo (normalizado a 24h)
-        time_since_feed = np.random.uniform(0, 1)
-        time_since_play = np.random.uniform(0, 1)
-        time_since_rest = np.random.uniform(0, 1)
-        time_since_clean = np.random.uniform(0, 1)
-
-        # Patrones de usuario
-        proactive_ratio = np.random.uniform(0, 1)
+        decay_hunger = DECAY_RATES['hunger'] * decay_hunger
+        decay_happiness = abs(DECAY_RATES['happiness']) * decay_happiness
+        decay_energy = abs(DECAY_RATES['energy']) * decay_energy
+        decay_health = abs(DECAY_RATES['health']) * decay_health
+
         reactive_ratio = 1 - proactive_ratio
-        interaction_frequency = np.random.uniform(0, 1)
-        consistency_score = np.random.uniform(0, 1)
 
         # Actividad general del usuario
         user_activity = (proactive_ratio + interaction_frequency + consistency_score) / 3
 
-        # Contexto temporal
-        time_of_day = np.random.uniform(0, 1)
-        day_of_week = np.random.uniform(0, 1)
-        hours_since_last = np.random.uniform(0, 1)
-        is_active_time = 1.0 if np.random.random() > 0.3 else 0.0
+        is_active_time = 1.0 if active_draw > 0.3 else 0.0
 
         # Construir features
         features = [
@@ -208,7 +348,7 @@ def generate_synthetic_data(n_samples: int = 2000) -> tuple:
         )
 
         # Agregar ruido a los targets para robustez
-        noise = np.random.normal(0, 5, 4)
+        noise = noise_rng.normal(0, TARGET_NOISE_STD, 4)
         targets = np.clip([
             minutes_to_hunger + noise[0],
             minutes_to_happiness + noise[1],
@@ -222,14 +362,11 @@ def generate_synthetic_data(n_samples: int = 2000) -> tuple:
     return np.array(X, dtype=np.float32), np.array(y, dtype=np.float32)
 
 
-def convert_to_tflite(model, output_path: str, quantize: bool = True):
+def convert_to_tflite(model, output_path: str, mode: str = 'dynamic',
+                      representative_data=None, store=None, int8_io: bool = False) -> bytes:
     """Convierte el modelo Keras a TensorFlow Lite."""
-    converter = tf.lite.TFLiteConverter.from_keras_model(model)
-
-    if quantize:
-        converter.optimizations = [tf.lite.Optimize.DEFAULT]
-
-    tflite_model = converter.convert()
+    tflite_model = convert_keras_model(model, mode=mode, representative_data=representative_data,
+                                      int8_io=int8_io, store=store)
 
     with open(output_path, 'wb') as f:
         f.write(tflite_model)
@@ -238,32 +375,24 @@ def convert_to_tflite(model, output_path: str, quantize: bool = True):
     print(f"Modelo guardado en: {output_path}")
     print(f"   Tamaño: {size_kb:.2f} KB")
 
+    return tflite_model
 
-def evaluate_model(model, X_test, y_test):
-    """Evalúa el modelo y muestra métricas."""
-    loss, mae = model.evaluate(X_test, y_test, verbose=0)
-    print(f"\nMétricas de evaluación:")
-    print(f"   MSE Loss: {loss:.4f}")
-    print(f"   MAE: {mae:.4f} minutos")
 
-    # Predicciones para análisis
-    predictions = model.predict(X_test, verbose=0)
-
-    print(f"\nEstadísticas por métrica:")
-    for i, metric in enumerate(METRICS):
-        pred_mean = np.mean(predictions[:, i])
-        pred_std = np.std(predictions[:, i])
-        true_mean = np.mean(y_test[:, i])
-        true_std = np.std(y_test[:, i])
+def evaluate_model(model, X_test, y_test, report_path=None):
+    """
+    Evalúa el modelo con una sola pasada de predicción (ver `evaluation.py`).
 
-        error = np.mean(np.abs(predictions[:, i] - y_test[:, i]))
-        print(f"   {metric}:")
-        print(f"      Predicho: {pred_mean:.1f} ± {pred_std:.1f} min")
-        print(f"      Real:     {true_mean:.1f} ± {true_std:.1f} min")
-        print(f"      MAE:      {error:.1f} min")
+    Si se indica `report_path` (el .tflite de salida), escribe las
+    métricas completas en `<modelo>.eval.json` junto a él.
+    """
+    result = evaluate_keras(model, X_test, y_test, RegressionMetrics(METRICS, unit='min'))
+    print_report(result)
+    if report_path is not None:
+        write_report(result, report_path, 'critical_time')
+    return result
 
 
-def main():
+def main(argv=None):
     parser = argparse.ArgumentParser(
         description='Entrenar modelo CriticalTimePredictor para Tamagotchi'
     )
@@ -285,26 +414,195 @@ def main():
         default=3000,
         help='Número de muestras sintéticas (default: 3000)'
     )
+    parser.add_argument(
+        '--data-npy',
+        type=str,
+        default=None,
+        metavar='DIR',
+        help='Entrenar con el X.npy/y.npy de sharded_generation.py en DIR (memory-mapped; '
+             'requiere --pipeline tfdata)'
+    )
+    parser.add_argument(
+        '--seed',
+        type=int,
+        default=42,
+        help='Semilla para los datos sintéticos (default: 42)'
+    )
     parser.add_argument(
         '--no-quantize',
         action='store_true',
         help='No aplicar cuantización al modelo'
     )
+    parser.add_argument(
+        '--int8',
+        action='store_true',
+        help='Cuantización entera completa (INT8) con datos representativos'
+    )
+    parser.add_argument(
+        '--int8-io',
+        action='store_true',
+        help='Con --int8, entrada y salida int8 (sin esto siguen en float32, como las '
+             'alimenta MLService en la app)'
+    )
+    parser.add_argument(
+        '--quantize-budget',
+        type=float,
+        default=None,
+        metavar='BUDGET',
+        help='Comparar todos los modos de cuantización con el modelo entrenado y '
+             'quedarse con el más pequeño que degrade <= BUDGET (ver quantization.py)'
+    )
+    parser.add_argument(
+        '--pipeline',
+        choices=['numpy', 'tfdata'],
+        default='numpy',
+        help='Entrada de entrenamiento: arrays en memoria o pipeline tf.data (default: numpy)'
+    )
+    parser.add_argument(
+        '--shuffle-buffer',
+        type=int,
+        default=10000,
+        help='Tamaño del buffer de mezcla del pipeline tf.data (default: 10000)'
+    )
+    parser.add_argument(
+        '--cache-dir',
+        type=str,
+        default=str(DEFAULT_CACHE_DIR),
+        help='Directorio de la caché de datasets'
+    )
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='No leer ni escribir la caché de datasets'
+    )
+    parser.add_argument(
+        '--early-stopping',
+        action='store_true',
+        help='Detener cuando val_loss deja de mejorar y reducir el learning rate en mesetas'
+    )
+    parser.add_argument(
+        '--patience',
+        type=int,
+        default=5,
+        help='Epochs sin mejora antes de detener con --early-stopping (default: 5)'
+    )
+    parser.add_argument(
+        '--time-budget',
+        type=float,
+        default=None,
+        help='Tiempo máximo de entrenamiento en segundos'
+    )
+    parser.add_argument(
+        '--artifact-dir',
+        type=str,
+        default=str(DEFAULT_STORE_DIR),
+        help='Almacén de artefactos .tflite para no reentrenar modelos sin cambios'
+    )
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help='Entrenar aunque exista un .tflite idéntico en el almacén de artefactos'
+    )
+    parser.add_argument(
+        '--eval-report',
+        action='store_true',
+        help='Escribir las métricas de evaluación completas en JSON junto al .tflite'
+    )
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help='Escribir un reporte JSON de tiempos y memoria por fase junto al .tflite'
+    )
+    parser.add_argument(
+        '--profile-trace',
+        choices=TRACE_MODES,
+        default=None,
+        help='Trazar model.fit con cProfile o con el profiler de TensorFlow'
+    )
+    parser.add_argument(
+        '--compress',
+        choices=COMPRESSION_MODES,
+        default=None,
+        help='Podar y/o agrupar los pesos con un ajuste corto antes de convertir (requiere tfmot)'
+    )
+    parser.add_argument(
+        '--sparsity',
+        type=float,
+        default=0.5,
+        help='Dispersión objetivo de la poda (default: 0.5)'
+    )
+    parser.add_argument(
+        '--clusters',
+        type=int,
+        default=16,
+        help='Centroides por capa del clustering (default: 16)'
+    )
+    parser.add_argument(
+        '--compress-epochs',
+        type=int,
+        default=2,
+        help='Epochs del ajuste de compresión (default: 2)'
+    )
+    parser.add_argument(
+        '--data-only',
+        action='store_true',
+        help='Solo generar/validar/cachear el dataset y salir, sin cargar TensorFlow'
+    )
 
-    args = parser.parse_args()
-
-    if not TF_AVAILABLE:
-        print("TensorFlow es requerido para entrenar el modelo")
-        return 1
+    args = parser.parse_args(argv)
+    if args.int8_io and not args.int8:
+        parser.error('--int8-io requiere --int8')
+    if args.quantize_budget is not None and (args.int8 or args.no_quantize):
+        parser.error('--quantize-budget no se combina con --int8 ni --no-quantize')
+    args.quantization = conversion_mode('critical_time', args)
+    data_files = data_npy_files(parser, args, 'critical_time')
 
     print("Entrenamiento de CriticalTimePredictor para Tamagotchi")
     print("=" * 55)
 
+    # Reutilizar el .tflite si nada de lo que define el modelo cambió
+    store = ArtifactStore(args.artifact_dir)
+    artifact_key = training_key('critical_time', __file__, args, data_files)
+    if not args.force and not args.data_only and store.restore('train', artifact_key, args.output):
+        print(f"\nSin cambios: {args.output} reutilizado del almacén de artefactos")
+        for flag in skipped_run_outputs(args):
+            print(f"   {flag} omitido: no hubo entrenamiento (usar --force)")
+        return 0
+
+    profiler = PhaseProfiler('critical_time', trace=args.profile_trace)
+
     # Generar datos
-    print(f"\nGenerando {args.samples} muestras sintéticas...")
-    X, y = generate_synthetic_data(args.samples)
+    # En modo tfdata el ruido de targets se aplica dentro del pipeline
+    target_noise = args.pipeline == 'numpy'
+    with profiler.phase('data'):
+        if args.data_npy:
+            print(f"\nAbriendo dataset por shards: {args.data_npy}")
+            X, y = load_sharded(args.data_npy)
+        else:
+            print(f"\nGenerando {args.samples} muestras sintéticas...")
+            X, y = load_or_build(
+                'critical_time',
+                {'samples': args.samples, 'seed': args.seed, 'target_noise': target_noise},
+                lambda: generate_synthetic_data(args.samples, seed=args.seed,
+                                                target_noise=target_noise),
+                source_files=local_sources(__file__),
+                cache_dir=None if args.no_cache else args.cache_dir
+            )
     print(f"   Total de muestras: {len(X)}")
 
+    if args.data_only:
+        return run_data_only(X, y, INPUT_SIZE, OUTPUT_SIZE)
+
+    if not TF_AVAILABLE:
+        print("TensorFlow es requerido para entrenar el modelo")
+        return 1
+    if args.compress and not tfmot_available():
+        print("--compress requiere tensorflow-model-optimization")
+        print("   Instálalo con: pip install tensorflow-model-optimization")
+        return 1
+    with profiler.phase('tf_import'):
+        load_tensorflow()
+
     # Dividir en train/test
     split_idx = int(len(X) * 0.8)
     X_train, X_test = X[:split_idx], X[split_idx:]
@@ -318,22 +616,63 @@ def main():
     model.summary()
 
     print(f"\nEntrenando por {args.epochs} epochs...")
-    history = model.fit(
-        X_train, y_train,
-        epochs=args.epochs,
-        batch_size=32,
-        validation_split=0.2,
-        verbose=1
-    )
+    with profiler.phase('fit'):
+        history = fit_model(
+            model, X_train, y_train,
+            epochs=args.epochs,
+            batch_size=32,
+            pipeline=args.pipeline,
+            shuffle_buffer=args.shuffle_buffer,
+            seed=args.seed,
+            # Los .npy por shards ya traen el ruido de targets
+            map_fn=add_target_noise if args.pipeline == 'tfdata' and not args.data_npy else None,
+            early_stopping=args.early_stopping,
+            patience=args.patience,
+            time_budget=args.time_budget,
+            profiler=profiler,
+        )
 
     # Evaluar
-    evaluate_model(model, X_test, y_test)
+    with profiler.phase('evaluate'):
+        evaluate_model(model, X_test, y_test,
+                       report_path=args.output if args.eval_report else None)
+
+    baseline_model = model
+    if args.compress:
+        with profiler.phase('compress'):
+            model = compress_model(model, args.compress, X_train, y_train, EVAL_METRIC,
+                                   sparsity=args.sparsity, clusters=args.clusters,
+                                   epochs=args.compress_epochs)
 
     # Convertir a TFLite
     print(f"\nConvirtiendo a TensorFlow Lite...")
     output_path = Path(args.output)
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    convert_to_tflite(model, str(output_path), quantize=not args.no_quantize)
+    with profiler.phase('convert'):
+        if args.quantize_budget is not None:
+            args.quantization = choose_mode('critical_time', model, X_train, X_test, y_test,
+                                            EVAL_METRIC, args.quantize_budget, output_path,
+                                            store=store)
+        tflite_model = convert_to_tflite(
+            model, str(output_path), mode=args.quantization, int8_io=args.int8_io,
+            representative_data=X_train, store=store
+        )
+    info = {'name': 'critical_time', 'quantization': args.quantization}
+    store.put('train', artifact_key, tflite_model, info)
+    if args.quantize_budget is not None:
+        # Sin --quantize-budget se usará el modo elegido: guardar el resultado
+        # también con esa clave para que train_all lo restaure tal cual
+        plain_args = argparse.Namespace(**{**vars(args), 'quantize_budget': None})
+        plain_key = training_key('critical_time', __file__, plain_args, data_files)
+        store.put('train', plain_key, tflite_model, info)
+    if args.compress:
+        compare_compressed(baseline_model, tflite_model, X_test, y_test, EVAL_METRIC,
+                           mode=args.quantization, representative_data=X_train,
+                           label=args.compress)
+    if args.quantization == 'int8':
+        compare_with_float(model, tflite_model, X_test, y_test, metric=EVAL_METRIC)
+
+    profiler.finish(output_path if args.profile else None)
 
     print("\n¡Entrenamiento completado!")
     return 0
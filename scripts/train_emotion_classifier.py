@@ -28,38 +28,68 @@ Salidas (8 probabilidades):
 
 Uso:
     python train_emotion_classifier.py [--epochs N] [--output PATH]
+    python train_emotion_classifier.py --label features.npy
 """
 
 import argparse
 import numpy as np
 from pathlib import Path
 
-try:
-    import tensorflow as tf
-    from tensorflow import keras
-    from tensorflow.keras import layers
-    TF_AVAILABLE = True
-except ImportError:
-    TF_AVAILABLE = False
-    print("TensorFlow no está instalado.")
+from artifact_cache import (DEFAULT_STORE_DIR, ArtifactStore, local_sources,
+                            skipped_run_outputs, training_key)
+from compression import COMPRESSION_MODES, compare_compressed, compress_model, tfmot_available
+from dataset_cache import DEFAULT_CACHE_DIR, load_or_build
+from evaluation import ClassificationMetrics, evaluate_keras, print_report, write_report
+from profiling import TRACE_MODES, PhaseProfiler
+from quantization import choose_mode, conversion_mode
+from sharded_generation import data_npy_files, load_sharded
+from tflite_utils import compare_with_float, convert_keras_model
+from training_utils import (fit_model, import_tensorflow, one_hot, run_data_only,
+                            sample_categorical, tensorflow_available)
+
+# TensorFlow se importa bajo demanda con load_tensorflow() para que los
+# modos sin entrenamiento (--help, --data-only) arranquen rápido
+TF_AVAILABLE = tensorflow_available()
+tf = keras = layers = None
+
+
+def load_tensorflow():
+    """Importa TensorFlow/Keras en este módulo la primera vez que se necesita."""
+    global tf, keras, layers
+    if tf is None:
+        tf, keras, layers = import_tensorflow()
 
 
 INPUT_SIZE = 16
 OUTPUT_SIZE = 8
+EVAL_METRIC = 'accuracy'  # métrica principal de validación
 EMOTIONS = ['ecstatic', 'happy', 'content', 'neutral', 'bored', 'sad', 'lonely', 'anxious']
 
 
-def create_model():
-    """Crea la arquitectura del modelo EmotionClassifier."""
+def create_model(units: tuple = (24, 16), dropout: float = 0.0,
+                 learning_rate: float = 0.001):
+    """
+    Crea la arquitectura del modelo EmotionClassifier.
+
+    Los valores por defecto son la arquitectura que se distribuye; los
+    parámetros permiten a `hparam_search.py` explorar variantes.
+
+    Args:
+        units: Neuronas de las dos capas ocultas
+        dropout: Tasa de dropout tras la primera capa (0 = sin Dropout)
+        learning_rate: Learning rate de Adam
+    """
+    load_tensorflow()
     model = keras.Sequential([
         layers.Input(shape=(INPUT_SIZE,), name='input'),
-        layers.Dense(24, activation='relu', name='dense_1'),
-        layers.Dense(16, activation='relu', name='dense_2'),
+        layers.Dense(units[0], activation='relu', name='dense_1'),
+        *([layers.Dropout(dropout, name='dropout')] if dropout > 0 else []),
+        layers.Dense(units[1], activation='relu', name='dense_2'),
         layers.Dense(OUTPUT_SIZE, activation='softmax', name='output')
     ])
 
     model.compile(
-        optimizer='adam',
+        optimizer=keras.optimizers.Adam(learning_rate=learning_rate),
         loss='categorical_crossentropy',
         metrics=['accuracy']
     )
@@ -98,8 +128,94 @@ def determine_emotion(hunger, happiness, energy, health, bond_level,
     return 0  # ecstatic
 
 
-def generate_synthetic_data(n_samples: int = 3000) -> tuple:
+def determine_emotion_batch(hunger, happiness, energy, health, bond_level,
+                            session_interactions) -> np.ndarray:
+    """
+    Versión vectorizada de `determine_emotion` para arrays de métricas.
+
+    Las reglas se evalúan en el mismo orden de prioridad; `np.select`
+    asigna a cada fila la primera regla que se cumple.
+
+    Returns:
+        Array (n,) con el índice de la emoción (0-7)
+    """
+    conditions = [
+        (health < 0.3) | (hunger > 0.8),                   # anxious
+        (bond_level < 0.2) & (session_interactions < 0.1),  # lonely
+        happiness < 0.2,                                    # sad
+        (happiness < 0.35) & (energy < 0.3),                # bored
+        happiness < 0.45,                                   # neutral
+        happiness < 0.65,                                   # content
+        happiness < 0.85,                                   # happy
+    ]
+    return np.select(conditions, [7, 6, 5, 4, 3, 2, 1], default=0)  # ecstatic
+
+
+def emotion_distribution(base_emotions: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """
+    Construye la distribución suave de 8 emociones para cada fila.
+
+    La emoción base recibe un peso en [0.6, 0.9) y el resto un peso
+    inversamente proporcional a su distancia a la base.
+
+    Returns:
+        Matriz (n, 8) de probabilidades normalizadas
+    """
+    n = base_emotions.shape[0]
+    distance = np.abs(np.arange(OUTPUT_SIZE) - base_emotions[:, None])
+    probs = 1.0 / (distance + 1)
+    probs[np.arange(n), base_emotions] = 0.6 + rng.random(n) * 0.3
+    probs /= probs.sum(axis=1, keepdims=True)
+    return probs
+
+
+def label_emotions(X: np.ndarray, rng: np.random.Generator = None) -> np.ndarray:
+    """
+    Etiqueta una matriz de features (n, 16) con las reglas de emoción.
+
+    Sirve tanto para datos sintéticos como para matrices exportadas reales.
+
+    Args:
+        X: Matriz de features con el layout de INPUT_SIZE
+        rng: Si se indica, muestrea cada etiqueta de `emotion_distribution`;
+             si es None, retorna directamente la emoción de las reglas
+
+    Returns:
+        Array (n,) de índices de emoción
+    """
+    base = determine_emotion_batch(
+        X[:, 0], X[:, 1], X[:, 2], X[:, 3],
+        bond_level=X[:, 15],
+        session_interactions=X[:, 13],
+    )
+    if rng is None:
+        return base
+    return sample_categorical(emotion_distribution(base, rng), rng)
+
+
+def generate_synthetic_batch(n_samples: int, rng: np.random.Generator) -> tuple:
+    """
+    Genera un lote de datos sintéticos con operaciones vectorizadas.
+
+    Todos los features son uniformes en [0, 1), así que la matriz se
+    genera de una vez y se etiqueta con `label_emotions`.
+
+    Returns:
+        tuple: (X, y) arrays float32 de forma (n, 16) y (n, 8)
+    """
+    X = rng.random((n_samples, INPUT_SIZE), dtype=np.float32)
+    labels = label_emotions(X, rng)
+    return X, one_hot(labels, OUTPUT_SIZE)
+
+
+def generate_synthetic_data(n_samples: int = 3000, seed: int = 42) -> tuple:
     """Genera datos sintéticos para entrenamiento."""
+    rng = np.random.default_rng(seed)
+    return generate_synthetic_batch(n_samples, rng)
+
+
+def generate_synthetic_data_loop(n_samples: int = 3000) -> tuple:
+    """Genera datos sintéticos muestra por muestra (referencia para benchmarks)."""
     np.random.seed(42)
 
     X = []
@@ -159,12 +275,11 @@ def generate_synthetic_data(n_samples: int = 3000) -> tuple:
     return np.array(X, dtype=np.float32), np.array(y, dtype=np.float32)
 
 
-def convert_to_tflite(model, output_path: str, quantize: bool = True):
+def convert_to_tflite(model, output_path: str, mode: str = 'dynamic',
+                      representative_data=None, store=None, int8_io: bool = False) -> bytes:
     """Convierte el modelo Keras a TensorFlow Lite."""
-    converter = tf.lite.TFLiteConverter.from_keras_model(model)
-    if quantize:
-        converter.optimizations = [tf.lite.Optimize.DEFAULT]
-    tflite_model = converter.convert()
+    tflite_model = convert_keras_model(model, mode=mode, representative_data=representative_data,
+                                      int8_io=int8_io, store=store)
 
     with open(output_path, 'wb') as f:
         f.write(tflite_model)
@@ -173,26 +288,41 @@ def convert_to_tflite(model, output_path: str, quantize: bool = True):
     print(f"Modelo guardado en: {output_path}")
     print(f"   Tamaño: {size_kb:.2f} KB")
 
+    return tflite_model
+
 
-def evaluate_model(model, X_test, y_test):
-    """Evalúa el modelo."""
-    loss, accuracy = model.evaluate(X_test, y_test, verbose=0)
-    print(f"\nMétricas de evaluación:")
-    print(f"   Loss: {loss:.4f}")
-    print(f"   Accuracy: {accuracy:.4f}")
+def evaluate_model(model, X_test, y_test, report_path=None):
+    """
+    Evalúa el modelo con una sola pasada de predicción (ver `evaluation.py`).
+
+    Si se indica `report_path` (el .tflite de salida), escribe las
+    métricas completas en `<modelo>.eval.json` junto a él.
+    """
+    result = evaluate_keras(model, X_test, y_test, ClassificationMetrics(EMOTIONS))
+    print_report(result)
+    if report_path is not None:
+        write_report(result, report_path, 'emotion_classifier')
+    return result
+
+
+def label_feature_file(path: str) -> int:
+    """Etiqueta un archivo .npy de features y guarda `<nombre>_labels.npy`."""
+    X = np.load(path, mmap_mode='r')
+    if X.ndim != 2 or X.shape[1] != INPUT_SIZE:
+        print(f"Forma inválida {X.shape}, se esperaba (n, {INPUT_SIZE})")
+        return 1
 
-    predictions = model.predict(X_test, verbose=0)
-    predicted_classes = np.argmax(predictions, axis=1)
-    true_classes = np.argmax(y_test, axis=1)
+    labels = label_emotions(X).astype(np.int8)
+    output_path = Path(path).with_name(f"{Path(path).stem}_labels.npy")
+    np.save(output_path, labels)
 
-    print(f"\nDistribución de predicciones:")
+    print(f"Etiquetas guardadas en: {output_path}")
     for i, emotion in enumerate(EMOTIONS):
-        pred_count = np.sum(predicted_classes == i)
-        true_count = np.sum(true_classes == i)
-        print(f"   {emotion}: {pred_count} predichas, {true_count} reales")
+        print(f"   {emotion}: {np.count_nonzero(labels == i)}")
+    return 0
 
 
-def main():
+def main(argv=None):
     parser = argparse.ArgumentParser(
         description='Entrenar modelo EmotionClassifier para Tamagotchi'
     )
@@ -200,21 +330,96 @@ def main():
     parser.add_argument('--output', '-o', type=str,
                         default='../assets/models/emotion_classifier.tflite')
     parser.add_argument('--samples', '-s', type=int, default=3000)
+    parser.add_argument('--data-npy', type=str, default=None, metavar='DIR',
+                        help='X.npy/y.npy de sharded_generation.py (requiere --pipeline tfdata)')
+    parser.add_argument('--seed', type=int, default=42)
     parser.add_argument('--no-quantize', action='store_true')
-
-    args = parser.parse_args()
-
-    if not TF_AVAILABLE:
-        print("TensorFlow es requerido")
-        return 1
+    parser.add_argument('--int8', action='store_true',
+                        help='Cuantización entera completa con datos representativos')
+    parser.add_argument('--int8-io', action='store_true',
+                        help='Con --int8, entrada y salida int8 (por defecto siguen en float32)')
+    parser.add_argument('--quantize-budget', type=float, default=None, metavar='BUDGET',
+                        help='Elegir el modo de cuantización más pequeño que degrade <= BUDGET '
+                             '(ver quantization.py)')
+    parser.add_argument('--pipeline', choices=['numpy', 'tfdata'], default='numpy')
+    parser.add_argument('--shuffle-buffer', type=int, default=10000)
+    parser.add_argument('--cache-dir', type=str, default=str(DEFAULT_CACHE_DIR))
+    parser.add_argument('--no-cache', action='store_true')
+    parser.add_argument('--early-stopping', action='store_true',
+                        help='Detener por val_loss y reducir el learning rate en mesetas')
+    parser.add_argument('--patience', type=int, default=5)
+    parser.add_argument('--time-budget', type=float, default=None,
+                        help='Tiempo máximo de entrenamiento en segundos')
+    parser.add_argument('--artifact-dir', type=str, default=str(DEFAULT_STORE_DIR))
+    parser.add_argument('--force', action='store_true',
+                        help='Entrenar aunque el almacén de artefactos tenga el modelo')
+    parser.add_argument('--eval-report', action='store_true',
+                        help='Escribir las métricas de evaluación en JSON junto al .tflite')
+    parser.add_argument('--profile', action='store_true',
+                        help='Escribir un reporte JSON por fase junto al .tflite')
+    parser.add_argument('--profile-trace', choices=TRACE_MODES, default=None)
+    parser.add_argument('--compress', choices=COMPRESSION_MODES, default=None,
+                        help='Podar y/o agrupar pesos antes de convertir (requiere tfmot)')
+    parser.add_argument('--sparsity', type=float, default=0.5)
+    parser.add_argument('--clusters', type=int, default=16)
+    parser.add_argument('--compress-epochs', type=int, default=2)
+    parser.add_argument('--data-only', action='store_true',
+                        help='Solo generar/validar/cachear el dataset, sin TensorFlow')
+    parser.add_argument('--label', type=str,
+                        help='Etiquetar una matriz de features .npy (n, 16) y salir')
+
+    args = parser.parse_args(argv)
+    if args.int8_io and not args.int8:
+        parser.error('--int8-io requiere --int8')
+    if args.quantize_budget is not None and (args.int8 or args.no_quantize):
+        parser.error('--quantize-budget no se combina con --int8 ni --no-quantize')
+    args.quantization = conversion_mode('emotion_classifier', args)
+    data_files = data_npy_files(parser, args, 'emotion_classifier')
+
+    if args.label:
+        return label_feature_file(args.label)
 
     print("Entrenamiento de EmotionClassifier para Tamagotchi")
     print("=" * 55)
 
-    print(f"\nGenerando {args.samples} muestras sintéticas...")
-    X, y = generate_synthetic_data(args.samples)
+    # Reutilizar el .tflite si nada de lo que define el modelo cambió
+    store = ArtifactStore(args.artifact_dir)
+    artifact_key = training_key('emotion_classifier', __file__, args, data_files)
+    if not args.force and not args.data_only and store.restore('train', artifact_key, args.output):
+        print(f"\nSin cambios: {args.output} reutilizado del almacén de artefactos")
+        for flag in skipped_run_outputs(args):
+            print(f"   {flag} omitido: no hubo entrenamiento (usar --force)")
+        return 0
+
+    profiler = PhaseProfiler('emotion_classifier', trace=args.profile_trace)
+
+    with profiler.phase('data'):
+        if args.data_npy:
+            print(f"\nAbriendo dataset por shards: {args.data_npy}")
+            X, y = load_sharded(args.data_npy)
+        else:
+            print(f"\nGenerando {args.samples} muestras sintéticas...")
+            X, y = load_or_build(
+                'emotion_classifier', {'samples': args.samples, 'seed': args.seed},
+                lambda: generate_synthetic_data(args.samples, seed=args.seed),
+                source_files=local_sources(__file__),
+                cache_dir=None if args.no_cache else args.cache_dir
+            )
     print(f"   Total de muestras: {len(X)}")
 
+    if args.data_only:
+        return run_data_only(X, y, INPUT_SIZE, OUTPUT_SIZE)
+
+    if not TF_AVAILABLE:
+        print("TensorFlow es requerido")
+        return 1
+    if args.compress and not tfmot_available():
+        print("--compress requiere tensorflow-model-optimization")
+        print("   Instálalo con: pip install tensorflow-model-optimization")
+        return 1
+    with profiler.phase('tf_import'):
+        load_tensorflow()
+
     split_idx = int(len(X) * 0.8)
     X_train, X_test = X[:split_idx], X[split_idx:]
     y_train, y_test = y[:split_idx], y[split_idx:]
@@ -225,20 +430,59 @@ def main():
     model.summary()
 
     print(f"\nEntrenando por {args.epochs} epochs...")
-    model.fit(
-        X_train, y_train,
-        epochs=args.epochs,
-        batch_size=32,
-        validation_split=0.2,
-        verbose=1
-    )
+    with profiler.phase('fit'):
+        fit_model(
+            model, X_train, y_train,
+            epochs=args.epochs,
+            batch_size=32,
+            pipeline=args.pipeline,
+            shuffle_buffer=args.shuffle_buffer,
+            seed=args.seed,
+            early_stopping=args.early_stopping,
+            patience=args.patience,
+            time_budget=args.time_budget,
+            profiler=profiler,
+        )
+
+    with profiler.phase('evaluate'):
+        evaluate_model(model, X_test, y_test,
+                       report_path=args.output if args.eval_report else None)
 
-    evaluate_model(model, X_test, y_test)
+    baseline_model = model
+    if args.compress:
+        with profiler.phase('compress'):
+            model = compress_model(model, args.compress, X_train, y_train, EVAL_METRIC,
+                                   sparsity=args.sparsity, clusters=args.clusters,
+                                   epochs=args.compress_epochs)
 
     print(f"\nConvirtiendo a TensorFlow Lite...")
     output_path = Path(args.output)
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    convert_to_tflite(model, str(output_path), quantize=not args.no_quantize)
+    with profiler.phase('convert'):
+        if args.quantize_budget is not None:
+            args.quantization = choose_mode('emotion_classifier', model, X_train, X_test, y_test,
+                                            EVAL_METRIC, args.quantize_budget, output_path,
+                                            store=store)
+        tflite_model = convert_to_tflite(
+            model, str(output_path), mode=args.quantization, int8_io=args.int8_io,
+            representative_data=X_train, store=store
+        )
+    info = {'name': 'emotion_classifier', 'quantization': args.quantization}
+    store.put('train', artifact_key, tflite_model, info)
+    if args.quantize_budget is not None:
+        # Sin --quantize-budget se usará el modo elegido: guardar el resultado
+        # también con esa clave para que train_all lo restaure tal cual
+        plain_args = argparse.Namespace(**{**vars(args), 'quantize_budget': None})
+        plain_key = training_key('emotion_classifier', __file__, plain_args, data_files)
+        store.put('train', plain_key, tflite_model, info)
+    if args.compress:
+        compare_compressed(baseline_model, tflite_model, X_test, y_test, EVAL_METRIC,
+                           mode=args.quantization, representative_data=X_train,
+                           label=args.compress)
+    if args.quantization == 'int8':
+        compare_with_float(model, tflite_model, X_test, y_test, metric=EVAL_METRIC)
+
+    profiler.finish(output_path if args.profile else None)
 
     print("\n¡Entrenamiento completado!")
     return 0
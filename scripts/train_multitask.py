@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+Script para entrenar un modelo multitarea que reemplaza a los cuatro modelos de Tamagotchi.
+
+Las cuatro redes usan entradas que se solapan (hambre, felicidad,
+energía, salud, vínculo, hora del día), así que comparten la mayor parte
+de lo que aprenden. Este modelo tiene un adaptador por tipo de entrada,
+un tronco compartido y una cabeza por tarea con la misma activación y
+pérdida que el modelo original:
+
+Arquitectura (por tarea):
+    Input(n) → Dense(32, ReLU) [adaptador] → Dense(48, ReLU) → Dense(32, ReLU) [tronco compartido]
+             → Dense(salidas) [cabeza]
+
+Se exporta un único `.tflite` con una firma por tarea (`action_predictor`,
+`critical_time`, `emotion_classifier`, `action_recommender`), cada una con
+entrada `input` y salida `output`, con las mismas formas que los modelos
+separados. Al terminar se compara contra los cuatro `.tflite` de
+`assets/models/`: tiempo de carga, memoria y costo de un tick (invocar las
+cuatro tareas con una muestra).
+
+Uso:
+    python train_multitask.py [--epochs N] [--samples N] [--output PATH]
+
+Ejemplo:
+    python train_multitask.py --epochs 50 --compare-dir ../assets/models
+"""
+
+import argparse
+import importlib
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from profiling import current_rss_mb
+from tflite_utils import load_interpreter, score_predictions
+from train_all import MODELS, MODELS_DIR
+from training_utils import peak_rss_mb, tensorflow_available, training_callbacks
+
+TF_AVAILABLE = tensorflow_available()
+
+# tarea -> (activación de la cabeza, pérdida); igual que cada create_model()
+HEADS = {
+    'action_predictor': ('softmax', 'categorical_crossentropy'),
+    'critical_time': ('linear', 'mse'),
+    'emotion_classifier': ('softmax', 'categorical_crossentropy'),
+    'action_recommender': ('sigmoid', 'mse'),
+}
+
+
+def task_modules() -> dict:
+    """tarea -> módulo `train_*.py` (tamaños, generador sintético, métrica)."""
+    return {name: importlib.import_module(MODELS[name]) for name in HEADS}
+
+
+def create_model(loss_weights: dict, trunk_units: tuple = (48, 32), adapter_units: int = 32):
+    """
+    Crea el modelo multitarea: un adaptador y una cabeza por tarea sobre un tronco compartido.
+
+    Args:
+        loss_weights: tarea -> peso de su pérdida en la pérdida total
+        trunk_units: Neuronas de las capas compartidas
+        adapter_units: Neuronas del adaptador de cada entrada
+    """
+    from tensorflow import keras
+    from tensorflow.keras import layers
+
+    modules = task_modules()
+    trunk = [layers.Dense(units, activation='relu', name=f'trunk_{i + 1}')
+             for i, units in enumerate(trunk_units)]
+
+    inputs, outputs = {}, {}
+    for name, (activation, _) in HEADS.items():
+        inputs[name] = layers.Input(shape=(modules[name].INPUT_SIZE,), name=name)
+        h = layers.Dense(adapter_units, activation='relu', name=f'{name}_adapter')(inputs[name])
+        for layer in trunk:
+            h = layer(h)
+        outputs[name] = layers.Dense(modules[name].OUTPUT_SIZE, activation=activation,
+                                     name=f'{name}_head')(h)
+
+    model = keras.Model(inputs=inputs, outputs=outputs, name='tamagotchi_multitask')
+    model.compile(
+        optimizer='adam',
+        loss={name: loss for name, (_, loss) in HEADS.items()},
+        loss_weights=loss_weights,
+        metrics={name: [modules[name].EVAL_METRIC] for name in HEADS},
+    )
+    return model
+
+
+def task_model(model, name: str):
+    """Submodelo de una tarea (comparte las capas con el modelo completo)."""
+    from tensorflow import keras
+
+    return keras.Model(model.get_layer(name).input, model.get_layer(f'{name}_head').output)
+
+
+def generate_data(n_samples: int, seed: int) -> tuple:
+    """
+    Genera el dataset sintético de cada tarea con su propio generador.
+
+    Las filas de distintas tareas no están relacionadas entre sí: cada
+    cabeza solo ve su entrada, así que las tareas comparten el tronco
+    pero no las muestras.
+
+    Returns:
+        tuple: (X, y) como dicts tarea -> array
+    """
+    X, y = {}, {}
+    for i, (name, module) in enumerate(task_modules().items()):
+        X[name], y[name] = module.generate_synthetic_data(n_samples, seed=seed + i)
+        X[name] = np.asarray(X[name], dtype=np.float32)
+        y[name] = np.asarray(y[name], dtype=np.float32)
+    return X, y
+
+
+def balanced_loss_weights(y: dict) -> dict:
+    """
+    Pesos que igualan la escala de las pérdidas.
+
+    Las pérdidas MSE se dividen por la varianza de sus targets (los minutos
+    de `critical_time` dominarían si no); las de clasificación pesan 1.
+    """
+    return {
+        name: 1.0 / max(float(np.var(y[name])), 1e-6) if loss == 'mse' else 1.0
+        for name, (_, loss) in HEADS.items()
+    }
+
+
+def convert_to_tflite(model, output_path: str, quantize: bool = True) -> bytes:
+    """
+    Convierte el modelo a un `.tflite` con una firma por tarea.
+
+    Cada firma recibe `input` (batch, n) y retorna `output`; se exporta vía
+    SavedModel porque `from_keras_model` solo genera una firma.
+    """
+    import tensorflow as tf
+
+    modules = task_modules()
+    signatures = {}
+    for name in HEADS:
+        sub = task_model(model, name)
+        spec = tf.TensorSpec([None, modules[name].INPUT_SIZE], tf.float32, name='input')
+        fn = tf.function(lambda x, sub=sub: {'output': sub(x, training=False)},
+                         input_signature=[spec])
+        signatures[name] = fn.get_concrete_function()
+
+    with tempfile.TemporaryDirectory() as saved_model_dir:
+        module = tf.Module()
+        module.model = model
+        tf.saved_model.save(module, saved_model_dir, signatures=signatures)
+        converter = tf.lite.TFLiteConverter.from_saved_model(
+            saved_model_dir, signature_keys=list(HEADS))
+        if quantize:
+            converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        tflite_model = converter.convert()
+
+    with open(output_path, 'wb') as f:
+        f.write(tflite_model)
+
+    print(f"Modelo guardado en: {output_path}")
+    print(f"   Tamaño: {len(tflite_model) / 1024:.2f} KB, firmas: {', '.join(HEADS)}")
+    return tflite_model
+
+
+def predict_signature(content: bytes, name: str, X, batch_size: int = 1024) -> np.ndarray:
+    """Ejecuta la firma `name` del modelo multitarea sobre X por lotes."""
+    interpreter = load_interpreter(content)
+    runner = interpreter.get_signature_runner(name)
+    outputs = [runner(input=np.asarray(X[start:start + batch_size], dtype=np.float32))['output']
+               for start in range(0, len(X), batch_size)]
+    return np.concatenate(outputs)
+
+
+def evaluate_model(content: bytes, X_test: dict, y_test: dict):
+    """Evalúa cada firma del .tflite con la métrica de su modelo original."""
+    modules = task_modules()
+    print(f"\nMétricas por tarea (TFLite):")
+    results = {}
+    for name in HEADS:
+        metric = modules[name].EVAL_METRIC
+        predictions = predict_signature(content, name, X_test[name])
+        results[name] = score_predictions(predictions, y_test[name], metric)
+        print(f"   {name}: {metric}={results[name]:.4f}")
+    return results
+
+
+def _tensor_kb(interpreter) -> float:
+    return sum(
+        int(np.prod(t['shape'])) * np.dtype(t['dtype']).itemsize
+        for t in interpreter.get_tensor_details()
+    ) / 1024
+
+
+def benchmark(multitask: bytes, separate: dict, X: dict, runs: int = 2000, warmup: int = 100) -> dict:
+    """
+    Compara el modelo multitarea contra los modelos separados.
+
+    Un tick es invocar las cuatro tareas con una muestra cada una, como
+    hace `MLService` en la app. El tiempo de carga incluye la primera
+    inferencia de cada tarea, que es cuando el intérprete reserva los
+    tensores de cada firma.
+
+    Args:
+        multitask: Bytes del .tflite multitarea
+        separate: tarea -> bytes del .tflite separado
+        X: tarea -> features de prueba
+    """
+    samples = {name: np.asarray(X[name][:max(1, runs)], dtype=np.float32) for name in HEADS}
+    results = {}
+
+    # Modelos separados
+    rss = current_rss_mb()
+    start = time.perf_counter()
+    interpreters = {}
+    io = {}
+    for name in HEADS:
+        it = interpreters[name] = load_interpreter(separate[name])
+        it.allocate_tensors()
+        io[name] = (it.get_input_details()[0]['index'], it.get_output_details()[0]['index'])
+        it.set_tensor(io[name][0], samples[name][:1])
+        it.invoke()
+    load_ms = (time.perf_counter() - start) * 1000
+    rss_kb = (current_rss_mb() - rss) * 1024
+
+    def tick_separate(i):
+        for name, it in interpreters.items():
+            sample = samples[name]
+            it.set_tensor(io[name][0], sample[i % len(sample)][None, :])
+            it.invoke()
+            it.get_tensor(io[name][1])
+
+    results['separados'] = {
+        'size_kb': sum(len(c) for c in separate.values()) / 1024,
+        'load_ms': load_ms,
+        'tensor_memory_kb': sum(_tensor_kb(it) for it in interpreters.values()),
+        'rss_delta_kb': rss_kb,
+        **_time_ticks(tick_separate, runs, warmup),
+    }
+
+    # Modelo multitarea
+    rss = current_rss_mb()
+    start = time.perf_counter()
+    interpreter = load_interpreter(multitask)
+    runners = {name: interpreter.get_signature_runner(name) for name in HEADS}
+    for name, runner in runners.items():
+        runner(input=samples[name][:1])
+    load_ms = (time.perf_counter() - start) * 1000
+    rss_kb = (current_rss_mb() - rss) * 1024
+
+    def tick_multitask(i):
+        for name, runner in runners.items():
+            sample = samples[name]
+            runner(input=sample[i % len(sample)][None, :])
+
+    results['multitarea'] = {
+        'size_kb': len(multitask) / 1024,
+        'load_ms': load_ms,
+        'tensor_memory_kb': _tensor_kb(interpreter),
+        'rss_delta_kb': rss_kb,
+        **_time_ticks(tick_multitask, runs, warmup),
+    }
+    return results
+
+
+def _time_ticks(tick, runs: int, warmup: int) -> dict:
+    timings = np.empty(runs)
+    for i in range(warmup + runs):
+        start = time.perf_counter()
+        tick(i)
+        if i >= warmup:
+            timings[i - warmup] = time.perf_counter() - start
+    timings *= 1e6
+    return {
+        'tick_mean_us': float(timings.mean()),
+        'tick_p50_us': float(np.percentile(timings, 50)),
+        'tick_p95_us': float(np.percentile(timings, 95)),
+    }
+
+
+def print_benchmark(results: dict):
+    print(f"\nMultitarea vs modelos separados (1 hilo, un tick = 4 tareas):")
+    print(f"   {'':<12} {'Tamaño':>10} {'Carga*':>10} {'Tensores':>11} {'ΔRSS':>9} "
+          f"{'tick p50':>11} {'tick p95':>11}")
+    for name, r in results.items():
+        print(f"   {name:<12} {r['size_kb']:>7.1f} KB {r['load_ms']:>7.2f} ms "
+              f"{r['tensor_memory_kb']:>8.1f} KB {r['rss_delta_kb']:>6.0f} KB "
+              f"{r['tick_p50_us']:>8.1f} µs {r['tick_p95_us']:>8.1f} µs")
+    print("   * carga = crear intérpretes + primera inferencia de cada tarea")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Entrenar el modelo multitarea de Tamagotchi'
+    )
+    parser.add_argument('--epochs', '-e', type=int, default=50)
+    parser.add_argument('--samples', '-s', type=int, default=5000,
+                        help='Muestras sintéticas por tarea (default: 5000)')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', '-o', type=str,
+                        default='../assets/models/multitask.tflite')
+    parser.add_argument('--no-quantize', action='store_true')
+    parser.add_argument('--early-stopping', action='store_true',
+                        help='Detener por val_loss y reducir el learning rate en mesetas')
+    parser.add_argument('--patience', type=int, default=5)
+    parser.add_argument('--compare-dir', type=str, default=str(MODELS_DIR),
+                        help='Directorio con los cuatro .tflite separados para el benchmark')
+    parser.add_argument('--runs', type=int, default=2000,
+                        help='Ticks medidos en el benchmark (default: 2000)')
+
+    args = parser.parse_args(argv)
+
+    print("Entrenamiento del modelo multitarea de Tamagotchi")
+    print("=" * 55)
+
+    if not TF_AVAILABLE:
+        print("TensorFlow es requerido para entrenar el modelo")
+        return 1
+
+    print(f"\nGenerando {args.samples} muestras sintéticas por tarea...")
+    X, y = generate_data(args.samples, args.seed)
+    split_idx = int(args.samples * 0.8)
+    X_train = {name: X[name][:split_idx] for name in HEADS}
+    y_train = {name: y[name][:split_idx] for name in HEADS}
+    X_test = {name: X[name][split_idx:] for name in HEADS}
+    y_test = {name: y[name][split_idx:] for name in HEADS}
+
+    loss_weights = balanced_loss_weights(y_train)
+    print(f"\nCreando modelo...")
+    print(f"   Pesos de pérdida: " + ", ".join(f"{k}={v:.3g}" for k, v in loss_weights.items()))
+    model = create_model(loss_weights)
+    model.summary()
+
+    print(f"\nEntrenando hasta {args.epochs} epochs...")
+    callbacks, _, _ = training_callbacks(args.early_stopping, args.patience)
+    start = time.perf_counter()
+    model.fit(X_train, y_train, epochs=args.epochs, batch_size=32,
+              validation_split=0.2, callbacks=callbacks, verbose=1)
+    print(f"   Tiempo: {time.perf_counter() - start:.1f} s, "
+          f"pico de memoria (RSS): {peak_rss_mb():.1f} MB")
+
+    print(f"\nConvirtiendo a TensorFlow Lite...")
+    output_path = Path(args.output)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    tflite_model = convert_to_tflite(model, str(output_path), quantize=not args.no_quantize)
+
+    evaluate_model(tflite_model, X_test, y_test)
+
+    compare_dir = Path(args.compare_dir)
+    paths = {name: compare_dir / f'{name}.tflite' for name in HEADS}
+    missing = [str(p) for p in paths.values() if not p.exists()]
+    if missing:
+        print(f"\nSin benchmark: faltan {', '.join(missing)}")
+    else:
+        separate = {name: path.read_bytes() for name, path in paths.items()}
+        print_benchmark(benchmark(tflite_model, separate, X_test, runs=args.runs))
+
+    print("\n¡Entrenamiento completado!")
+    return 0
+
+
+if __name__ == '__main__':
+    exit(main())
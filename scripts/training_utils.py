@@ -0,0 +1,302 @@
+"""
+Utilidades compartidas por los scripts de entrenamiento de Tamagotchi.
+
+Contiene helpers de NumPy que usan varios `train_*.py` para generar
+datos sintéticos por lotes sin bucles de Python por muestra, y el bucle
+de entrenamiento común (`fit_model`) con sus callbacks de convergencia.
+"""
+
+import contextlib
+import importlib.util
+import time
+
+import numpy as np
+
+
+def tensorflow_available() -> bool:
+    """Indica si TensorFlow está instalado, sin importarlo."""
+    return importlib.util.find_spec('tensorflow') is not None
+
+
+def import_tensorflow() -> tuple:
+    """
+    Importa TensorFlow y Keras.
+
+    Los scripts lo llaman solo cuando empiezan a entrenar o convertir, así
+    `--help`, `--data-only` y los modos de datos no pagan el costo de
+    importar TensorFlow.
+
+    Returns:
+        tuple: (tf, keras, layers)
+    """
+    import tensorflow as tf
+    from tensorflow import keras
+    from tensorflow.keras import layers
+    return tf, keras, layers
+
+
+def sample_categorical(probs: np.ndarray, rng: np.random.Generator) -> np.ndarray:
+    """
+    Muestrea un índice por fila de una matriz de probabilidades.
+
+    Equivale a llamar `np.random.choice(k, p=row)` para cada fila, pero
+    usando la CDF acumulada y un único lote de uniformes.
+
+    Args:
+        probs: Matriz (n, k) con filas que suman 1
+        rng: Generador de números aleatorios
+
+    Returns:
+        Array (n,) de índices int64 en [0, k)
+    """
+    cdf = np.cumsum(probs, axis=1)
+    u = rng.random((probs.shape[0], 1)) * cdf[:, -1:]
+    idx = (cdf <= u).sum(axis=1)
+    # Protege contra errores de redondeo en el último bin
+    return np.minimum(idx, probs.shape[1] - 1)
+
+
+def one_hot(indices: np.ndarray, n_classes: int) -> np.ndarray:
+    """Convierte índices (n,) a una matriz one-hot float32 (n, n_classes)."""
+    out = np.zeros((indices.shape[0], n_classes), dtype=np.float32)
+    out[np.arange(indices.shape[0]), indices] = 1.0
+    return out
+
+
+def validate_dataset(X, y, input_size: int, output_size: int) -> list:
+    """
+    Valida forma y valores de un dataset; retorna la lista de problemas.
+
+    Recorre los arrays por bloques, así que funciona con arrays memory-mapped
+    más grandes que la memoria.
+    """
+    problems = []
+    if X.ndim != 2 or X.shape[1] != input_size:
+        problems.append(f"X tiene forma {X.shape}, se esperaba (n, {input_size})")
+    if y.ndim != 2 or y.shape[1] != output_size:
+        problems.append(f"y tiene forma {y.shape}, se esperaba (n, {output_size})")
+    if len(X) != len(y):
+        problems.append(f"X tiene {len(X)} filas e y tiene {len(y)}")
+    if problems:
+        return problems
+
+    non_finite = 0
+    for start in range(0, len(X), 1_000_000):
+        non_finite += int(np.count_nonzero(~np.isfinite(X[start:start + 1_000_000])))
+        non_finite += int(np.count_nonzero(~np.isfinite(y[start:start + 1_000_000])))
+    if non_finite:
+        problems.append(f"{non_finite} valores no finitos (NaN/inf)")
+
+    return problems
+
+
+def run_data_only(X, y, input_size: int, output_size: int) -> int:
+    """Valida el dataset ya generado/cargado y resume el resultado (modo --data-only)."""
+    problems = validate_dataset(X, y, input_size, output_size)
+
+    print(f"\nDataset: X {X.shape} {X.dtype}, y {y.shape} {y.dtype}")
+    if problems:
+        print("Problemas encontrados:")
+        for problem in problems:
+            print(f"   - {problem}")
+        return 1
+
+    print("   Validación correcta; no se entrena (--data-only)")
+    return 0
+
+
+def peak_rss_mb() -> float:
+    """Pico de memoria residente (RSS) del proceso en MB."""
+    import resource
+    import sys
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta KB, macOS reporta bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def training_callbacks(early_stopping: bool = False, patience: int = 5,
+                       time_budget: float = None) -> tuple:
+    """
+    Callbacks de convergencia para `fit_model`.
+
+    Con `early_stopping` se detiene cuando `val_loss` deja de mejorar
+    durante `patience` epochs (restaurando los mejores pesos) y se reduce
+    el learning rate a la mitad tras `patience // 2` epochs sin mejora.
+    El reloj mide cada epoch y, si hay `time_budget`, detiene el
+    entrenamiento antes de empezar una epoch que no cabría en el
+    presupuesto.
+
+    Returns:
+        tuple: (callbacks, early_stopping_callback o None, reloj)
+    """
+    from tensorflow import keras
+
+    class TrainingClock(keras.callbacks.Callback):
+        """Mide la duración de cada epoch y aplica el presupuesto de tiempo."""
+
+        def __init__(self, budget=None):
+            super().__init__()
+            self.budget = budget
+            self.epoch_seconds = []
+            self.stopped_by_budget = False
+
+        def on_train_begin(self, logs=None):
+            self.train_start = time.perf_counter()
+
+        def on_epoch_begin(self, epoch, logs=None):
+            self.epoch_start = time.perf_counter()
+
+        def on_epoch_end(self, epoch, logs=None):
+            now = time.perf_counter()
+            self.epoch_seconds.append(now - self.epoch_start)
+            if self.budget is None:
+                return
+            # Estimación conservadora: la próxima epoch dura como la más lenta
+            if now - self.train_start + max(self.epoch_seconds) > self.budget:
+                self.stopped_by_budget = True
+                self.model.stop_training = True
+
+    clock = TrainingClock(time_budget)
+    callbacks = [clock]
+    stopper = None
+
+    if early_stopping:
+        stopper = keras.callbacks.EarlyStopping(
+            monitor='val_loss',
+            patience=patience,
+            restore_best_weights=True,
+            verbose=1,
+        )
+        callbacks += [
+            stopper,
+            keras.callbacks.ReduceLROnPlateau(
+                monitor='val_loss',
+                factor=0.5,
+                patience=max(1, patience // 2),
+                min_lr=1e-5,
+                verbose=1,
+            ),
+        ]
+
+    return callbacks, stopper, clock
+
+
+def fit_model(model, X_train, y_train, epochs: int, batch_size: int = 32,
+              pipeline: str = 'numpy', shuffle_buffer: int = 10000,
+              seed: int = 42, map_fn=None, early_stopping: bool = False,
+              patience: int = 5, time_budget: float = None, profiler=None,
+              validation_data: tuple = None):
+    """
+    Entrena un modelo Keras con arrays en memoria o con un pipeline tf.data.
+
+    Args:
+        model: Modelo Keras compilado
+        X_train, y_train: Datos de entrenamiento (pueden ser memory-mapped)
+        epochs: Número máximo de epochs
+        batch_size: Tamaño de batch
+        pipeline: 'numpy' (arrays completos a `fit`) o 'tfdata'
+                  (streaming por bloques, ver `tf_pipeline.py`)
+        shuffle_buffer: Buffer de mezcla del modo 'tfdata'
+        seed: Semilla de la división y la mezcla del modo 'tfdata'
+        map_fn: Transformación por batch del modo 'tfdata' (ruido de targets)
+        early_stopping: Detener por `val_loss` y reducir el learning rate
+                        en mesetas (ver `training_callbacks`)
+        patience: Epochs sin mejora antes de detener
+        time_budget: Segundos máximos de entrenamiento (None = sin límite)
+        profiler: `profiling.PhaseProfiler` opcional; recibe el throughput
+                  por epoch y traza `model.fit` si se pidió
+        validation_data: (X_val, y_val) fijo; si se indica se entrena con
+                         todo X_train en vez de separar un 20% para validación
+
+    Returns:
+        History de Keras
+    """
+    start = time.perf_counter()
+    callbacks, stopper, clock = training_callbacks(early_stopping, patience, time_budget)
+    trace = profiler.trace_fit() if profiler is not None else contextlib.nullcontext()
+
+    if pipeline == 'tfdata':
+        from tf_pipeline import make_datasets
+
+        train_ds, val_ds, n_train, _ = make_datasets(
+            X_train, y_train, batch_size=batch_size,
+            validation_split=0.2 if validation_data is None else 0.0,
+            shuffle_buffer=shuffle_buffer, seed=seed, map_fn=map_fn,
+        )
+        if validation_data is not None:
+            val_ds = make_datasets(*validation_data, batch_size=batch_size,
+                                   validation_split=0.0, shuffle_buffer=0)[0]
+        with trace:
+            history = model.fit(train_ds, validation_data=val_ds, epochs=epochs,
+                                callbacks=callbacks, verbose=1)
+    else:
+        if validation_data is None:
+            n_train, validation = int(len(X_train) * 0.8), {'validation_split': 0.2}
+        else:
+            n_train, validation = len(X_train), {'validation_data': validation_data}
+        with trace:
+            history = model.fit(
+                X_train, y_train,
+                epochs=epochs,
+                batch_size=batch_size,
+                callbacks=callbacks,
+                verbose=1,
+                **validation
+            )
+
+    _print_training_summary(pipeline, history, start, n_train, epochs,
+                            early_stopping, patience, time_budget, stopper, clock)
+    if profiler is not None:
+        profiler.record_epochs(clock.epoch_seconds, n_train, history.history)
+    return history
+
+
+def fit_datasets(model, train_ds, val_ds, epochs: int, early_stopping: bool = False,
+                 patience: int = 5, time_budget: float = None, n_train: int = None,
+                 profiler=None):
+    """
+    Entrena con datasets `tf.data` ya construidos (p. ej. el modo --data-dir).
+
+    Igual que `fit_model` pero sin dividir los datos: `val_ds` puede ser
+    None y `n_train` (filas por epoch) solo se usa para el throughput.
+    """
+    start = time.perf_counter()
+    callbacks, stopper, clock = training_callbacks(early_stopping, patience, time_budget)
+    trace = profiler.trace_fit() if profiler is not None else contextlib.nullcontext()
+    with trace:
+        history = model.fit(train_ds, validation_data=val_ds, epochs=epochs,
+                            callbacks=callbacks, verbose=1)
+    _print_training_summary('streaming', history, start, n_train, epochs,
+                            early_stopping, patience, time_budget, stopper, clock)
+    if profiler is not None:
+        profiler.record_epochs(clock.epoch_seconds, n_train, history.history)
+    return history
+
+
+def _print_training_summary(pipeline, history, start, n_train, epochs, early_stopping,
+                            patience, time_budget, stopper, clock):
+    """Imprime tiempo, throughput, memoria y, si aplica, las epochs ahorradas."""
+    elapsed = time.perf_counter() - start
+    epochs_run = len(history.history.get('loss', [])) or epochs
+
+    print(f"\nEntrenamiento ({pipeline}):")
+    print(f"   Tiempo: {elapsed:.1f} s")
+    if n_train:
+        print(f"   Throughput: {n_train * epochs_run / elapsed:,.0f} muestras/s")
+    print(f"   Pico de memoria (RSS): {peak_rss_mb():.1f} MB")
+
+    if early_stopping or time_budget is not None:
+        saved_epochs = epochs - epochs_run
+        epoch_seconds = float(np.mean(clock.epoch_seconds)) if clock.epoch_seconds else 0.0
+        if clock.stopped_by_budget:
+            reason = f"presupuesto de tiempo ({time_budget:.0f} s)"
+        elif stopper is not None and stopper.stopped_epoch:
+            reason = f"val_loss sin mejora en {patience} epochs"
+        else:
+            reason = "se completaron todas las epochs"
+        print(f"   Epochs: {epochs_run}/{epochs} ({reason})")
+        if stopper is not None and stopper.best is not None and np.isfinite(stopper.best):
+            print(f"   Mejor val_loss: {stopper.best:.4f}")
+        print(f"   Ahorro estimado: {saved_epochs} epochs, "
+              f"~{saved_epochs * epoch_seconds:.1f} s")
@@ -0,0 +1,146 @@
+import 'dart:convert';
+import 'dart:typed_data';
+
+import 'package:flutter_test/flutter_test.dart';
+import 'package:tamagotchi/models/interaction_history.dart';
+import 'package:tamagotchi/utils/ml_binary_format.dart';
+
+void main() {
+  group('MLBinaryFormat', () {
+    late Map<String, dynamic> exportData;
+
+    Map<String, dynamic> record(int i, {String action = 'feed'}) {
+      return {
+        'features': List<double>.generate(15, (j) => (i + j) / 32),
+        'action_taken': action,
+        'time_to_critical': [10.0 + i, 20.0, 30.5, 180.0],
+        'resulting_emotion': i % 8,
+        'timestamp': DateTime.utc(2025, 1, 1, 12, i).toIso8601String(),
+        'metrics_before': {'hunger': 50.0},
+      };
+    }
+
+    setUp(() {
+      exportData = {
+        'version': '1.0',
+        'export_date': DateTime.utc(2025, 1, 2).toIso8601String(),
+        'pet_name': 'TestPet',
+        'record_count': 3,
+        'records': [
+          record(0),
+          record(1, action: 'play'),
+          record(2, action: 'minigame'),
+        ],
+      };
+    });
+
+    test('empieza con magic, versión y cabecera alineada a 8 bytes', () {
+      final bytes = MLBinaryFormat.encode(exportData);
+      final data = ByteData.sublistView(bytes);
+      final headerSize = data.getUint32(8, Endian.little);
+
+      expect(bytes.sublist(0, 4), MLBinaryFormat.magic);
+      expect(data.getUint32(4, Endian.little), MLBinaryFormat.formatVersion);
+      expect((12 + headerSize) % 8, 0);
+      expect(bytes.length % 8, 0);
+
+      final header = jsonDecode(utf8.decode(bytes.sublist(12, 12 + headerSize)));
+      expect(header['pet_name'], 'TestPet');
+      expect(header['feature_count'], 15);
+      expect(header['actions'], InteractionType.values.map((t) => t.id));
+      expect(header.containsKey('records'), false);
+    });
+
+    test('ida y vuelta conserva los registros', () {
+      final decoded = MLBinaryFormat.decode(MLBinaryFormat.encode(exportData));
+      final records = decoded['records'] as List<Map<String, dynamic>>;
+
+      expect(decoded['record_count'], 3);
+      expect(records.length, 3);
+      expect(records.map((r) => r['action_taken']), ['feed', 'play', 'minigame']);
+
+      for (var i = 0; i < 3; i++) {
+        final original = exportData['records'][i] as Map<String, dynamic>;
+        final features = records[i]['features'] as List<double>;
+        for (var j = 0; j < 15; j++) {
+          expect(features[j], closeTo(original['features'][j] as double, 1e-6));
+        }
+        expect(records[i]['time_to_critical'], original['time_to_critical']);
+        expect(records[i]['resulting_emotion'], original['resulting_emotion']);
+        expect(records[i]['timestamp'], original['timestamp']);
+      }
+    });
+
+    test('guarda instantes UTC a ambos lados de un cambio de horario', () {
+      final winter = DateTime(2025, 1, 15, 9, 30);
+      final summer = DateTime(2025, 7, 15, 9, 30);
+      exportData['records'] = [
+        {...record(0), 'timestamp': winter.toIso8601String()},
+        {...record(1), 'timestamp': summer.toIso8601String()},
+      ];
+      final decoded = MLBinaryFormat.decode(MLBinaryFormat.encode(exportData));
+      final records = decoded['records'] as List<Map<String, dynamic>>;
+
+      expect(decoded.containsKey('utc_offset_minutes'), false);
+      expect(
+        DateTime.parse(records[0]['timestamp'] as String),
+        winter.toUtc(),
+      );
+      expect(
+        DateTime.parse(records[1]['timestamp'] as String),
+        summer.toUtc(),
+      );
+    });
+
+    test('usa varios bloques cuando hay más registros que blockSize', () {
+      exportData['records'] = List.generate(10, (i) => record(i));
+      final decoded = MLBinaryFormat.decode(
+        MLBinaryFormat.encode(exportData, blockSize: 4),
+      );
+      final records = decoded['records'] as List<Map<String, dynamic>>;
+
+      expect(records.length, 10);
+      expect(records.last['time_to_critical'][0], 19.0);
+    });
+
+    test('marca valores faltantes', () {
+      exportData['records'] = [
+        {
+          ...record(0, action: 'desconocida'),
+          'time_to_critical': null,
+          'resulting_emotion': null,
+        },
+      ];
+      final decoded = MLBinaryFormat.decode(MLBinaryFormat.encode(exportData));
+      final only = (decoded['records'] as List).single as Map<String, dynamic>;
+
+      expect(only['action_taken'], isNull);
+      expect(only['time_to_critical'], isNull);
+      expect(only['resulting_emotion'], isNull);
+    });
+
+    test('es más chico que el JSON indentado', () {
+      exportData['records'] = List.generate(500, (i) => record(i));
+      final binary = MLBinaryFormat.encode(exportData);
+      final json = const JsonEncoder.withIndent('  ').convert(exportData);
+
+      expect(binary.length * 4, lessThan(utf8.encode(json).length));
+    });
+
+    test('rechaza registros con distinta cantidad de features', () {
+      exportData['records'] = [
+        record(0),
+        {...record(1), 'features': [0.5, 0.5]},
+      ];
+
+      expect(() => MLBinaryFormat.encode(exportData), throwsArgumentError);
+    });
+
+    test('rechaza archivos que no son TMLB', () {
+      expect(
+        () => MLBinaryFormat.decode(Uint8List.fromList(utf8.encode('{"a": 1}   '))),
+        throwsFormatException,
+      );
+    });
+  });
+}